@@ -0,0 +1,6 @@
+"""
+Benchmarks
+
+Standalone performance scripts for the backend. Run them from the backend
+directory, e.g. ``python -m benchmarks.bench_pdf_extraction``.
+"""
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Chunking Benchmark
+
+1. Compatibility: the offset splitter must return exactly the chunks of
+   LangChain's RecursiveCharacterTextSplitter for the same chunk size and
+   overlap, over generated texts with irregular whitespace, long unbroken
+   tokens and blank lines, and a range of chunk sizes and overlaps.
+2. Throughput in MB/s of LangChain, the offset splitter materializing
+   strings, and the offset splitter computing offsets only.
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.sample_documents import WORDS, random_sentence
+from src.services.chunking.offset_splitter import OffsetTextSplitter
+
+# (chunk size, overlap) pairs checked for compatibility
+SIZES: List[Tuple[int, int]] = [
+    (1, 0), (1, 1), (2, 1), (5, 0), (5, 5), (10, 3), (40, 0), (40, 39),
+    (100, 20), (256, 64), (1000, 200), (1000, 1000), (4000, 400),
+]
+
+_WHITESPACE = [" ", "  ", "\t", "\n", "\n\n", "\n\n\n", " \n", "\n \n", " ", "\r\n"]
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    """Text with irregular whitespace, long tokens and blank lines, about length characters long."""
+    parts: List[str] = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.05:
+            part = "".join(rng.choice(WORDS) for _ in range(rng.randint(5, 200)))
+        elif roll < 0.5:
+            part = random_sentence(rng, rng.randint(1, 30))
+        else:
+            part = rng.choice(WORDS)
+        parts.append(part)
+        parts.append(rng.choice(_WHITESPACE))
+        size += len(part) + 1
+    return "".join(parts)[:length]
+
+
+def document_text(rng: random.Random, paragraphs: int) -> str:
+    """Prose paragraphs separated by blank lines, like extracted page text."""
+    return "\n\n".join(
+        "\n".join(random_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(1, 8)))
+        for _ in range(paragraphs)
+    )
+
+
+def check_compatibility(cases: int, seed: int) -> None:
+    rng = random.Random(seed)
+    texts = ["", " ", "\n\n", "a", "ab cd", " \t\n x \n\n", "x" * 5000, "\n\n\n\n" + "word " * 50]
+    texts += [random_text(rng, rng.choice([10, 100, 1000, 10000])) for _ in range(cases)]
+    texts += [document_text(rng, 50) for _ in range(max(cases // 10, 1))]
+
+    checked = 0
+    for chunk_size, overlap in SIZES:
+        reference = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+        splitter = OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+        for text in texts:
+            if chunk_size < 5 and len(text) > 1000:
+                continue
+            expected = reference.split_text(text)
+            actual = splitter.split_text(text)
+            assert actual == expected, (
+                f"chunks differ for chunk_size={chunk_size}, overlap={overlap}, text={text[:80]!r}"
+            )
+            checked += 1
+    print(f"Compatibility: {checked} (text, chunk size) cases match LangChain")
+
+
+def _throughput(split: Callable[[str], object], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        split(text)
+        best = min(best, time.perf_counter() - started)
+    return len(text.encode("utf-8")) / (1024 * 1024) / best
+
+
+def bench_throughput(size_mb: float, chunk_size: int, overlap: int, repeat: int) -> None:
+    rng = random.Random(1)
+    paragraphs = max(int(size_mb * 1024 * 1024 / 500), 1)
+    corpus = {
+        "prose": document_text(rng, paragraphs),
+        "unbroken": "".join(rng.choice(WORDS) for _ in range(int(size_mb * 1024 * 1024 / 5))),
+    }
+    reference = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+    splitter = OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+    splits = {
+        "langchain": reference.split_text,
+        "offsets+strings": splitter.split_text,
+        "offsets only": splitter.split_offsets,
+    }
+
+    print(f"\nThroughput (chunk size {chunk_size}, overlap {overlap})")
+    print(f"{'text':>10} {'MB':>6} {'splitter':>16} {'MB/s':>8} {'speedup':>8}")
+    for name, text in corpus.items():
+        baseline = None
+        for splitter_name, split in splits.items():
+            rate = _throughput(split, text, repeat)
+            baseline = baseline or rate
+            size = len(text.encode("utf-8")) / (1024 * 1024)
+            print(f"{name:>10} {size:>6.1f} {splitter_name:>16} {rate:>8.2f} {rate / baseline:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=200, help="Random texts per chunk size in the compatibility check")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the compatibility texts")
+    parser.add_argument("--size-mb", type=float, default=8.0, help="Size of each throughput text")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    check_compatibility(args.cases, args.seed)
+    bench_throughput(args.size_mb, args.chunk_size, args.overlap, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Coarse Search Benchmark
+
+Compares vector search on the full embeddings with candidate search on a
+truncated, renormalized column followed by exact rescoring on the full
+vectors (COARSE_EMBEDDING_DIMENSION / RESCORE_CANDIDATE_FACTOR), and
+reports recall@k against exact brute-force search, p50/p95 search latency
+and the size of the table on disk.
+
+By default the embeddings are synthetic, with variance decaying over the
+dimensions the way embeddings trained for shortened outputs do. Real
+embeddings can be loaded from a .npy file of shape (n, dim) instead; then
+queries are held-out rows.
+"""
+
+import argparse
+import asyncio
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.services.lance_db.lance_db_setup import LanceDBVectorStore
+
+
+def synthetic_embeddings(rng: np.random.Generator, count: int, dimension: int) -> np.ndarray:
+    """Unit vectors whose variance decays over the dimensions."""
+    scale = (1 + np.arange(dimension) / 32) ** -0.75
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32) * scale
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_data(args: argparse.Namespace) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(args.seed)
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+        rng.shuffle(vectors)
+        return vectors[args.queries:args.queries + args.documents], vectors[:args.queries]
+    documents = synthetic_embeddings(rng, args.documents, args.dimension)
+    # Queries are noisy copies of documents, so each has close neighbours
+    anchors = documents[rng.integers(0, len(documents), args.queries)]
+    noise = synthetic_embeddings(rng, args.queries, args.dimension)
+    queries = anchors + args.noise * noise
+    return documents, queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_neighbours(documents: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    distances = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ documents.T + (documents ** 2).sum(axis=1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+async def build_store(root: Path, documents: np.ndarray, coarse_dimension: int, rescore_factor: int) -> LanceDBVectorStore:
+    store = LanceDBVectorStore()
+    store.db_path = root / f"coarse_{coarse_dimension}"
+    store.dimension = documents.shape[1]
+    store.coarse_dimension = coarse_dimension
+    store.rescore_factor = rescore_factor
+    await store.process_multiple_documents([{
+        "file_name": "corpus.txt",
+        "file_type": "txt",
+        "texts": [str(index) for index in range(len(documents))],
+        "embeddings": documents,
+        "metadata": [{"row": index} for index in range(len(documents))],
+    }])
+    await asyncio.to_thread(store.table.optimize)
+    return store
+
+
+async def run_queries(store: LanceDBVectorStore, queries: np.ndarray, k: int) -> Tuple[List[List[int]], List[float]]:
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results = await store.search_similar(query, limit=k, similarity_threshold=0)
+        latencies.append(time.perf_counter() - started)
+        found.append([result["metadata"]["row"] for result in results])
+    return found, latencies
+
+
+def recall(found: List[List[int]], truth: np.ndarray) -> float:
+    return float(np.mean([len(set(rows) & set(expected)) / len(expected) for rows, expected in zip(found, truth)]))
+
+
+async def bench(args: argparse.Namespace) -> None:
+    documents, queries = make_data(args)
+    truth = exact_neighbours(documents, queries, args.k)
+    print(f"{len(documents)} documents, {len(queries)} queries, {documents.shape[1]} dimensions, recall@{args.k}")
+    print(f"{'search':>22} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7} {'disk MB':>8}")
+
+    root = Path(tempfile.mkdtemp(prefix="bench_coarse_"))
+    try:
+        configurations: List[Tuple[str, int, int]] = [("full vectors", 0, 1)]
+        for dimension in args.coarse_dimensions:
+            configurations.append((f"{dimension} dims, no rescore", dimension, 1))
+            configurations.append((f"{dimension} dims, {args.factor}x rescore", dimension, args.factor))
+        stores = {}
+        for name, dimension, factor in configurations:
+            store = stores.get(dimension)
+            if store is None:
+                store = stores[dimension] = await build_store(root, documents, dimension, factor)
+            store.rescore_factor = factor
+            await run_queries(store, queries[:5], args.k)  # warm up
+            found, latencies = await run_queries(store, queries, args.k)
+            latencies_ms = sorted(latency * 1000 for latency in latencies)
+            print(
+                f"{name:>22} {recall(found, truth):>7.3f} {statistics.median(latencies_ms):>7.2f} "
+                f"{latencies_ms[int(len(latencies_ms) * 0.95) - 1]:>7.2f} {directory_size(store.db_path) / 1e6:>8.1f}"
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1536, help="Dimension of synthetic embeddings")
+    parser.add_argument("--noise", type=float, default=0.5, help="Noise added to documents to make synthetic queries")
+    parser.add_argument("--vectors", type=str, default=None, help="Load embeddings from a .npy file instead")
+    parser.add_argument("--coarse-dimensions", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--factor", type=int, default=10, help="Candidates per result for rescoring")
+    parser.add_argument("-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+DOCX Extraction Benchmark
+
+Measures time and peak RSS of DOCX text extraction with the python-docx
+object model versus the streaming reader, over a generated corpus of
+documents with large merged tables. Each measurement runs in a fresh
+process; peak RSS is sampled while the extraction runs and reported
+together with the growth over the RSS before it started.
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.sample_documents import make_docx
+from src.services.file_services.document_processor import _extract_docx_text_python_docx
+from src.services.file_services.docx_reader import iter_docx_blocks
+from src.services.file_services.memory_usage import current_rss_bytes
+
+# name: (paragraphs, tables, rows per table, grid columns)
+CORPUS: Dict[str, Tuple[int, int, int, int]] = {
+    "prose": (20000, 0, 0, 0),
+    "contract": (4000, 10, 200, 8),
+    "wide-tables": (200, 10, 300, 40),
+    "long-table": (100, 1, 20000, 10),
+}
+
+_EXTRACTORS = {
+    "python-docx": _extract_docx_text_python_docx,
+    "streaming": lambda path: "\n\n".join(iter_docx_blocks(path)),
+}
+
+
+def _measure(extractor: str, path: str, results: multiprocessing.Queue) -> None:
+    """Extract the document, sampling RSS every millisecond to find the peak."""
+    baseline = peak = current_rss_bytes()
+    done = threading.Event()
+
+    def sample() -> None:
+        nonlocal peak
+        while not done.wait(0.001):
+            peak = max(peak, current_rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    text = _EXTRACTORS[extractor](path)
+    elapsed = time.perf_counter() - started
+    done.set()
+    sampler.join()
+    peak = max(peak, current_rss_bytes())
+    mb = 1024 * 1024
+    results.put((elapsed, baseline / mb, peak / mb, len(text), hashlib.sha256(text.encode()).hexdigest()))
+
+
+def _run(extractor: str, path: str) -> Tuple[float, float, float, int, str]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(extractor, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the size of every corpus document")
+    parser.add_argument("--docx", type=str, nargs="*", default=[], help="Also benchmark existing DOCX files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        documents: List[Tuple[str, str]] = []
+        for name, (paragraphs, tables, rows, cols) in CORPUS.items():
+            path = os.path.join(corpus_dir, f"{name}.docx")
+            with open(path, "wb") as f:
+                f.write(make_docx(int(paragraphs * args.scale), tables, int(rows * args.scale), cols))
+            documents.append((name, path))
+        documents.extend((os.path.basename(path), path) for path in args.docx)
+
+        print(f"{'document':>14} {'MB':>6} {'extractor':>12} {'seconds':>8} {'peak RSS MB':>12} {'+RSS MB':>8} {'chars':>10}")
+        for name, path in documents:
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            outputs = set()
+            for extractor in _EXTRACTORS:
+                elapsed, baseline, peak, chars, digest = _run(extractor, path)
+                outputs.add(digest)
+                print(
+                    f"{name:>14} {size_mb:>6.1f} {extractor:>12} {elapsed:>8.2f} "
+                    f"{peak:>12.1f} {peak - baseline:>8.1f} {chars:>10}"
+                )
+            assert len(outputs) == 1, f"extractors disagree on {name}"
+
+
+if __name__ == "__main__":
+    main()
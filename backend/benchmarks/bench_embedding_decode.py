@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Embedding Decode Benchmark
+
+Decodes synthetic embeddings API response bodies the way the client does:
+JSON parsing, construction of the OpenAI SDK response model (which, like the
+SDK, skips validation) and conversion to a NumPy matrix. Compares
+
+- float: ``encoding_format="float"`` lists, stacked with ``np.array``
+  into float64
+- sdk lists: the SDK default when no encoding is given, which requests
+  base64 and converts every vector back to a list of Python floats, then
+  stacked with ``np.array`` into float64 (the previous path)
+- base64: ``encoding_format="base64"`` raw float32 bytes, decoded with
+  ``np.frombuffer`` into a preallocated float32 matrix
+
+and reports decode time and peak Python memory per 1,000 vectors.
+"""
+
+import argparse
+import base64
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+from openai.types import CreateEmbeddingResponse
+
+from src.services.embedding_models.openai_embedding import OpenAIEmbeddingModel
+
+
+def response_body(vectors: np.ndarray, encoding: str) -> bytes:
+    """An embeddings API response body for the vectors."""
+    if encoding == "base64":
+        embeddings = [base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii") for vector in vectors]
+    else:
+        embeddings = [vector.tolist() for vector in vectors]
+    return json.dumps({
+        "object": "list",
+        "model": "text-embedding-3-small",
+        "data": [{"object": "embedding", "index": index, "embedding": embedding} for index, embedding in enumerate(embeddings)],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }).encode("utf-8")
+
+
+def decode_float(body: bytes, model: OpenAIEmbeddingModel) -> np.ndarray:
+    response = CreateEmbeddingResponse.construct(**json.loads(body))
+    return np.array([data.embedding for data in sorted(response.data, key=lambda data: data.index)])
+
+
+def decode_sdk_lists(body: bytes, model: OpenAIEmbeddingModel) -> np.ndarray:
+    response = CreateEmbeddingResponse.construct(**json.loads(body))
+    for data in response.data:
+        data.embedding = np.frombuffer(base64.b64decode(data.embedding), dtype="float32").tolist()
+    return np.array([data.embedding for data in sorted(response.data, key=lambda data: data.index)])
+
+
+def decode_base64(body: bytes, model: OpenAIEmbeddingModel) -> np.ndarray:
+    response = CreateEmbeddingResponse.construct(**json.loads(body))
+    out = np.empty((len(response.data), model.embedding_dim), dtype=np.float32)
+    model._decode_into(out, response.data)
+    return out
+
+
+def measure(decode: Callable[[bytes, OpenAIEmbeddingModel], np.ndarray], body: bytes, model: OpenAIEmbeddingModel, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decode(body, model)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    result = decode(body, model)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=1000, help="Embeddings per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    model = OpenAIEmbeddingModel()
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, model.embedding_dim)).astype(np.float32)
+    per_1000 = 1000 / args.vectors
+
+    print(f"{args.vectors} vectors of {model.embedding_dim} dimensions")
+    print(f"{'path':>9} {'body MB':>8} {'ms/1k':>8} {'peak MB/1k':>11} {'result MB/1k':>13} {'dtype':>8}")
+    results = {}
+    paths = (("float", "float", decode_float), ("sdk lists", "base64", decode_sdk_lists), ("base64", "base64", decode_base64))
+    for name, encoding, decode in paths:
+        body = response_body(vectors, encoding)
+        seconds, peak, result = measure(decode, body, model, args.repeat)
+        results[name] = result
+        print(
+            f"{name:>9} {len(body) / 1e6:>8.1f} {seconds * 1000 * per_1000:>8.1f} "
+            f"{peak / 1e6 * per_1000:>11.1f} {result.nbytes / 1e6 * per_1000:>13.1f} {str(result.dtype):>8}"
+        )
+
+    for name in ("float", "sdk lists"):
+        assert np.array_equal(results[name].astype(np.float32), results["base64"]), f"{name} embeddings differ"
+    print("All paths decode to the same float32 values")
+
+
+if __name__ == "__main__":
+    main()
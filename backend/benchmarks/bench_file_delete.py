@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+File Delete Benchmark
+
+Latency of deleting one file's chunks from a 1,000,000-row table (1,000
+files of 1,000 chunks by default) with
+
+- scan: count_rows, a delete with an unindexed file_name predicate and
+  count_rows again (the previous delete_by_file)
+- indexed: LanceDBVectorStore.delete_by_file once the scalar indexes are
+  built, counting the rows from the delete itself
+
+plus the time to build the scalar indexes. Embeddings are short since the
+delete never reads them.
+"""
+
+import argparse
+import asyncio
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pyarrow as pa
+
+from src.services.lance_db.lance_db_setup import LanceDBVectorStore, _embedding_column, _random_ids, _timestamps
+
+
+def scan_delete(store: LanceDBVectorStore, file_name: str) -> int:
+    initial_count = store.table.count_rows()
+    store.table.delete(f"file_name = '{file_name}'")
+    return initial_count - store.table.count_rows()
+
+
+def report(name: str, latencies: List[float]) -> float:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    median = statistics.median(latencies_ms)
+    print(f"{name:>8} {median:>8.1f} {latencies_ms[-1]:>8.1f} {len(latencies):>8}")
+    return median
+
+
+async def bench(args: argparse.Namespace) -> None:
+    root = Path(tempfile.mkdtemp(prefix="bench_file_delete_"))
+    try:
+        store = LanceDBVectorStore(root)
+        store.dimension = args.dimension
+        store.coarse_dimension = 0
+        store.index_type = "NONE"
+        await store.create_or_get_table()
+        rng = np.random.default_rng(0)
+        embeddings = _embedding_column(rng.standard_normal((args.chunks, args.dimension), dtype=np.float32), args.dimension)
+        # Appended to the table directly, so no index is built before the scan deletes
+        for file in range(args.files):
+            store.table.add(store._rows_batch({
+                "id": _random_ids(args.chunks),
+                "text": pa.repeat(pa.scalar("Chunk of the benchmark corpus."), args.chunks),
+                "embedding": embeddings,
+                "metadata": pa.repeat(pa.scalar("{}"), args.chunks),
+                "file_name": pa.repeat(pa.scalar(f"file_{file}.pdf"), args.chunks),
+                "file_type": pa.repeat(pa.scalar("pdf"), args.chunks),
+                "chunk_index": np.arange(args.chunks, dtype=np.int32),
+                "created_at": _timestamps(args.chunks),
+                "content_hash": pa.repeat(pa.scalar(None, pa.string()), args.chunks),
+            }))
+        store.table.optimize()
+        print(f"{store.table.count_rows()} rows in {args.files} files, {args.deletes} deletes per path")
+        print(f"{'path':>8} {'p50 ms':>8} {'max ms':>8} {'deletes':>8}")
+
+        files = iter(range(args.files))
+        latencies = []
+        for file in [next(files) for _ in range(args.deletes)]:
+            started = time.perf_counter()
+            assert scan_delete(store, f"file_{file}.pdf") == args.chunks
+            latencies.append(time.perf_counter() - started)
+        scan = report("scan", latencies)
+
+        started = time.perf_counter()
+        await asyncio.to_thread(store._update_indexes)
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        for file in [next(files) for _ in range(args.deletes)]:
+            started = time.perf_counter()
+            assert await store.delete_by_file(f"file_{file}.pdf") == args.chunks
+            latencies.append(time.perf_counter() - started)
+        indexed = report("indexed", latencies)
+        print(f"Speedup: {scan / indexed:.1f}x, scalar indexes built in {build_seconds:.1f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=1000, help="Chunks per file")
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--deletes", type=int, default=20, help="Files deleted per path")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Ingest Memory Benchmark
+
+Peak RSS growth while the embeddings of an ingest (10,000 chunks by
+default) go from embedding API responses into LanceDB:
+
+- legacy: responses converted to Python float lists by the SDK, a float64
+  matrix per request, concatenated per append, then per-row ``tolist()``
+  dicts and a pandas DataFrame (the previous storage path)
+- float32: base64 responses decoded into float32 matrices, copied once into
+  the storage stage's reusable buffer and appended as an Arrow fixed-size
+  list column viewing that buffer
+
+Requests are decoded ``--concurrency`` at a time, as the pipeline keeps that
+many in flight, and stored in appends of ``--storage-batch`` rows. Each
+variant runs in a fresh process so their peaks do not mask each other.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_embedding_decode import decode_base64, decode_sdk_lists, response_body
+from src.services.embedding_models.openai_embedding import OpenAIEmbeddingModel
+from src.services.lance_db.lance_db_setup import LanceDBVectorStore
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def legacy_add(store: LanceDBVectorStore, texts: List[str], embeddings: np.ndarray, start: int) -> None:
+    """The previous add_chunks body: one dict per row and a DataFrame."""
+    now = datetime.now()
+    records = [
+        {
+            "id": f"chunk-{start + row}",
+            "text": text,
+            "embedding": embedding.tolist(),
+            "metadata": json.dumps({"chunk_index": start + row}),
+            "file_name": "bench.txt",
+            "file_type": "txt",
+            "chunk_index": start + row,
+            "created_at": now,
+            "content_hash": None,
+        }
+        for row, (text, embedding) in enumerate(zip(texts, embeddings))
+    ]
+    store.table.add(data=pd.DataFrame(records), mode="append")
+
+
+def run_variant(variant: str, args: argparse.Namespace, db_path: str, result: Dict[str, float]) -> None:
+    store = LanceDBVectorStore()
+    store.db_path = Path(db_path)
+    asyncio.run(store.create_or_get_table())
+    model = OpenAIEmbeddingModel()
+    model.embedding_dim = store.dimension
+    texts = [f"chunk {index} " * 60 for index in range(args.chunks)]
+    rng = np.random.default_rng(0)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    decode = decode_sdk_lists if variant == "legacy" else decode_base64
+    stored = 0
+    pending: List[np.ndarray] = []  # legacy: matrices waiting for the next append
+    buffer = np.empty((args.storage_batch, store.dimension), dtype=np.float32)
+    filled = 0  # float32: rows of the buffer waiting for the next append
+    
+    def append(rows: np.ndarray) -> None:
+        nonlocal stored
+        count = len(rows)
+        if variant == "legacy":
+            legacy_add(store, texts[stored:stored + count], rows, stored)
+        else:
+            asyncio.run(store.add_chunks(
+                texts=texts[stored:stored + count],
+                embeddings=rows,
+                metadata=[{"chunk_index": stored + row} for row in range(count)],
+                file_names=["bench.txt"] * count,
+                file_types=["txt"] * count,
+                chunk_indices=list(range(stored, stored + count)),
+                content_hashes=[None] * count,
+                ids=[f"chunk-{stored + row}" for row in range(count)]
+            ))
+        stored += count
+    
+    request_starts = list(range(0, args.chunks, args.request_batch))
+    for group in range(0, len(request_starts), args.concurrency):
+        # The responses of the requests in flight are decoded before they are stored
+        decoded = []
+        for start in request_starts[group:group + args.concurrency]:
+            vectors = rng.standard_normal((min(args.request_batch, args.chunks - start), store.dimension), dtype=np.float32)
+            decoded.append(decode(response_body(vectors, "base64"), model))
+        for embeddings in decoded:
+            if variant == "legacy":
+                # Everything pending was concatenated into one append once batch_size rows were waiting
+                pending.append(embeddings)
+                if sum(map(len, pending)) >= args.storage_batch:
+                    append(np.concatenate(pending))
+                    pending = []
+                continue
+            start = 0
+            while start < len(embeddings):
+                count = min(args.storage_batch - filled, len(embeddings) - start)
+                buffer[filled:filled + count] = embeddings[start:start + count]
+                filled += count
+                start += count
+                if filled == args.storage_batch:
+                    append(buffer)
+                    filled = 0
+        del decoded
+    if pending:
+        append(np.concatenate(pending))
+    if filled:
+        append(buffer[:filled])
+
+    result["seconds"] = time.perf_counter() - started
+    result["rss_growth_mb"] = peak_rss_mb() - baseline
+    result["rows"] = store.table.count_rows()
+
+
+def measure(variant: str, args: argparse.Namespace) -> Dict[str, float]:
+    directory = tempfile.mkdtemp(prefix="bench_ingest_memory_")
+    try:
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            result = manager.dict()
+            process = context.Process(
+                target=run_variant, args=(variant, args, directory, result)
+            )
+            process.start()
+            process.join()
+            return dict(result)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--request-batch", type=int, default=2048, help="Texts per embedding request (BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight (EMBEDDING_CONCURRENCY)")
+    parser.add_argument("--storage-batch", type=int, default=512, help="Rows per append (STORAGE_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    print(f"{args.chunks} chunks, {args.request_batch} per request, {args.storage_batch} per append")
+    print(f"{'path':>8} {'peak RSS +MB':>13} {'seconds':>8} {'rows':>7}")
+    results = {}
+    for variant in ("legacy", "float32"):
+        results[variant] = measure(variant, args)
+        print(
+            f"{variant:>8} {results[variant]['rss_growth_mb']:>13.1f} "
+            f"{results[variant]['seconds']:>8.2f} {results[variant]['rows']:>7}"
+        )
+    print(f"Peak RSS growth reduced {results['legacy']['rss_growth_mb'] / results['float32']['rss_growth_mb']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
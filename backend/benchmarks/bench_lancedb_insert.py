@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+LanceDB Insert Benchmark
+
+Rows/sec of inserting 100,000 chunks (by default) into a fresh table with
+
+- rows: one dict per chunk with a uuid4, datetime.now(), json.dumps and
+  embedding.tolist(), wrapped in a pandas DataFrame (the previous
+  add_embeddings)
+- arrow: LanceDBVectorStore.add_embeddings, which builds one Arrow record
+  batch per append with the embedding column viewing the float32 matrix
+
+Chunks are appended ``--batch`` at a time, as a document's chunks are.
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from src.services.lance_db.lance_db_setup import LanceDBVectorStore
+
+
+def rows_add(store: LanceDBVectorStore, texts: List[str], embeddings: np.ndarray, metadata: List[dict], start: int) -> None:
+    data = []
+    for offset, (text, embedding, meta) in enumerate(zip(texts, embeddings, metadata)):
+        data.append({
+            "id": str(uuid.uuid4()),
+            "text": text,
+            "embedding": embedding.tolist(),
+            "metadata": json.dumps(meta),
+            "file_name": "bench.pdf",
+            "file_type": "pdf",
+            "chunk_index": start + offset,
+            "created_at": datetime.now(),
+            "content_hash": None,
+        })
+    store.table.add(data=pd.DataFrame(data), mode="append")
+
+
+async def bench(variant: str, texts: List[str], embeddings: np.ndarray, batch: int) -> float:
+    directory = tempfile.mkdtemp(prefix="bench_lancedb_insert_")
+    try:
+        store = LanceDBVectorStore(Path(directory))
+        store.dimension = embeddings.shape[1]
+        await store.create_or_get_table()
+        metadata = [{"chunk_index": index, "chunk_length": len(text)} for index, text in enumerate(texts)]
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch):
+            end = start + batch
+            if variant == "rows":
+                rows_add(store, texts[start:end], embeddings[start:end], metadata[start:end], start)
+            else:
+                await store.add_embeddings(
+                    texts[start:end], embeddings[start:end], metadata[start:end], "bench.pdf", "pdf", start_index=start
+                )
+        elapsed = time.perf_counter() - started
+        assert store.table.count_rows() == len(texts)
+        return elapsed
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=4096, help="Chunks per append")
+    parser.add_argument("--dimension", type=int, default=None, help="Embedding dimension (the configured one if unset)")
+    args = parser.parse_args()
+
+    dimension = args.dimension or LanceDBVectorStore().dimension
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.chunks, dimension), dtype=np.float32)
+    texts = [f"Chunk {index} of the benchmark document. " * 20 for index in range(args.chunks)]
+
+    print(f"{args.chunks} chunks of {dimension} dimensions, {args.batch} per append")
+    print(f"{'path':>6} {'seconds':>8} {'rows/s':>10}")
+    results = {}
+    for variant in ("rows", "arrow"):
+        results[variant] = asyncio.run(bench(variant, texts, embeddings, args.batch))
+        print(f"{variant:>6} {results[variant]:>8.2f} {args.chunks / results[variant]:>10.0f}")
+    print(f"Speedup: {results['rows'] / results['arrow']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
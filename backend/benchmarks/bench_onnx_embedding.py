@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+ONNX Embedding Benchmark
+
+Texts/sec and tokens/sec of the local ONNX embedding model versus the
+OpenAI embedding path on chunk-sized texts of mixed length, plus the share
+of padded tokens with length-bucketed batches versus batches in input order.
+
+The ONNX model needs a local model directory with model.onnx (or
+model_quantized.onnx) and tokenizer.json, e.g. an ONNX export of
+BAAI/bge-small-en-v1.5. Quantization, worker count and batch size follow
+the ONNX_* settings and can be overridden with the options below; run on
+the target nodes (e.g. 16 cores) for representative numbers.
+
+The OpenAI path goes to the fake OpenAI server with --openai-latency-ms per
+request by default, or to a given API (--base-url, OPENAI_API_KEY set).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import List, Optional
+
+import numpy as np
+import uvicorn
+
+from benchmarks.fake_openai_server import FakeServerSettings, create_app, serve_in_thread
+from benchmarks.sample_documents import random_sentence
+
+
+def make_texts(count: int, max_chars: int, seed: int = 0) -> List[str]:
+    """Chunk-like texts between a tenth of max_chars and max_chars long."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        target = rng.randint(max_chars // 10, max_chars)
+        text = ""
+        while len(text) < target:
+            text += random_sentence(rng) + " "
+        texts.append(text[:target])
+    return texts
+
+
+async def run(model, texts: List[str], batch_size: int) -> dict:
+    """Embed texts in pipeline-sized calls, up to model.concurrency at once."""
+    from src.services.embedding_models import EmbeddingUsage
+
+    usage = EmbeddingUsage()
+    semaphore = asyncio.Semaphore(model.concurrency)
+
+    async def embed(batch: List[str]) -> np.ndarray:
+        async with semaphore:
+            return await model.generate_embeddings(batch, usage)
+
+    await model.generate_embeddings(texts[:8])  # warm up
+    started = time.perf_counter()
+    await asyncio.gather(*(embed(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)))
+    elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "texts_per_sec": len(texts) / elapsed, "tokens_per_sec": usage.tokens / elapsed}
+
+
+def padding_overhead(model, texts: List[str]) -> None:
+    """Print padded tokens over real tokens for bucketed and input-order batches."""
+    lengths = [len(encoding.ids) for encoding in model.tokenizer.encode_batch(texts)]
+    tokens = sum(lengths)
+    bucketed = sum(len(batch) * lengths[batch[-1]] for batch in model.pack_batches(lengths))
+    size = max(len(batch) for batch in model.pack_batches(lengths))
+    in_order = sum(
+        len(lengths[i:i + size]) * max(lengths[i:i + size]) for i in range(0, len(lengths), size)
+    )
+    print(f"Padding overhead: {bucketed / tokens - 1:.1%} bucketed, {in_order / tokens - 1:.1%} in input order")
+
+
+async def bench_onnx(args: argparse.Namespace, texts: List[str]) -> Optional[dict]:
+    from src.services.embedding_models import OnnxEmbeddingModel
+
+    model = OnnxEmbeddingModel()
+    try:
+        await model.initialize()
+    except ImportError as e:
+        print(f"Skipping ONNX: {e}")
+        return None
+    print(f"ONNX model: {model.get_model_info()}")
+    padding_overhead(model, texts)
+    result = await run(model, texts, model.batch_size)
+    model.close()
+    return result
+
+
+async def bench_openai(args: argparse.Namespace, texts: List[str]) -> dict:
+    from config.openai import close_openai_client
+    from src.services.embedding_models import OpenAIEmbeddingModel
+
+    model = OpenAIEmbeddingModel()
+    await model.initialize()
+    result = await run(model, texts, model.batch_size)
+    await close_openai_client()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--max-chars", type=int, default=1000, help="Longest text, like CHUNK_SIZE")
+    parser.add_argument("--model-dir", type=str, default=None, help="ONNX model directory (ONNX_MODEL_DIR)")
+    parser.add_argument("--workers", type=int, default=None, help="ONNX_WORKERS")
+    parser.add_argument("--batch-tokens", type=int, default=None, help="ONNX_BATCH_TOKENS")
+    parser.add_argument("--no-quantize", action="store_true", help="Run the full-precision model")
+    parser.add_argument("--base-url", type=str, default=None, help="Benchmark this API instead of the fake server")
+    parser.add_argument("--openai-latency-ms", type=float, default=300.0, help="Fake server latency per request")
+    parser.add_argument("--skip-openai", action="store_true")
+    args = parser.parse_args()
+
+    overrides = {
+        "ONNX_MODEL_DIR": args.model_dir,
+        "ONNX_WORKERS": args.workers,
+        "ONNX_BATCH_TOKENS": args.batch_tokens,
+        "ONNX_QUANTIZE": "false" if args.no_quantize else None,
+    }
+    os.environ.update({name: str(value) for name, value in overrides.items() if value is not None})
+
+    # The OpenAI settings are read once on import, so the stand-in starts first
+    server: Optional[uvicorn.Server] = None
+    if not args.skip_openai:
+        base_url = args.base_url
+        if base_url is None:
+            base_url, server = serve_in_thread(create_app(FakeServerSettings(
+                dimension=int(os.environ.get("OPENAI_EMBEDDING_DIMENSION", 1536)),
+                latency_ms=args.openai_latency_ms,
+                latency_distribution="lognormal",
+            )))
+            os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["OPENAI_BASE_URL"] = base_url
+
+    texts = make_texts(args.texts, args.max_chars)
+    print(f"{len(texts)} texts of up to {args.max_chars} characters on {os.cpu_count()} cores")
+    results = {"onnx": asyncio.run(bench_onnx(args, texts))}
+    try:
+        if not args.skip_openai:
+            results["openai"] = asyncio.run(bench_openai(args, texts))
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    print(f"{'path':>8} {'seconds':>9} {'texts/s':>10} {'tokens/s':>11}")
+    for name, result in results.items():
+        if result is not None:
+            print(f"{name:>8} {result['seconds']:>9.2f} {result['texts_per_sec']:>10.1f} {result['tokens_per_sec']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
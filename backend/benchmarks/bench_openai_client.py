@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+OpenAI Client Benchmark
+
+Per-request latency of embedding requests sent
+
+- with a new AsyncOpenAI client per request (the previous behaviour of
+  get_openai_client), which opens a new TCP and TLS connection every time
+- with the shared pooled client of config.openai, which reuses keep-alive
+  connections
+
+By default the requests go to the fake OpenAI server over HTTPS with a
+self-signed certificate, so the difference is the TCP and TLS setup on
+loopback; against
+the real API (--base-url https://api.openai.com/v1, OPENAI_API_KEY set) it
+also includes the network round trips of the handshakes.
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import uvicorn
+from openai import AsyncOpenAI
+
+from benchmarks.fake_openai_server import create_app, serve_in_thread
+from config import openai as openai_config
+
+
+def write_certificate(directory: Path) -> Tuple[str, str]:
+    """Write a self-signed certificate for localhost; returns (certificate, key) paths."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([
+            x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))
+        ]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    certificate_path, key_path = directory / "cert.pem", directory / "key.pem"
+    certificate_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    return str(certificate_path), str(key_path)
+
+
+async def measure(send: Callable[[], object], requests: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await send()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def bench(base_url: str, api_key: str, model: str, requests: int, concurrency: int) -> None:
+    async def fresh_client() -> None:
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        try:
+            await client.embeddings.create(model=model, input="benchmark")
+        finally:
+            await client.close()
+
+    shared = openai_config.create_openai_client(api_key, base_url)
+
+    async def shared_client() -> None:
+        await shared.embeddings.create(model=model, input="benchmark")
+
+    print(f"{requests} requests to {base_url}, concurrency {concurrency}")
+    print(f"{'client':>18} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    results = {}
+    for name, send in (("new per request", fresh_client), ("shared pooled", shared_client)):
+        await measure(send, min(5, requests), 1)  # warm up
+        latencies = sorted(latency * 1000 for latency in await measure(send, requests, concurrency))
+        results[name] = statistics.mean(latencies)
+        print(
+            f"{name:>18} {statistics.median(latencies):>8.2f} "
+            f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} {results[name]:>8.2f}"
+        )
+    await shared.close()
+
+    print(f"Saved per request: {results['new per request'] - results['shared pooled']:.2f} ms")
+    print(f"Connection stats: {openai_config.get_openai_connection_stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--base-url", type=str, default=None, help="Benchmark this API instead of the local stand-in")
+    parser.add_argument("--model", type=str, default="text-embedding-3-small")
+    args = parser.parse_args()
+
+    server: Optional[uvicorn.Server] = None
+    api_key = os.environ.get("OPENAI_API_KEY", "benchmark")
+    with tempfile.TemporaryDirectory() as directory:
+        base_url = args.base_url
+        if base_url is None:
+            certificate, key = write_certificate(Path(directory))
+            # Both clients trust the stand-in's certificate
+            os.environ["SSL_CERT_FILE"] = certificate
+            base_url, server = serve_in_thread(create_app(), ssl_certfile=certificate, ssl_keyfile=key)
+        try:
+            asyncio.run(bench(base_url, api_key, args.model, args.requests, args.concurrency))
+        finally:
+            if server is not None:
+                server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
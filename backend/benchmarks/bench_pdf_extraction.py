@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+PDF Extraction Benchmark
+
+Measures:
+1. PDF pages/sec for each extraction worker count
+2. p50/p99 latency of concurrent API requests while a large PDF is extracted,
+   with extraction inline on the event loop versus in the process pool
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+from typing import List
+
+import httpx
+import pdfplumber
+
+from benchmarks.sample_documents import make_pdf
+from src.services.file_services import document_processor
+from src.services.file_services.document_processor import DocumentProcessor
+
+
+def _inline_extract(file_content: bytes) -> str:
+    """The pre-pool implementation: pdfplumber on the calling thread."""
+    with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+        return "\n\n".join(text for text in (page.extract_text() for page in pdf.pages) if text)
+
+
+def _use_workers(workers: int) -> None:
+    document_processor.shutdown_extraction_executor()
+    document_processor._extraction_executor = document_processor.create_extraction_executor(workers)
+
+
+async def bench_scaling(pdf: bytes, pages: int, worker_counts: List[int]) -> None:
+    print(f"\nPages/sec scaling ({pages} pages)")
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    processor = DocumentProcessor()
+    expected = _inline_extract(pdf)
+    baseline = None
+    for workers in worker_counts:
+        _use_workers(workers)
+        # Warm the pool so process start-up is not timed
+        await processor.extract_text_from_pdf(make_pdf(1))
+        started = time.perf_counter()
+        text = await processor.extract_text_from_pdf(pdf)
+        elapsed = time.perf_counter() - started
+        assert text == expected, "pool extraction differs from inline extraction"
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {pages / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+
+
+async def _probe_latency(client: httpx.AsyncClient, done: asyncio.Event, interval: float = 0.01) -> List[float]:
+    """
+    Issue a request every ``interval`` seconds until ``done`` is set.
+    
+    Latency is measured from the time each request was scheduled to be sent,
+    so time spent waiting for a blocked event loop is included.
+    """
+    latencies = []
+    scheduled = time.perf_counter()
+    while not done.is_set():
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        await client.get("/health")
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        scheduled = max(scheduled + interval, time.perf_counter())
+    return latencies
+
+
+async def bench_latency(pdf: bytes, workers: int) -> None:
+    from src import app
+
+    print(f"\nAPI latency while extracting (probing /health every 10ms)")
+    print(f"{'mode':>8} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    _use_workers(workers)
+    processor = DocumentProcessor()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("inline", "pool"):
+            done = asyncio.Event()
+            probe = asyncio.create_task(_probe_latency(client, done))
+            await asyncio.sleep(0.05)
+            if mode == "inline":
+                _inline_extract(pdf)
+            else:
+                await processor.extract_text_from_pdf(pdf)
+            done.set()
+            latencies = sorted(await probe)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{mode:>8} {len(latencies):>9} {statistics.median(latencies):>9.2f} {p99:>9.2f} {latencies[-1]:>9.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the generated PDF")
+    parser.add_argument("--pdf", type=str, default=None, help="Benchmark an existing PDF instead")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            pdf = f.read()
+        with pdfplumber.open(io.BytesIO(pdf)) as document:
+            pages = len(document.pages)
+    else:
+        pdf, pages = make_pdf(args.pages), args.pages
+
+    worker_counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i <= args.max_workers], args.max_workers})
+    try:
+        await bench_scaling(pdf, pages, worker_counts)
+        await bench_latency(pdf, args.max_workers)
+    finally:
+        document_processor.shutdown_extraction_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
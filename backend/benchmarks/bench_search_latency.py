@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Search Latency Benchmark
+
+p50/p95 latency of top-5 and top-100 vector searches over 5,000 chunks (by
+default) with
+
+- pandas: every column, embedding included, read into a DataFrame and
+  converted with iterrows, with the similarity threshold applied to the
+  returned rows (the previous search_similar)
+- arrow: LanceDBVectorStore.search_similar, which reads only the result
+  columns as Arrow, converts them column by column and applies the
+  threshold as a distance bound in the query
+
+Both return the same rows; the results column is the mean count per query.
+The flat search itself is shared, so larger --documents narrow the gap.
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from src.services.lance_db.lance_db_setup import LanceDBVectorStore
+
+
+def pandas_search(store: LanceDBVectorStore, query: np.ndarray, limit: int, threshold: float) -> List[Dict[str, Any]]:
+    results = store.table.search(query.tolist()).limit(limit).to_pandas()
+    rows = []
+    for _, row in results.iterrows():
+        similarity = 1 - row["_distance"]
+        if threshold > 0 and similarity < threshold:
+            continue
+        rows.append({
+            "id": row["id"],
+            "text": row["text"],
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            "file_name": row["file_name"],
+            "file_type": row["file_type"],
+            "chunk_index": row["chunk_index"],
+            "similarity_score": similarity,
+            "created_at": row["created_at"],
+        })
+    return rows
+
+
+async def build_store(root: Path, documents: np.ndarray) -> LanceDBVectorStore:
+    store = LanceDBVectorStore(root)
+    store.dimension = documents.shape[1]
+    store.coarse_dimension = 0
+    texts = [f"Chunk {index} of the benchmark corpus. " * 20 for index in range(len(documents))]
+    await store.process_multiple_documents([{
+        "file_name": "corpus.txt",
+        "file_type": "txt",
+        "texts": texts,
+        "embeddings": documents,
+        "metadata": [{"chunk_index": index, "chunk_length": len(text)} for index, text in enumerate(texts)],
+    }])
+    await asyncio.to_thread(store.table.optimize)
+    return store
+
+
+async def run_queries(
+    store: LanceDBVectorStore, variant: str, queries: np.ndarray, limit: int, threshold: float
+) -> Tuple[List[float], float]:
+    latencies, returned = [], []
+    for query in queries:
+        started = time.perf_counter()
+        if variant == "pandas":
+            results = pandas_search(store, query, limit, threshold)
+        else:
+            results = await store.search_similar(query, limit=limit, similarity_threshold=threshold)
+        latencies.append(time.perf_counter() - started)
+        returned.append(len(results))
+    return latencies, float(np.mean(returned))
+
+
+async def bench(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    documents = rng.standard_normal((args.documents, args.dimension), dtype=np.float32)
+    documents /= np.linalg.norm(documents, axis=1, keepdims=True)
+    # Queries are noisy copies of documents, so each has a close neighbour
+    queries = documents[rng.integers(0, args.documents, args.queries)] + 0.05 * rng.standard_normal(
+        (args.queries, args.dimension), dtype=np.float32
+    )
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    root = Path(tempfile.mkdtemp(prefix="bench_search_latency_"))
+    try:
+        store = await build_store(root, documents)
+        print(f"{args.documents} chunks, {args.queries} queries, {args.dimension} dimensions, threshold {args.threshold}")
+        print(f"{'top-k':>6} {'path':>7} {'p50 ms':>7} {'p95 ms':>7} {'results':>8}")
+        for limit in args.limits:
+            medians = {}
+            for variant in ("pandas", "arrow"):
+                await run_queries(store, variant, queries[:5], limit, args.threshold)  # warm up
+                latencies, returned = await run_queries(store, variant, queries, limit, args.threshold)
+                latencies_ms = sorted(latency * 1000 for latency in latencies)
+                medians[variant] = statistics.median(latencies_ms)
+                print(
+                    f"{limit:>6} {variant:>7} {medians[variant]:>7.2f} "
+                    f"{latencies_ms[int(len(latencies_ms) * 0.95) - 1]:>7.2f} {returned:>8.1f}"
+                )
+            print(f"{limit:>6} speedup {medians['pandas'] / medians['arrow']:>6.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--limits", type=int, nargs="+", default=[5, 100], help="Results per query")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Minimum similarity of a result")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark
+
+Recall@k against exact search and p50/p95 search latency over 100,000
+chunks (by default) for
+
+- flat: the exhaustive scan every search did before tables were indexed
+- building: searches made while the background index build runs, which
+  must stay exact
+- the VECTOR_INDEX_TYPE index at each --nprobes and --refine-factors
+  combination
+
+plus the build time. Embeddings are synthetic clustered unit vectors and
+queries are noisy copies of stored ones.
+"""
+
+import argparse
+import asyncio
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from src.services.lance_db.lance_db_setup import LanceDBVectorStore
+
+
+def clustered_embeddings(rng: np.random.Generator, count: int, dimension: int, clusters: int) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dimension), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(documents: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(queries @ documents.T), axis=1)[:, :k]
+
+
+async def search(store: LanceDBVectorStore, query: np.ndarray, k: int, nprobes: int, refine_factor: int) -> Tuple[List[int], float]:
+    started = time.perf_counter()
+    results = await store.search_similar(
+        query, limit=k, similarity_threshold=0, columns=["chunk_index"], nprobes=nprobes, refine_factor=refine_factor
+    )
+    return [result["chunk_index"] for result in results], time.perf_counter() - started
+
+
+def report(name: str, found: List[List[int]], truth: np.ndarray, latencies: List[float]) -> None:
+    recall = np.mean([len(set(rows) & set(expected)) / len(expected) for rows, expected in zip(found, truth)])
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    print(
+        f"{name:>22} {recall:>7.3f} {statistics.median(latencies_ms):>7.2f} "
+        f"{latencies_ms[max(0, int(len(latencies_ms) * 0.95) - 1)]:>7.2f} {len(latencies):>8}"
+    )
+
+
+async def bench(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    documents = clustered_embeddings(rng, args.documents, args.dimension, args.clusters)
+    queries = documents[rng.integers(0, args.documents, args.queries)] + 0.02 * rng.standard_normal(
+        (args.queries, args.dimension), dtype=np.float32
+    )
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_neighbours(documents, queries, args.k)
+
+    root = Path(tempfile.mkdtemp(prefix="bench_vector_index_"))
+    try:
+        store = LanceDBVectorStore(root)
+        store.dimension = args.dimension
+        store.coarse_dimension = 0
+        index_type, store.index_type = store.index_type, "NONE"
+        await store.process_multiple_documents([{
+            "file_name": "corpus.txt",
+            "file_type": "txt",
+            "texts": [str(index) for index in range(args.documents)],
+            "embeddings": documents,
+            "metadata": [{} for _ in range(args.documents)],
+        }])
+        await asyncio.to_thread(store.table.optimize)
+
+        print(f"{args.documents} chunks, {args.queries} queries, {args.dimension} dimensions, {index_type}, recall@{args.k}")
+        print(f"{'search':>22} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7} {'queries':>8}")
+        found, latencies = [], []
+        for query in queries:
+            rows, latency = await search(store, query, args.k, 0, 0)
+            found.append(rows)
+            latencies.append(latency)
+        report("flat", found, truth, latencies)
+
+        store.index_type, store.index_min_rows = index_type, 0
+        started = time.perf_counter()
+        task = store.schedule_index_maintenance()
+        found, latencies = [], []
+        while not task.done():
+            rows, latency = await search(store, queries[len(found) % len(queries)], args.k, 0, 0)
+            found.append(rows)
+            latencies.append(latency)
+        await task
+        build_seconds = time.perf_counter() - started
+        if found:
+            report("building", found, truth[np.arange(len(found)) % len(queries)], latencies)
+
+        for nprobes in args.nprobes:
+            for refine_factor in args.refine_factors:
+                found, latencies = [], []
+                for query in queries:
+                    rows, latency = await search(store, query, args.k, nprobes, refine_factor)
+                    found.append(rows)
+                    latencies.append(latency)
+                report(f"nprobes {nprobes}, refine {refine_factor}", found, truth, latencies)
+        print(f"Index built in {build_seconds:.1f}s: {(await store.get_table_info())['vector_index']}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=1000, help="Clusters of the synthetic embeddings")
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--refine-factors", type=int, nargs="+", default=[0, 1, 5])
+    parser.add_argument("-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
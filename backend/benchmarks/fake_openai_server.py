@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI Server
+
+Local stand-in for the OpenAI API, so the pipeline, the RAG agent and the
+query engine can be load-tested and benchmarked without a paid API key.
+
+Endpoints:
+
+- ``POST /v1/embeddings``: deterministic unit vectors derived from the
+  SHA-256 of each input, as float lists or base64, honouring ``dimensions``
+- ``POST /v1/chat/completions``: a tool call to the first tool when tools
+  are offered and the conversation does not end with a tool result,
+  otherwise a short answer built from the last message; both also as
+  server-sent events when ``stream`` is set
+- ``GET /v1/models``: the models served
+- ``GET /stats``: requests, tokens, and injected errors and 429s so far
+
+Every response can be delayed by a latency distribution, a share of
+requests fails with 500, and requests beyond the requests-per-minute or
+tokens-per-minute quota get 429 with ``retry-after-ms``; every response
+carries ``x-ratelimit-*`` headers like the real API.
+
+Run it and point the backend at it:
+
+```bash
+python -m benchmarks.fake_openai_server --port 8001 --latency-ms 80 --tpm 1000000
+OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake uvicorn src.api.api:app
+```
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# Limits enforced like the real embeddings API
+MAX_INPUT_TOKENS = 8192
+MAX_REQUEST_TOKENS = 300000
+
+
+@dataclass
+class FakeServerSettings:
+    """Behaviour of the fake server."""
+    dimension: int = 1536
+    latency_ms: float = 0.0
+    latency_distribution: str = "fixed"  # fixed, uniform, lognormal or exponential
+    latency_sigma: float = 0.5
+    latency_per_1k_tokens_ms: float = 0.0
+    error_rate: float = 0.0
+    requests_per_minute: int = 0  # 0 disables the quota
+    tokens_per_minute: int = 0
+    tool_calls: bool = True
+    stream_chunk_words: int = 4
+    seed: int = 0
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count, about four bytes per token."""
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def fake_embedding(text: str, dimension: int) -> np.ndarray:
+    """Deterministic float32 unit vector of a text, derived from its SHA-256."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class _Quota:
+    """Continuously refilled requests and tokens buckets."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.limits = (requests_per_minute, tokens_per_minute)
+        self.levels = [float(requests_per_minute), float(tokens_per_minute)]
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        for index, limit in enumerate(self.limits):
+            self.levels[index] = min(limit, self.levels[index] + (now - self.updated) * limit / 60)
+        self.updated = now
+
+    def admit(self, tokens: int) -> Optional[float]:
+        """Take one request and its tokens, or return the seconds until they would fit."""
+        self._refill()
+        wanted = (1, tokens)
+        waits = [
+            (amount - level) * 60 / limit
+            for amount, level, limit in zip(wanted, self.levels, self.limits)
+            if limit and level < amount
+        ]
+        if waits:
+            return max(waits)
+        for index, (amount, limit) in enumerate(zip(wanted, self.limits)):
+            if limit:
+                self.levels[index] -= amount
+        return None
+
+    def headers(self) -> Dict[str, str]:
+        headers = {}
+        for name, limit, level in zip(("requests", "tokens"), self.limits, self.levels):
+            if limit:
+                headers[f"x-ratelimit-limit-{name}"] = str(limit)
+                headers[f"x-ratelimit-remaining-{name}"] = str(max(0, int(level)))
+                headers[f"x-ratelimit-reset-{name}"] = f"{(limit - level) * 60 / limit:.3f}s"
+        return headers
+
+
+class FakeOpenAI:
+    """State of one fake server: settings, quota and counters."""
+
+    def __init__(self, settings: FakeServerSettings):
+        self.settings = settings
+        self.quota = _Quota(settings.requests_per_minute, settings.tokens_per_minute)
+        self.random = random.Random(settings.seed)
+        self.stats: Counter = Counter()
+
+    async def _delay(self, tokens: int) -> None:
+        settings = self.settings
+        base = settings.latency_ms
+        if settings.latency_distribution == "uniform":
+            base = self.random.uniform(0, 2 * base)
+        elif settings.latency_distribution == "lognormal" and base > 0:
+            # latency_ms is the median
+            base = self.random.lognormvariate(math.log(base), settings.latency_sigma)
+        elif settings.latency_distribution == "exponential" and base > 0:
+            base = self.random.expovariate(1 / base)
+        delay = base + settings.latency_per_1k_tokens_ms * tokens / 1000
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def _error(self, status: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        self.stats[f"errors_{status}"] += 1
+        return JSONResponse(
+            {"error": {"message": message, "type": error_type, "param": None, "code": None}},
+            status_code=status,
+            headers={**self.quota.headers(), **(headers or {})},
+        )
+
+    def _admit(self, tokens: int) -> Optional[JSONResponse]:
+        """An error response for an injected failure or an exceeded quota, or None to proceed."""
+        self.stats["requests"] += 1
+        if self.settings.error_rate and self.random.random() < self.settings.error_rate:
+            return self._error(500, "Injected server error", "server_error")
+        wait = self.quota.admit(tokens)
+        if wait is not None:
+            return self._error(
+                429, "Rate limit reached", "requests",
+                {"retry-after-ms": str(max(1, int(wait * 1000))), "retry-after": str(max(1, math.ceil(wait)))}
+            )
+        self.stats["tokens"] += tokens
+        return None
+
+    async def embeddings(self, request: Request) -> Response:
+        body = await request.json()
+        inputs = body.get("input")
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs or [])
+        if not inputs or not all(isinstance(text, str) for text in inputs):
+            return self._error(400, "'input' must be a string or a list of strings", "invalid_request_error")
+        token_counts = [count_tokens(text) for text in inputs]
+        tokens = sum(token_counts)
+        if max(token_counts) > MAX_INPUT_TOKENS:
+            return self._error(
+                400, f"This model's maximum context length is {MAX_INPUT_TOKENS} tokens, "
+                f"however you requested {max(token_counts)} tokens", "invalid_request_error"
+            )
+        if tokens > MAX_REQUEST_TOKENS:
+            return self._error(
+                400, f"Requested {tokens} tokens, max {MAX_REQUEST_TOKENS} tokens per request", "invalid_request_error"
+            )
+        rejected = self._admit(tokens)
+        if rejected is not None:
+            return rejected
+        await self._delay(tokens)
+
+        dimension = int(body.get("dimensions") or self.settings.dimension)
+        base64_encoded = body.get("encoding_format") == "base64"
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(text, dimension)
+            embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii") if base64_encoded else vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        self.stats["embedded_texts"] += len(inputs)
+        return JSONResponse(
+            {"object": "list", "model": body.get("model"), "data": data,
+             "usage": {"prompt_tokens": tokens, "total_tokens": tokens}},
+            headers=self.quota.headers(),
+        )
+
+    def _reply(self, body: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """Content or tool calls answering a chat request."""
+        messages = body.get("messages") or []
+        last = messages[-1] if messages else {}
+        tools = body.get("tools") or []
+        if self.settings.tool_calls and tools and last.get("role") != "tool":
+            function = tools[0]["function"]
+            properties = list(function.get("parameters", {}).get("properties", {}))
+            arguments = {name: str(last.get("content", "")) for name in properties[:1]}
+            return None, [{
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+            }]
+        content = str(last.get("content", ""))
+        return f"Based on the provided context: {content[:200]}", []
+
+    async def chat_completions(self, request: Request) -> Response:
+        body = await request.json()
+        prompt_tokens = sum(count_tokens(str(message.get("content") or "")) for message in body.get("messages") or [])
+        rejected = self._admit(prompt_tokens)
+        if rejected is not None:
+            return rejected
+        content, tool_calls = self._reply(body)
+        completion_tokens = count_tokens(content or json.dumps(tool_calls))
+        self.stats["chat_completions"] += 1
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        finish_reason = "tool_calls" if tool_calls else "stop"
+
+        if body.get("stream"):
+            return StreamingResponse(
+                self._stream(body, completion_id, created, content, tool_calls, finish_reason, prompt_tokens + completion_tokens),
+                media_type="text/event-stream",
+                headers=self.quota.headers(),
+            )
+
+        await self._delay(prompt_tokens + completion_tokens)
+        message: Dict[str, Any] = {"role": "assistant", "content": content, "refusal": None}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": message, "logprobs": None, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }, headers=self.quota.headers())
+
+    async def _stream(
+        self,
+        body: Dict[str, Any],
+        completion_id: str,
+        created: int,
+        content: Optional[str],
+        tool_calls: List[Dict[str, Any]],
+        finish_reason: str,
+        tokens: int
+    ) -> AsyncIterator[bytes]:
+        """Server-sent events of a chat completion, with the latency spread over the chunks."""
+        def event(delta: Dict[str, Any], finish: Optional[str] = None) -> bytes:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        deltas: List[Dict[str, Any]] = [{"role": "assistant", "content": "" if content is not None else None}]
+        if tool_calls:
+            for index, call in enumerate(tool_calls):
+                deltas.append({"tool_calls": [{
+                    "index": index, "id": call["id"], "type": "function",
+                    "function": {"name": call["function"]["name"], "arguments": ""},
+                }]})
+                arguments = call["function"]["arguments"]
+                step = max(1, len(arguments) // 4)
+                for start in range(0, len(arguments), step):
+                    deltas.append({"tool_calls": [{"index": index, "function": {"arguments": arguments[start:start + step]}}]})
+        else:
+            words = content.split(" ")
+            size = max(1, self.settings.stream_chunk_words)
+            for start in range(0, len(words), size):
+                piece = " ".join(words[start:start + size])
+                deltas.append({"content": piece if start == 0 else " " + piece})
+
+        # First token after a share of the latency, the rest spread over the chunks
+        await self._delay(tokens // 2)
+        for delta in deltas:
+            yield event(delta)
+            await asyncio.sleep(0)
+        yield event({}, finish_reason)
+        yield b"data: [DONE]\n\n"
+
+    async def models(self, request: Request) -> JSONResponse:
+        return JSONResponse({"object": "list", "data": [
+            {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+            for model in ("text-embedding-3-small", "text-embedding-3-large", "gpt-4.1-mini")
+        ]})
+
+    async def get_stats(self, request: Request) -> JSONResponse:
+        return JSONResponse(dict(self.stats))
+
+
+def create_app(settings: Optional[FakeServerSettings] = None) -> Starlette:
+    """Create the fake server application."""
+    fake = FakeOpenAI(settings or FakeServerSettings())
+    app = Starlette(routes=[
+        Route("/v1/embeddings", fake.embeddings, methods=["POST"]),
+        Route("/v1/chat/completions", fake.chat_completions, methods=["POST"]),
+        Route("/v1/models", fake.models, methods=["GET"]),
+        Route("/stats", fake.get_stats, methods=["GET"]),
+    ])
+    app.state.fake = fake
+    return app
+
+
+def serve_in_thread(
+    app: Starlette,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    ssl_certfile: Optional[str] = None,
+    ssl_keyfile: Optional[str] = None
+) -> Tuple[str, uvicorn.Server]:
+    """
+    Serve an application in a background thread, e.g. from a benchmark.
+
+    Returns:
+        The base URL of the API (ending in /v1) and the server; set
+        ``server.should_exit`` to stop it
+    """
+    if not port:
+        with socket.socket() as probe:
+            probe.bind((host, 0))
+            port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        app, host=host, port=port, log_level="warning", ssl_certfile=ssl_certfile, ssl_keyfile=ssl_keyfile
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    scheme = "https" if ssl_certfile else "http"
+    return f"{scheme}://{'localhost' if ssl_certfile else host}:{port}/v1", server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dimension", type=int, default=1536, help="Embedding dimension unless a request sets dimensions")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency (the median for lognormal)")
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal", "exponential"], default="fixed")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Sigma of the lognormal latency")
+    parser.add_argument("--latency-per-1k-tokens-ms", type=float, default=0.0, help="Latency added per 1,000 tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429 (0: unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute before 429 (0: unlimited)")
+    parser.add_argument("--no-tool-calls", action="store_true", help="Never answer with tool calls")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings = FakeServerSettings(
+        dimension=args.dimension,
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        latency_sigma=args.latency_sigma,
+        latency_per_1k_tokens_ms=args.latency_per_1k_tokens_ms,
+        error_rate=args.error_rate,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        tool_calls=not args.no_tool_calls,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
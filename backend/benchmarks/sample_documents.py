@@ -0,0 +1,197 @@
+"""
+Sample Documents
+
+Generators for synthetic documents used by the benchmarks.
+"""
+
+import io
+import random
+import zipfile
+from typing import List
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog document retrieval vector search "
+    "embedding chunk index tenant upload latency throughput memory contract "
+    "clause party agreement section schedule payment term notice"
+).split()
+
+
+def random_sentence(rng: random.Random, words: int = 12) -> str:
+    """Build a pseudo-random sentence from the benchmark vocabulary."""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """
+    Build a text-only PDF with the given number of pages.
+    
+    Args:
+        pages: Number of pages to generate
+        lines_per_page: Lines of text on each page
+        seed: Random seed for reproducible content
+        
+    Returns:
+        PDF file content
+    """
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+    page_ids = []
+    font_id = 3
+    
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"")  # Pages object, filled in once all page ids are known
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    for _ in range(pages):
+        lines = [_escape_pdf_text(random_sentence(rng)) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream_bytes = stream.encode("latin-1")
+        objects.append(
+            b"<< /Length " + str(len(stream_bytes)).encode() + b" >>\nstream\n" + stream_bytes + b"\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+    
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def _docx_paragraph(rng: random.Random) -> str:
+    """A paragraph with a mix of plain runs, tabs, line breaks and hyperlinks."""
+    kind = rng.randrange(6)
+    sentence = escape(random_sentence(rng))
+    if kind == 0:
+        return "<w:p/>"
+    if kind == 1:
+        return f'<w:p><w:r><w:t xml:space="preserve">{sentence} </w:t><w:tab/><w:t>{sentence}</w:t></w:r></w:p>'
+    if kind == 2:
+        return f'<w:p><w:r><w:t>{sentence}</w:t><w:br/><w:t>{sentence}</w:t><w:br w:type="page"/></w:r></w:p>'
+    if kind == 3:
+        return (
+            f'<w:p><w:r><w:t xml:space="preserve">See </w:t></w:r>'
+            f'<w:hyperlink r:id="rId9"><w:r><w:t>{sentence}</w:t></w:r></w:hyperlink></w:p>'
+        )
+    return f"<w:p><w:pPr><w:jc w:val=\"both\"/></w:pPr><w:r><w:t>{sentence}</w:t></w:r></w:p>"
+
+
+def _docx_table(rng: random.Random, rows: int, cols: int) -> str:
+    """
+    A table with horizontally and vertically merged cells.
+    
+    Every fourth row has a header cell spanning the first three columns, the
+    last column is merged vertically in runs of five rows, and some cells
+    hold a nested table.
+    """
+    parts = ["<w:tbl><w:tblPr/><w:tblGrid>", "<w:gridCol/>" * cols, "</w:tblGrid>"]
+    for row in range(rows):
+        parts.append("<w:tr>")
+        col = 0
+        while col < cols:
+            props = []
+            span = 1
+            if row % 4 == 0 and col == 0 and cols > 3:
+                span = 3
+                props.append('<w:gridSpan w:val="3"/>')
+            if col == cols - 1:
+                props.append('<w:vMerge w:val="restart"/>' if row % 5 == 0 else "<w:vMerge/>")
+            parts.append(f"<w:tc><w:tcPr>{''.join(props)}</w:tcPr>")
+            if col == cols - 1 and row % 5:
+                parts.append("<w:p/>")
+            elif rng.random() < 0.02:
+                nested = escape(random_sentence(rng, 4))
+                parts.append(
+                    f"<w:p><w:r><w:t>{escape(random_sentence(rng, 4))}</w:t></w:r></w:p>"
+                    f"<w:tbl><w:tr><w:tc><w:p><w:r><w:t>{nested}</w:t></w:r></w:p></w:tc></w:tr></w:tbl><w:p/>"
+                )
+            elif rng.random() < 0.1:
+                parts.append("<w:p/>")
+            else:
+                parts.append(f"<w:p><w:r><w:t>{escape(random_sentence(rng, 5))}</w:t></w:r></w:p>")
+            parts.append("</w:tc>")
+            col += span
+        parts.append("</w:tr>")
+    parts.append("</w:tbl>")
+    return "".join(parts)
+
+
+def make_docx(paragraphs: int, tables: int = 0, rows: int = 50, cols: int = 8, seed: int = 0) -> bytes:
+    """
+    Build a DOCX with paragraphs and large tables with merged cells.
+    
+    Tables are spread evenly between the paragraphs.
+    
+    Args:
+        paragraphs: Number of paragraphs to generate
+        tables: Number of tables to generate
+        rows: Rows per table
+        cols: Grid columns per table
+        seed: Random seed for reproducible content
+        
+    Returns:
+        DOCX file content
+    """
+    rng = random.Random(seed)
+    body: List[str] = []
+    every = max(1, paragraphs // (tables + 1))
+    tables_left = tables
+    for index in range(paragraphs):
+        body.append(_docx_paragraph(rng))
+        if tables_left and (index + 1) % every == 0:
+            body.append(_docx_table(rng, rows, cols))
+            tables_left -= 1
+    body.extend(_docx_table(rng, rows, cols) for _ in range(tables_left))
+    
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        "<w:body>" + "".join(body) + "<w:sectPr/></w:body></w:document>"
+    )
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _DOCX_RELS)
+        docx.writestr("word/document.xml", document)
+    return output.getvalue()
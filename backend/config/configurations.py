@@ -26,6 +26,46 @@ class RAGIndexingConfig(BaseConfig):
         description="Supported file types for document processing"
     )
     
+    EXTRACTION_WORKERS: int = Field(
+        default=0,
+        description="Number of processes used for text extraction (0 = number of CPU cores)"
+    )
+    
+    PDF_PAGES_PER_TASK: int = Field(
+        default=25,
+        description="Number of PDF pages extracted per process pool task"
+    )
+    
+    MAX_UPLOAD_SIZE_MB: int = Field(
+        default=200,
+        description="Maximum size of an uploaded file in megabytes"
+    )
+    
+    UPLOAD_SPOOL_DIR: Optional[str] = Field(
+        default=None,
+        description="Directory uploads are spooled to before parsing (system temp dir if unset)"
+    )
+    
+    EXTRACTED_TEXT_CACHE_DIR: str = Field(
+        default="text_cache",
+        description="Directory of the cache of text extracted from uploaded documents"
+    )
+    
+    EXTRACTED_TEXT_CACHE_SIZE_MB: int = Field(
+        default=1024,
+        description="Maximum size of the extracted text cache in megabytes (0 = disabled)"
+    )
+    
+    MAX_BATCH_UPLOAD_SIZE_MB: int = Field(
+        default=4096,
+        description="Maximum size of a ZIP archive uploaded to the batch endpoint in megabytes"
+    )
+    
+    MAX_BATCH_FILES: int = Field(
+        default=5000,
+        description="Maximum number of documents in one batch upload"
+    )
+    
     # Text Chunking Configuration
     CHUNK_SIZE: int = Field(
         default=1000,
@@ -60,12 +100,73 @@ class RAGIndexingConfig(BaseConfig):
     
     EMBEDDING_PROVIDER: str = Field(
         default="openai",
-        description="OpenAI embedding provider"
+        description="Embedding provider: openai, or onnx for a local model"
     )
     
     OPENAI_MAX_TOKENS: int = Field(
         default=8191,
-        description="OpenAI maximum tokens per request"
+        description="Maximum tokens of one embedding input; longer texts are truncated"
+    )
+    
+    OPENAI_BASE_URL: Optional[str] = Field(
+        default=None,
+        description="Base URL of an OpenAI-compatible API, e.g. the fake server in benchmarks/ (None: OpenAI)"
+    )
+    
+    OPENAI_MAX_CONNECTIONS: int = Field(
+        default=100,
+        description="Maximum number of HTTP connections of the shared OpenAI client"
+    )
+    
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=32,
+        description="Idle HTTP connections the shared OpenAI client keeps open for reuse"
+    )
+    
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = Field(
+        default=120.0,
+        description="Seconds an idle OpenAI connection is kept open"
+    )
+    
+    OPENAI_TIMEOUT_SECONDS: float = Field(
+        default=60.0,
+        description="Timeout of one OpenAI API request"
+    )
+    
+    # Local ONNX embedding model (EMBEDDING_PROVIDER=onnx)
+    ONNX_MODEL_DIR: str = Field(
+        default="models/bge-small-en-v1.5",
+        description="Directory with model.onnx (or model_quantized.onnx) and tokenizer.json of a sentence-embedding model"
+    )
+    
+    ONNX_EMBEDDING_DIMENSION: int = Field(
+        default=384,
+        description="Embedding dimension of the ONNX model"
+    )
+    
+    ONNX_QUANTIZE: bool = Field(
+        default=True,
+        description="Run int8-quantized weights, quantizing model.onnx on first load if no quantized model is provided"
+    )
+    
+    ONNX_POOLING: str = Field(
+        default="mean",
+        description="Pooling of token embeddings: mean or cls"
+    )
+    
+    ONNX_MAX_SEQUENCE_LENGTH: int = Field(
+        default=512,
+        description="Maximum tokens per text; longer texts are truncated"
+    )
+    
+    ONNX_BATCH_TOKENS: int = Field(
+        default=16384,
+        description="Padded tokens per inference batch"
+    )
+    
+    ONNX_WORKERS: int = Field(
+        default=0,
+        description="Inference batches run in parallel (0 = number of CPU cores / 4)"
     )
     
     # LanceDB Configuration
@@ -79,6 +180,21 @@ class RAGIndexingConfig(BaseConfig):
         description="Path to the LanceDB database"
     )
     
+    VECTOR_STORE_CACHE_SIZE: int = Field(
+        default=256,
+        description="Maximum number of per-user LanceDB connections and tables kept open"
+    )
+    
+    VECTOR_STORE_IDLE_SECONDS: float = Field(
+        default=600.0,
+        description="Seconds after which an unused per-user LanceDB table is closed"
+    )
+    
+    LANCEDB_READ_CONSISTENCY_SECONDS: float = Field(
+        default=5.0,
+        description="How often open tables check for writes made by other processes (0 = every read, negative = never)"
+    )
+    
     # Search Configuration
     DEFAULT_SEARCH_LIMIT: int = Field(
         default=5,
@@ -90,10 +206,156 @@ class RAGIndexingConfig(BaseConfig):
         description="Minimum similarity threshold for search results"
     )
     
+    COARSE_EMBEDDING_DIMENSION: int = Field(
+        default=0,
+        description="Dimension of the truncated embedding column used for candidate search (0 searches the full vectors)"
+    )
+    
+    RESCORE_CANDIDATE_FACTOR: int = Field(
+        default=10,
+        description="Candidates fetched from the truncated column per result, rescored with the full vectors"
+    )
+    
+    VECTOR_INDEX_TYPE: str = Field(
+        default="IVF_PQ",
+        description="Vector index built on large tables: IVF_PQ, IVF_HNSW_SQ, IVF_HNSW_PQ, IVF_SQ, IVF_FLAT or NONE"
+    )
+    
+    VECTOR_INDEX_MIN_ROWS: int = Field(
+        default=50000,
+        description="Rows a table needs before its vector index is built; smaller tables are searched exhaustively"
+    )
+    
+    VECTOR_INDEX_RETRAIN_FRACTION: float = Field(
+        default=0.2,
+        description="Retrain the vector index once rows it does not cover reach this fraction of those it does"
+    )
+    
+    SCALAR_INDEX_RETRAIN_ROWS: int = Field(
+        default=10000,
+        description="Rows a scalar index must leave uncovered, besides VECTOR_INDEX_RETRAIN_FRACTION, before it is rebuilt"
+    )
+    
+    SEARCH_NPROBES: int = Field(
+        default=20,
+        description="Vector index partitions searched per query (0 = LanceDB default)"
+    )
+    
+    SEARCH_REFINE_FACTOR: int = Field(
+        default=5,
+        description="Index candidates per result re-ranked by exact distance (0 = use the index's approximate distances)"
+    )
+    
+    SEARCH_THRESHOLD_OVERFETCH: int = Field(
+        default=4,
+        description="Results fetched per requested result by index searches with a similarity threshold"
+    )
+    
     # Processing Configuration
     BATCH_SIZE: int = Field(
-        default=32,
-        description="Batch size for embedding generation"
+        default=2048,
+        description="Maximum number of texts in one embedding request"
+    )
+    
+    EMBEDDING_BATCH_TOKENS: int = Field(
+        default=100000,
+        description="Estimated token budget of one embedding request"
+    )
+    
+    EMBEDDING_CONCURRENCY: int = Field(
+        default=8,
+        description="Maximum number of embedding requests in flight per ingestion"
+    )
+    
+    EMBEDDING_REQUESTS_PER_MINUTE: int = Field(
+        default=3000,
+        description="Embedding requests allowed per minute, until the API reports its own limit"
+    )
+    
+    EMBEDDING_TOKENS_PER_MINUTE: int = Field(
+        default=1000000,
+        description="Embedding tokens allowed per minute, until the API reports its own limit"
+    )
+    
+    EMBEDDING_MAX_RETRIES: int = Field(
+        default=6,
+        description="Retries of an embedding request after rate limiting, server or connection errors"
+    )
+    
+    EMBEDDING_BACKOFF_BASE_SECONDS: float = Field(
+        default=0.5,
+        description="Delay before the first retry of an embedding request, doubled on every further retry"
+    )
+    
+    EMBEDDING_BACKOFF_MAX_SECONDS: float = Field(
+        default=60.0,
+        description="Maximum delay between retries of an embedding request"
+    )
+    
+    EMBEDDING_QUERY_MAX_WAIT_MS: float = Field(
+        default=5.0,
+        description="Milliseconds concurrent single-text embeddings wait to be sent together"
+    )
+    
+    EMBEDDING_QUERY_MAX_BATCH: int = Field(
+        default=64,
+        description="Maximum number of single-text embeddings coalesced into one request"
+    )
+    
+    EMBEDDING_CACHE_PATH: str = Field(
+        default="embedding_cache/embeddings.sqlite3",
+        description="SQLite file caching embedding vectors by model, dimension and text"
+    )
+    
+    EMBEDDING_CACHE_SIZE_MB: int = Field(
+        default=2048,
+        description="Maximum size of the embedding cache; least recently used vectors are evicted (0 disables the cache)"
+    )
+    
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = Field(
+        default=10000,
+        description="Number of recently used embedding vectors also kept in memory (0 disables)"
+    )
+    
+    PIPELINE_QUEUE_SIZE: int = Field(
+        default=8,
+        description="Maximum number of embedding batches buffered between ingestion pipeline stages"
+    )
+    
+    PIPELINE_CHUNK_QUEUE_SIZE: int = Field(
+        default=256,
+        description="Maximum number of chunks buffered between chunking and embedding during ingestion"
+    )
+    
+    STORAGE_BATCH_SIZE: int = Field(
+        default=512,
+        description="Number of rows appended to LanceDB per write during ingestion"
+    )
+    
+    # Ingestion Job Configuration
+    INGESTION_WORKERS: int = Field(
+        default=4,
+        description="Maximum number of ingestion jobs run concurrently per API process"
+    )
+    
+    INGESTION_MAX_JOBS_PER_USER: int = Field(
+        default=2,
+        description="Maximum number of ingestion jobs run concurrently for one user"
+    )
+    
+    INGESTION_JOB_TTL: int = Field(
+        default=86400,
+        description="Seconds ingestion job records are kept after their last update"
+    )
+    
+    BATCH_FILE_CONCURRENCY: int = Field(
+        default=4,
+        description="Number of files of a batch upload extracted and chunked concurrently"
+    )
+    
+    BATCH_STORAGE_BATCH_SIZE: int = Field(
+        default=4096,
+        description="Number of rows appended to LanceDB per write during batch ingestion"
     )
     
     # Redis Configuration
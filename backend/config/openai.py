@@ -1,5 +1,8 @@
+import asyncio
 import logging
 import os
+from typing import Any, Dict, Optional
+import httpx
 from config.logger import setup_logging
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletion
@@ -49,22 +52,121 @@ async def get_api_key() -> str:
         raise ConfigError(f"Failed to retrieve OpenAI API key: {str(e)}")
 
 
+class _ConnectionStats:
+    """Requests sent and connections opened by the shared client's HTTP pool."""
+    
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+    
+    async def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # httpcore reports every connection it opens; reused connections skip these events
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+    
+    async def on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self.trace
+    
+    def get_stats(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "connection_reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+_client: Optional[AsyncOpenAI] = None
+# Held while the shared client is created, so concurrent first callers do not each open a pool
+_client_lock = asyncio.Lock()
+_connection_stats = _ConnectionStats()
+
+
+def create_openai_client(api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Create an OpenAI client with a pooled, keep-alive HTTP connection pool.
+    
+    Args:
+        api_key: OpenAI API key
+        base_url: API base URL, or None for OPENAI_BASE_URL
+        
+    Returns:
+        AsyncOpenAI: Client whose requests are counted in the connection stats
+    """
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(config.OPENAI_TIMEOUT_SECONDS, connect=10.0),
+        event_hooks={"request": [_connection_stats.on_request]},
+    )
+    return AsyncOpenAI(api_key=api_key, base_url=base_url or config.OPENAI_BASE_URL, http_client=http_client)
+
+
 async def get_openai_client() -> AsyncOpenAI:
     """
-    Create and configure a LangChain OpenAI chat model.
+    Get the process-wide OpenAI client, creating it on first use.
+    
+    All callers share one client, and with it one HTTP connection pool, so
+    requests reuse open keep-alive connections instead of paying TCP and TLS
+    setup every time.
 
     Returns:
-        ChatOpenAI: Configured LLM instance
+        AsyncOpenAI: The shared client
 
     Raises:
         ConfigError: If API key cannot be loaded
     """
+    global _client
+    if _client is not None:
+        return _client
+    async with _client_lock:
+        if _client is not None:
+            return _client
+        try:
+            api_key = await get_api_key()
+            os.environ["OPENAI_API_KEY"] = api_key
+            logger.info(f"OpenAI API key loaded successfully")
+            _client = create_openai_client(api_key)
+            if config.OPENAI_BASE_URL:
+                logger.info(f"Using OpenAI-compatible API at {config.OPENAI_BASE_URL}")
+            return _client
+        except Exception as e:
+            logger.error(f"Failed to create LLM: {str(e)}")
+            raise ConfigError(f"Failed to initialize language model: {str(e)}")
+
+
+async def warm_up_openai_client() -> None:
+    """
+    Create the shared client and open a connection to the API, e.g. on startup.
+    
+    A failed warm-up is logged and otherwise ignored; the first request
+    connects instead.
+    """
     try:
-        api_key = await get_api_key()
-        os.environ["OPENAI_API_KEY"] = api_key
-        logger.info(f"OpenAI API key loaded successfully")
-        client = AsyncOpenAI(api_key=api_key)
-        return client
+        client = await get_openai_client()
+        await client.with_options(max_retries=0, timeout=10.0).models.list()
+        logger.info("OpenAI client warmed up")
     except Exception as e:
-        logger.error(f"Failed to create LLM: {str(e)}")
-        raise ConfigError(f"Failed to initialize language model: {str(e)}")
+        logger.warning(f"OpenAI client warm-up failed: {e}")
+
+
+async def close_openai_client() -> None:
+    """Close the shared client and its connections, e.g. on shutdown."""
+    global _client
+    async with _client_lock:
+        if _client is not None:
+            await _client.close()
+            _client = None
+
+
+def get_openai_connection_stats() -> Dict[str, Any]:
+    """Requests, connections opened and connection reuse rate of the shared client."""
+    return _connection_stats.get_stats()
@@ -1,4 +1,4 @@
 from .rag_agent import RAGAgent
-from .redis import RedisConversationStore
+from .redis import RedisConversationStore, create_redis_client
 
-__all__ = ["RAGAgent", "RedisConversationStore"]
\ No newline at end of file
+__all__ = ["RAGAgent", "RedisConversationStore", "create_redis_client"]
\ No newline at end of file
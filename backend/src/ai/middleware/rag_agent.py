@@ -7,11 +7,10 @@ for a user and lets OpenAI handle the semantic matching and answer generation.
 
 import logging
 from typing import List, Dict, Any, Optional
-from pathlib import Path
 import json
 import numpy as np
-from src.services.embedding_models import OpenAIEmbeddingModel
-from src.services.lance_db import LanceDBVectorStore
+from src.services.embedding_models import create_embedding_model
+from src.services.lance_db import get_vector_store_registry
 from config.logger import setup_logging
 from config.openai import get_openai_client, parse_openai_response
 from config import RAGIndexingConfig
@@ -33,8 +32,7 @@ class RAGAgent:
     
     def __init__(self):
         """Initialize the RAG agent with required components."""
-        self.embedding_model = OpenAIEmbeddingModel()
-        self.vector_store = LanceDBVectorStore()
+        self.embedding_model = create_embedding_model()
         self.openai_client = None
         self.config = RAGIndexingConfig()
         self.initialized = False
@@ -84,17 +82,18 @@ class RAGAgent:
             RuntimeError: If no relevant documents found
         """
         logger.info(f"Searching top {top_k} chunks for user {user_id}")
-        self.vector_store.db_path = Path(f"vector_db/{user_id}")
+        # Each request gets its user's own store, opened once per process
+        vector_store = await get_vector_store_registry().get(user_id)
         
         # First, check if there are any documents at all for this user
-        table_info = await self.vector_store.get_table_info()
+        table_info = await vector_store.get_table_info()
         logger.info(f"Table info for user {user_id}: {table_info}")
         
         if table_info.get("row_count", 0) == 0:
             raise RuntimeError("No documents found in your vector database. Please upload some documents first.")
         
         
-        relevant = await self.vector_store.search_similar(
+        relevant = await vector_store.search_similar(
             query_embedding=query_embedding,
             limit=top_k,
             similarity_threshold=0.0  # No similarity filtering
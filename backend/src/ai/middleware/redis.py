@@ -8,9 +8,33 @@ from config.logger import setup_logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+def create_redis_client(config: RAGIndexingConfig) -> redis.Redis:
+    """Create an async Redis client from the Redis settings in config."""
+    connection_params = {
+        "host": config.REDIS_HOST,
+        "port": config.REDIS_PORT,
+        "db": config.REDIS_DB,
+        "decode_responses": True
+    }
+    
+    # Add authentication if provided
+    if config.REDIS_USERNAME:
+        connection_params["username"] = config.REDIS_USERNAME
+    if config.REDIS_PASSWORD:
+        connection_params["password"] = config.REDIS_PASSWORD
+    
+    # Add SSL if enabled
+    if config.REDIS_SSL:
+        connection_params["ssl"] = True
+        connection_params["ssl_cert_reqs"] = None
+    
+    return redis.Redis(**connection_params)
+
+
 class RedisConversationStore:
     def __init__(self):
         config = RAGIndexingConfig()
+        self.config = config
         # Add these to your config
         self.redis_host = config.REDIS_HOST
         self.redis_port = config.REDIS_PORT
@@ -25,25 +49,7 @@ class RedisConversationStore:
     
     async def get_redis_client(self):
         if not self.redis_client:
-            connection_params = {
-                "host": self.redis_host,
-                "port": self.redis_port,
-                "db": self.redis_db,
-                "decode_responses": True
-            }
-            
-            # Add authentication if provided
-            if self.redis_username:
-                connection_params["username"] = self.redis_username
-            if self.redis_password:
-                connection_params["password"] = self.redis_password
-            
-            # Add SSL if enabled
-            if self.redis_ssl:
-                connection_params["ssl"] = True
-                connection_params["ssl_cert_reqs"] = None
-            
-            self.redis_client = redis.Redis(**connection_params)
+            self.redis_client = create_redis_client(self.config)
         return self.redis_client
     
     def _get_conversation_key(self, user_id: str) -> str:
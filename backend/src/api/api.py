@@ -4,6 +4,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.api.routers import document_upload
 from src.api.routers import chat
 from src.api.routers import cleanup
+from src.api.routers import jobs
+from src.api.routers import metrics
 from config.logger import setup_logging
 
 setup_logging()
@@ -23,6 +25,8 @@ origins = [
 app.include_router(document_upload.router)
 app.include_router(chat.router)
 app.include_router(cleanup.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 
 app.add_middleware(
@@ -36,9 +40,13 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize scheduled tasks on startup."""
+    """Initialize scheduled tasks and the shared OpenAI client on startup."""
     logger.info("Starting up application and initializing scheduled tasks...")
     
+    from config.openai import warm_up_openai_client
+    
+    await warm_up_openai_client()
+    
     # Import and start the scheduled cleanup task
     from src.tasks.cleanup import scheduled_vector_db_cleanup
     
@@ -47,6 +55,25 @@ async def startup_event():
     await scheduled_vector_db_cleanup()
     
     logger.info("Scheduled vector DB cleanup task initialized")
+    
+    from src.tasks.ingestion import get_ingestion_service
+    
+    get_ingestion_service().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop ingestion workers and release worker pools, caches and connections on shutdown."""
+    from config.openai import close_openai_client
+    from src.services.embedding_models import close_embedding_cache, close_onnx_model
+    from src.services.file_services import shutdown_extraction_executor
+    from src.tasks.ingestion import get_ingestion_service
+    
+    await get_ingestion_service().stop()
+    shutdown_extraction_executor()
+    close_embedding_cache()
+    close_onnx_model()
+    await close_openai_client()
 
 
 @app.get("/")
@@ -58,8 +85,14 @@ async def root():
         "description": "API for document processing, embedding generation, and RAG querying",
         "endpoints": [
             {"path": "/api/documents/upload", "method": "POST", "description": "Upload documents for processing"},
+            {"path": "/upload-documents/{user_id}", "method": "POST", "description": "Upload several documents or ZIP archives as one batch"},
+            {"path": "/reindex-documents/{user_id}", "method": "POST", "description": "Re-chunk and re-embed stored documents from the extracted text cache"},
+            {"path": "/jobs/{job_id}", "method": "GET", "description": "Get the status of a document ingestion job"},
             {"path": "/api/cleanup/vector-db", "method": "POST", "description": "Manually trigger vector DB cleanup"},
             {"path": "/api/cleanup/status", "method": "GET", "description": "Get cleanup configuration and status"},
+            {"path": "/metrics/embeddings", "method": "GET", "description": "Get query embedding batch sizes, embedding rate limiting and cache counters"},
+            {"path": "/metrics/openai", "method": "GET", "description": "Get OpenAI connection reuse counters"},
+            {"path": "/metrics/vector-stores", "method": "GET", "description": "Get open per-user LanceDB tables and lookup counters"},
             {"path": "/health", "method": "GET", "description": "Check the health of the API"}
         ]
     }
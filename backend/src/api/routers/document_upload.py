@@ -1,21 +1,72 @@
 import logging
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import uuid
-from src.rag_pipeline import RAGPipeline
+from typing import List
+from src.tasks.ingestion import get_ingestion_service
 from config.logger import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/upload-document/{user_id}")
+@router.post("/upload-document/{user_id}", status_code=202)
 async def upload_document(user_id: uuid.UUID, file: UploadFile = File(...)):
     try:
         logger.info(f"Uploading document for user {user_id}")
-        rag_pipeline = RAGPipeline()
-        result = await rag_pipeline.process_document(file, file.filename, file.content_type, user_id)
-        logger.info(f"Document uploaded successfully for user {user_id}")
-        return result
+        job = await get_ingestion_service().submit(file, user_id)
+        logger.info(f"Document queued for user {user_id} as job {job.job_id}")
+        return {
+            "status": "queued",
+            "message": "Document queued for indexing",
+            "job_id": job.job_id,
+            "status_url": f"/jobs/{job.job_id}",
+            "user_id": str(user_id),
+            "file_name": job.documents[0].file_name,
+            "file_type": job.documents[0].file_type
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/upload-documents/{user_id}", status_code=202)
+async def upload_documents(user_id: uuid.UUID, files: List[UploadFile] = File(...)):
+    try:
+        logger.info(f"Uploading batch of {len(files)} files for user {user_id}")
+        job = await get_ingestion_service().submit_batch(files, user_id)
+        logger.info(f"Batch of {len(job.documents)} documents queued for user {user_id} as job {job.job_id}")
+        return {
+            "status": "queued",
+            "message": f"{len(job.documents)} documents queued for indexing",
+            "job_id": job.job_id,
+            "status_url": f"/jobs/{job.job_id}",
+            "user_id": str(user_id),
+            "files": [document.file_name for document in job.documents],
+            "skipped": job.skipped
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reindex-documents/{user_id}", status_code=202)
+async def reindex_documents(user_id: uuid.UUID):
+    try:
+        logger.info(f"Re-indexing stored documents for user {user_id}")
+        job = await get_ingestion_service().submit_reindex(user_id)
+        return {
+            "status": "queued",
+            "message": "Stored documents queued for re-indexing from the extracted text cache",
+            "job_id": job.job_id,
+            "status_url": f"/jobs/{job.job_id}",
+            "user_id": str(user_id)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing re-index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
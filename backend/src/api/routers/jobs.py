@@ -0,0 +1,22 @@
+import logging
+from fastapi import APIRouter, HTTPException
+from src.tasks.ingestion import get_ingestion_service
+from config.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Get the status of a document ingestion job.
+    
+    Returns:
+        dict: Job status, current stage, chunks embedded so far and elapsed time,
+        plus the ingestion result once the job has finished
+    """
+    job = await get_ingestion_service().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_status()
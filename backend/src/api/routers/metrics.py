@@ -0,0 +1,50 @@
+import logging
+from fastapi import APIRouter
+from config.openai import get_openai_connection_stats
+from src.services.embedding_models import get_embedding_cache, get_query_batcher_stats, get_rate_limit_stats
+from src.services.lance_db import get_vector_store_registry
+from config.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/metrics/embeddings")
+async def embedding_metrics():
+    """
+    Get embedding metrics of this API process.
+    
+    Returns:
+        dict: Batch sizes reached by the query embedding batchers, throttling
+        and retries of the embedding request schedulers, and the hit and miss
+        counters of the embedding cache
+    """
+    return {
+        "query_batchers": get_query_batcher_stats(),
+        "rate_limiters": get_rate_limit_stats(),
+        "cache": get_embedding_cache().get_stats(),
+    }
+
+
+@router.get("/metrics/openai")
+async def openai_metrics():
+    """
+    Get connection metrics of the shared OpenAI client of this API process.
+    
+    Returns:
+        dict: Requests sent, connections opened and the share of requests
+        that reused an open connection
+    """
+    return get_openai_connection_stats()
+
+
+@router.get("/metrics/vector-stores")
+async def vector_store_metrics():
+    """
+    Get metrics of the per-user LanceDB tables kept open by this API process.
+    
+    Returns:
+        dict: Open tables, lookups served from open tables and evictions
+    """
+    return get_vector_store_registry().get_stats()
@@ -1,89 +1,525 @@
 from datetime import datetime
+import asyncio
+import hashlib
+import json
 import logging
-from typing import List
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 import uuid
 import os
-from pathlib import Path
+import numpy as np
 from fastapi import UploadFile
-from src.services import DocumentProcessor, Chunker, OpenAIEmbeddingModel, LanceDBVectorStore
+from config import RAGIndexingConfig
+from src.services import DocumentProcessor, Chunker, LanceDBVectorStore
+from src.services.embedding_models import EmbeddingUsage, create_embedding_model
+from src.services.file_services import SpooledUpload
+from src.services.lance_db import ChunkIdSequence, ContentHashRegistry, get_vector_store_registry
+from src.services.file_services.memory_usage import track_memory
 from config.logger import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Receives the current ingestion stage and the number of chunks embedded so far
+ProgressCallback = Callable[[str, int], Awaitable[None]]
+
+
+async def _ignore_progress(stage: str, chunks_embedded: int) -> None:
+    pass
+
+
+def _chunk_stats(ingest_path: str, chunks_processed: int) -> Dict[str, int]:
+    """
+    Chunk counts of an ingest that did not replace an earlier version of a file.
+    
+    Chunks stored without calling the embedding API (duplicates and copies)
+    count as reused; freshly indexed chunks count as added.
+    """
+    reused = 0 if ingest_path == "indexed" else chunks_processed
+    return {
+        "chunks_processed": chunks_processed,
+        "chunks_reused": reused,
+        "chunks_added": chunks_processed - reused,
+        "chunks_removed": 0,
+    }
+
+
+def _index_version(model_name: str, dimension: Optional[int], chunk_size: int, overlap_size: int) -> str:
+    """Short digest of the settings that decide which chunks and vectors a document is stored as."""
+    settings = {"model": model_name, "dimension": dimension, "chunk_size": chunk_size, "overlap_size": overlap_size}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
 class RAGPipeline:
+    """
+    Staged ingestion pipeline.
+    
+    Extraction, chunking, embedding and storage run as concurrent stages
+    connected by bounded queues: pages stream out of the DocumentProcessor,
+    the Chunker emits chunks as pages arrive, full embedding batches are sent
+    as soon as they fill, and rows are appended to LanceDB in record batches.
+    Peak memory is bounded by the queue sizes rather than the document size.
+    """
+    
     def __init__(self):
+        config = RAGIndexingConfig()
         self.document_processor = DocumentProcessor()
         self.chunker = Chunker()
-        self.embedding_model = OpenAIEmbeddingModel()
+        self.embedding_model = create_embedding_model()
+        self.content_registry = ContentHashRegistry()
+        self.queue_size = max(1, config.PIPELINE_QUEUE_SIZE)
+        # Not derived from BATCH_SIZE, which is sized for the API limit rather than memory
+        self.chunk_queue_size = max(1, config.PIPELINE_CHUNK_QUEUE_SIZE)
+        self.storage_batch_size = max(1, config.STORAGE_BATCH_SIZE)
+        self.batch_file_concurrency = max(1, config.BATCH_FILE_CONCURRENCY)
+        self.batch_storage_batch_size = max(1, config.BATCH_STORAGE_BATCH_SIZE)
+        # Stored content keys and chunk ids include it, so nothing indexed with
+        # another embedding model, dimension or chunking is reported as a
+        # duplicate, copied or reused
+        self.index_version = _index_version(
+            self.embedding_model.model_name, self.embedding_model.embedding_dim,
+            self.chunker.chunk_size, self.chunker.overlap_size
+        )
+    
+    def _content_key(self, content_hash: str) -> str:
+        """Deduplication key of a file: its SHA-256 and the index version."""
+        return f"{content_hash}-{self.index_version}"
+    
+    async def _chunk_stage(
+        self,
+        pages: AsyncIterator[str],
+        chunk_queue: asyncio.Queue,
+        chunk_ids: ChunkIdSequence,
+        doc_index: int = 0,
+        close: bool = True,
+        stored_ids: Optional[Set[str]] = None,
+        reused: Optional[Dict[str, int]] = None
+    ) -> int:
+        """
+        Chunk pages as they are extracted and feed the embedding stage.
         
-    async def process_document(self, file: UploadFile, file_name: str, file_type: str, user_id: uuid.UUID) -> dict:
+        Chunks are queued as (doc_index, chunk_index, chunk_id, text). Chunks
+        whose id is in ``stored_ids`` are already stored and embedded, so they
+        are not queued; their new chunk index is recorded in ``reused``
+        instead. Unless ``close`` is False, a None marking the end of the
+        input is queued last.
+        
+        Returns:
+            Number of chunks produced
         """
-        Process a document through the complete RAG pipeline and store in LanceDB.
+        chunk_index = 0
+        async for chunk in self.chunker.chunk_pages(pages):
+            chunk_id = chunk_ids.next_id(chunk)
+            if stored_ids is not None and chunk_id in stored_ids:
+                reused[chunk_id] = chunk_index
+            else:
+                await chunk_queue.put((doc_index, chunk_index, chunk_id, chunk))
+            chunk_index += 1
+        if close:
+            await chunk_queue.put(None)
+        return chunk_index
+    
+    async def _embed_stage(
+        self,
+        chunk_queue: asyncio.Queue,
+        embedded_queue: asyncio.Queue,
+        on_progress: ProgressCallback
+    ) -> EmbeddingUsage:
+        """
+        Embed chunks and feed the storage stage.
+        
+        Chunks are packed into requests of at most batch_size chunks and
+        max_batch_tokens estimated tokens. A request is sent when it is full,
+        or earlier if no request is in flight and no chunk is waiting, so the
+        embedding API is never left idle while chunks are available. Up to
+        ``concurrency`` requests are in flight at once and their results are
+        passed on in chunk order.
+        
+        Returns:
+            Requests, texts and tokens used, with the time spent embedding
+        """
+        model = self.embedding_model
+        usage = EmbeddingUsage()
+        batch: List[Tuple[int, int, str, str]] = []
+        batch_tokens = 0
+        in_flight: Deque[Tuple[List[Tuple[int, int, str, str]], asyncio.Future]] = deque()
+        chunks_embedded = 0
+        
+        def send() -> None:
+            nonlocal batch, batch_tokens
+            texts = [text for _, _, _, text in batch]
+            in_flight.append((batch, asyncio.ensure_future(model.generate_embeddings(texts, usage))))
+            batch, batch_tokens = [], 0
+        
+        async def pass_oldest() -> None:
+            nonlocal chunks_embedded
+            items, request = in_flight.popleft()
+            embeddings = await request
+            chunks_embedded += len(items)
+            await on_progress("indexing", chunks_embedded)
+            await embedded_queue.put((items, embeddings))
+        
+        try:
+            while True:
+                while in_flight and in_flight[0][1].done():
+                    await pass_oldest()
+                if batch and not in_flight and chunk_queue.empty():
+                    send()
+                item = await chunk_queue.get()
+                if item is None:
+                    break
+                tokens = model.estimate_tokens(item[3])
+                if batch and (len(batch) == model.batch_size or batch_tokens + tokens > model.max_batch_tokens):
+                    send()
+                batch.append(item)
+                batch_tokens += tokens
+                while len(in_flight) >= model.concurrency:
+                    await pass_oldest()
+            if batch:
+                send()
+            while in_flight:
+                await pass_oldest()
+        finally:
+            for _, request in in_flight:
+                request.cancel()
+            await asyncio.gather(*(request for _, request in in_flight), return_exceptions=True)
+        
+        await embedded_queue.put(None)
+        summary = usage.summary()
+        logger.info(
+            f"Embedded {usage.texts} chunks in {usage.requests} requests ({usage.tokens} tokens) "
+            f"over {summary['seconds']}s: {summary['batches_per_sec']} batches/s, {summary['tokens_per_sec']} tokens/s"
+        )
+        return usage
+    
+    async def _store_stage(
+        self,
+        embedded_queue: asyncio.Queue,
+        vector_store: LanceDBVectorStore,
+        user_id: uuid.UUID,
+        documents: List[Tuple[str, str, str]],
+        writes: List[Tuple[List[int], asyncio.Future]],
+        batch_size: int
+    ) -> int:
+        """
+        Append embedded chunks to LanceDB in record batches of batch_size rows.
+        
+        A record batch can hold chunks of several documents, given as
+        (file_name, file_type, content_hash) and referenced by index. Each
+        append is recorded in ``writes`` with the document index of every row
+        and shielded from cancellation, so a failed ingest can wait for
+        in-flight appends and remove what they wrote. Embeddings are copied
+        once, into a float32 buffer of batch_size rows that storage reads
+        without copying.
+        """
+        chunks_stored = 0
+        items: List[Tuple[int, int, str, str]] = []
+        # Embeddings of the pending rows, filled in place and reused for every append
+        buffer: Optional[np.ndarray] = None
+        
+        async def flush() -> None:
+            nonlocal chunks_stored, items
+            write = asyncio.ensure_future(vector_store.add_chunks(
+                texts=[chunk for _, _, _, chunk in items],
+                embeddings=buffer[:len(items)],
+                metadata=self._chunk_metadata(items, user_id),
+                file_names=[documents[doc_index][0] for doc_index, _, _, _ in items],
+                file_types=[documents[doc_index][1] for doc_index, _, _, _ in items],
+                chunk_indices=[chunk_index for _, chunk_index, _, _ in items],
+                content_hashes=[documents[doc_index][2] for doc_index, _, _, _ in items],
+                ids=[chunk_id for _, _, chunk_id, _ in items]
+            ))
+            writes.append(([doc_index for doc_index, _, _, _ in items], write))
+            # The buffer is only refilled once the append has finished with it
+            await asyncio.shield(write)
+            chunks_stored += len(items)
+            items = []
+        
+        while True:
+            item = await embedded_queue.get()
+            if item is None:
+                break
+            batch, batch_embeddings = item
+            if buffer is None:
+                buffer = np.empty((batch_size, batch_embeddings.shape[1]), dtype=np.float32)
+            start = 0
+            while start < len(batch):
+                count = min(batch_size - len(items), len(batch) - start)
+                buffer[len(items):len(items) + count] = batch_embeddings[start:start + count]
+                items.extend(batch[start:start + count])
+                start += count
+                if len(items) == batch_size:
+                    await flush()
+        if items:
+            await flush()
+        return chunks_stored
+    
+    @staticmethod
+    def _chunk_metadata(items: List[Tuple[int, int, str, str]], user_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """Metadata stored with each (doc_index, chunk_index, chunk_id, text) chunk."""
+        timestamp = str(datetime.now())
+        return [
+            {
+                "chunk_index": chunk_index,
+                "user_id": str(user_id),
+                "chunk_length": len(chunk),
+                "processing_timestamp": timestamp,
+            }
+            for _, chunk_index, _, chunk in items
+        ]
+    
+    @staticmethod
+    async def _remove_written(
+        vector_store: LanceDBVectorStore,
+        writes: List[Tuple[List[int], asyncio.Future]],
+        doc_indices: Optional[Set[int]] = None
+    ) -> None:
+        """
+        Wait for in-flight appends and delete the rows they wrote.
         
         Args:
-            file: UploadFile object from FastAPI
+            vector_store: Store the rows were appended to
+            writes: Appends recorded by the storage stage
+            doc_indices: Only delete rows of these documents (all rows if None)
+        """
+        ids = []
+        for row_docs, write in writes:
+            try:
+                row_ids = await write
+            except Exception:
+                continue
+            ids.extend(
+                row_id for row_id, doc_index in zip(row_ids, row_docs)
+                if doc_indices is None or doc_index in doc_indices
+            )
+        await vector_store.delete_by_ids(ids)
+    
+    @staticmethod
+    async def _run_stages(*stages):
+        """Run pipeline stages concurrently; if one fails, cancel the others and re-raise."""
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+    async def _copy_from_other_user(
+        self,
+        spooled: SpooledUpload,
+        vector_store: LanceDBVectorStore,
+        user_id: uuid.UUID,
+        file_name: str
+    ) -> int:
+        """
+        Copy the chunks and vectors of identical content indexed by another user.
+        
+        Returns:
+            Number of chunks copied, 0 if no other user has the content
+        """
+        content_key = self._content_key(spooled.content_hash)
+        for other_user_id in await self.content_registry.find_users(content_key):
+            if other_user_id == str(user_id):
+                continue
+            registry = get_vector_store_registry()
+            if not registry.path(other_user_id).exists():
+                await self.content_registry.unregister(content_key, other_user_id)
+                continue
+            source = await registry.get(other_user_id)
+            copied = await vector_store.copy_content_from(
+                source, content_key, file_name, str(user_id), id_namespace=self.index_version
+            )
+            if copied:
+                return copied
+            # The other user's rows are gone, drop the stale registry entry
+            await self.content_registry.unregister(content_key, other_user_id)
+        return 0
+    
+    async def _reindex(
+        self,
+        pages: AsyncIterator[str],
+        content_key: str,
+        vector_store: LanceDBVectorStore,
+        user_id: uuid.UUID,
+        file_name: str,
+        file_type: str,
+        stored_ids: Set[str],
+        on_progress: ProgressCallback
+    ) -> Dict[str, Any]:
+        """
+        Replace an indexed file with a new version, embedding only its new chunks.
+        
+        Chunks of the new version whose id is already stored keep their
+        vectors. The embedded new chunks are held until the whole file has
+        been chunked and then written together with the updated and removed
+        rows in one upsert, so nothing is stored if the ingest fails.
+        
+        Args:
+            pages: Text of each page of the new version
+            content_key: Deduplication key of the new version
+            
+        Returns:
+            Counts of chunks processed, reused, added and removed, and the
+            embedding usage
+        """
+        reused: Dict[str, int] = {}
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.chunk_queue_size)
+        embedded_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        
+        async def collect() -> List[Tuple[List[Tuple[int, int, str, str]], np.ndarray]]:
+            batches = []
+            while True:
+                item = await embedded_queue.get()
+                if item is None:
+                    return batches
+                batches.append(item)
+        
+        await on_progress("indexing", 0)
+        logger.info(f"Re-indexing {file_name}: {len(stored_ids)} chunks stored")
+        chunks_processed, usage, batches = await self._run_stages(
+            self._chunk_stage(
+                pages, chunk_queue, ChunkIdSequence(file_name, self.index_version),
+                stored_ids=stored_ids, reused=reused
+            ),
+            self._embed_stage(chunk_queue, embedded_queue, on_progress),
+            collect(),
+        )
+        
+        items = [item for batch, _ in batches for item in batch]
+        embeddings = (
+            np.concatenate([batch_embeddings for _, batch_embeddings in batches]) if batches
+            else np.empty((0, vector_store.dimension), dtype=np.float32)
+        )
+        counts = await vector_store.replace_file_chunks(
+            file_name=file_name,
+            file_type=file_type,
+            content_hash=content_key,
+            ids=[chunk_id for _, _, chunk_id, _ in items],
+            texts=[chunk for _, _, _, chunk in items],
+            embeddings=embeddings,
+            metadata=self._chunk_metadata(items, user_id),
+            chunk_indices=[chunk_index for _, chunk_index, _, _ in items],
+            reused=reused
+        )
+        return {"chunks_processed": chunks_processed, **counts, "embedding": usage.summary()}
+    
+    async def _ingest(
+        self,
+        spooled: SpooledUpload,
+        vector_store: LanceDBVectorStore,
+        user_id: uuid.UUID,
+        file_name: str,
+        file_type: str,
+        writes: List[Tuple[List[int], asyncio.Future]],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Index a spooled upload, reusing earlier work for identical content.
+        
+        Returns:
+            Tuple[str, Dict[str, Any]]: (ingest_path, chunk counts) where
+            ingest_path is "duplicate" if this user already indexed the
+            content, "reindexed" if it replaced an earlier version of the file,
+            "copied" if it was copied from another user, or "indexed" if it
+            was processed
+        """
+        on_progress = on_progress or _ignore_progress
+        await on_progress("deduplicating", 0)
+        content_key = self._content_key(spooled.content_hash)
+        existing_chunks = await vector_store.count_by_content_hash(content_key)
+        if existing_chunks:
+            logger.info(f"{file_name} is already indexed for user {user_id}, skipping")
+            return "duplicate", _chunk_stats("duplicate", existing_chunks)
+        
+        stored_ids = await vector_store.get_chunk_ids(file_name)
+        if stored_ids:
+            pages = self.document_processor.iter_pages(spooled.path, file_type, spooled.content_hash)
+            counts = await self._reindex(
+                pages, content_key, vector_store, user_id, file_name, file_type, stored_ids, on_progress
+            )
+            await self.content_registry.register(content_key, str(user_id))
+            return "reindexed", counts
+        
+        copied_chunks = await self._copy_from_other_user(spooled, vector_store, user_id, file_name)
+        if copied_chunks:
+            await self.content_registry.register(content_key, str(user_id))
+            return "copied", _chunk_stats("copied", copied_chunks)
+        
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.chunk_queue_size)
+        embedded_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        
+        await on_progress("indexing", 0)
+        logger.info(f"Streaming {file_name} through extraction, chunking, embedding and storage")
+        _, usage, chunks_processed = await self._run_stages(
+            self._chunk_stage(
+                self.document_processor.iter_pages(spooled.path, file_type, spooled.content_hash), chunk_queue,
+                ChunkIdSequence(file_name, self.index_version)
+            ),
+            self._embed_stage(chunk_queue, embedded_queue, on_progress),
+            self._store_stage(
+                embedded_queue, vector_store, user_id, [(file_name, file_type, content_key)],
+                writes, self.storage_batch_size
+            ),
+        )
+        await self.content_registry.register(content_key, str(user_id))
+        return "indexed", {**_chunk_stats("indexed", chunks_processed), "embedding": usage.summary()}
+        
+    async def process_spooled_document(
+        self,
+        spooled: SpooledUpload,
+        file_name: str,
+        file_type: str,
+        user_id: uuid.UUID,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> dict:
+        """
+        Process a document already spooled to disk and store it in LanceDB.
+        
+        Args:
+            spooled: The spooled upload
             file_name: Name of the original file
-            file_type: Type of the file (pdf, txt, docx, etc.)
+            file_type: Type of the file as returned by DocumentProcessor.get_file_type
             user_id: User ID for the document
+            on_progress: Optional callback receiving the current stage and the
+                number of chunks embedded so far
         Returns:
             dict: Processing results with user_id and stats
         """
         logger.info(f"Starting document processing for user {user_id}, file: {file_name}")
         
+        writes: List[Tuple[List[int], asyncio.Future]] = []
+        vector_store: Optional[LanceDBVectorStore] = None
+        
         try:
-            # Create a unique LanceDB instance for this document with user_id-based path
-            vector_store = LanceDBVectorStore()
-            # Override the default db path to include the user_id
-            vector_store.db_path = Path(f"vector_db/{user_id}")
-            logger.info(f"Vector store initialized with path: {vector_store.db_path}")
-            
-            # Process document text - pass the UploadFile directly
-            logger.info(f"Extracting text from document: {file_name}")
-            text, file_type = await self.document_processor.extract_text_from_upload(file)
-            logger.info(f"Text extracted successfully from {file_name}, length: {len(text)} characters")
-            
-            # Chunk the text
-            logger.info(f"Starting text chunking for document: {file_name}")
-            chunks = await self.chunker.chunk_text(text)
-            logger.info(f"Text chunked successfully into {len(chunks)} chunks")
-            
-            # Generate embeddings for all chunks
-            logger.info(f"Generating embeddings for {len(chunks)} chunks")
-            embeddings = await self.embedding_model.generate_embeddings(chunks)
-            logger.info(f"Embeddings generated successfully for {len(embeddings)} chunks")
-            
-            # Prepare metadata for each chunk
-            logger.info(f"Preparing metadata for {len(chunks)} chunks")
-            metadata = []
-            for i, chunk in enumerate(chunks):
-                meta = {
-                    "chunk_index": i,
-                    "user_id": str(user_id),
-                    "chunk_length": len(chunk),
-                    "processing_timestamp": str(datetime.now()),
-                    "total_chunks": len(chunks),
-                }
-                metadata.append(meta)
-            logger.info(f"Metadata prepared for {len(metadata)} chunks")
-            
-            # Store embeddings in LanceDB
-            logger.info(f"Storing embeddings in LanceDB at path: {vector_store.db_path}")
-            await vector_store.add_embeddings(
-                texts=chunks,
-                embeddings=embeddings,
-                metadata=metadata,
-                file_name=file_name,
-                file_type=file_type
+            # The user's store is shared with their other requests
+            vector_store = await get_vector_store_registry().get(user_id)
+            logger.info(f"Vector store opened at path: {vector_store.db_path}")
+            started = time.perf_counter()
+            async with track_memory(file_name) as memory:
+                memory["spooled"] = spooled.size
+                ingest_path, counts = await self._ingest(
+                    spooled, vector_store, user_id, file_name, file_type, writes, on_progress
+                )
+            logger.info(
+                f"Finished {file_name} ({ingest_path}): {counts['chunks_processed']} chunks "
+                f"in {time.perf_counter() - started:.2f}s"
             )
-            logger.info(f"Embeddings stored successfully in LanceDB")
             
+            messages = {
+                "indexed": "Document indexed successfully",
+                "duplicate": "Document already indexed, nothing to do",
+                "reindexed": "Document re-indexed, only changed chunks were embedded",
+                "copied": "Document indexed from an identical upload without re-embedding",
+            }
             result = {
                 "status": "success",
-                "message": "Document indexed successfully",
+                "message": messages[ingest_path],
+                "ingest_path": ingest_path,
                 "user_id": str(user_id),
                 "db_path": str(vector_store.db_path),
-                "chunks_processed": len(chunks),
+                **counts,
                 "file_name": file_name,
                 "file_type": file_type
             }
@@ -93,15 +529,345 @@ class RAGPipeline:
             
         except Exception as e:
             logger.error(f"Error processing document {file_name} for user {user_id}: {str(e)}", exc_info=True)
+            # Remove the batches that were already stored so a failed upload leaves no partial document
+            try:
+                if vector_store is not None:
+                    await self._remove_written(vector_store, writes)
+            except Exception as cleanup_error:
+                logger.error(f"Failed to remove partially indexed chunks of {file_name}: {cleanup_error}")
             return {
                 "status": "error",
                 "message": f"Error processing document: {str(e)}",
                 "user_id": str(user_id),
                 "db_path": None,
                 "chunks_processed": 0,
+                "chunks_reused": 0,
+                "chunks_added": 0,
+                "chunks_removed": 0,
                 "file_name": file_name,
                 "file_type": file_type
             }
     
+    async def _batch_chunk_stage(
+        self,
+        documents: List[Tuple[SpooledUpload, str, str]],
+        doc_indices: List[int],
+        chunk_queue: asyncio.Queue,
+        chunk_counts: Dict[int, int],
+        failures: Dict[int, str]
+    ) -> None:
+        """
+        Extract and chunk several documents concurrently into one chunk queue.
+        
+        At most batch_file_concurrency documents are read at once. A document
+        that fails is recorded in ``failures`` and does not stop the others.
+        """
+        semaphore = asyncio.Semaphore(self.batch_file_concurrency)
+        
+        async def chunk_document(doc_index: int) -> None:
+            spooled, file_name, file_type = documents[doc_index]
+            async with semaphore:
+                try:
+                    pages = self.document_processor.iter_pages(spooled.path, file_type, spooled.content_hash)
+                    chunk_counts[doc_index] = await self._chunk_stage(
+                        pages, chunk_queue, ChunkIdSequence(file_name, self.index_version), doc_index, close=False
+                    )
+                except Exception as e:
+                    logger.error(f"Error extracting {file_name}: {e}")
+                    failures[doc_index] = str(e)
+        
+        await self._run_stages(*(chunk_document(doc_index) for doc_index in doc_indices))
+        await chunk_queue.put(None)
+    
+    async def process_spooled_documents(
+        self,
+        documents: List[Tuple[SpooledUpload, str, str]],
+        user_id: uuid.UUID,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> dict:
+        """
+        Process a batch of documents already spooled to disk and store them in LanceDB.
         
-        
\ No newline at end of file
+        Documents already indexed by this user are skipped and documents
+        indexed by another user are copied. New files are extracted and
+        chunked concurrently; their chunks are packed into full embedding
+        batches regardless of which file they came from and appended to the
+        user's table in record batches of batch_storage_batch_size rows. New
+        versions of files that are already indexed, or that occur earlier in
+        the batch, are re-indexed one at a time afterwards, embedding only
+        their changed chunks.
+        
+        Args:
+            documents: (spooled upload, file name, file type) of each document
+            user_id: User ID for the documents
+            on_progress: Optional callback receiving the current stage and the
+                number of chunks embedded so far
+        Returns:
+            dict: Processing results with per-document status and stats
+        """
+        on_progress = on_progress or _ignore_progress
+        logger.info(f"Starting batch processing of {len(documents)} documents for user {user_id}")
+        
+        vector_store = await get_vector_store_registry().get(user_id)
+        writes: List[Tuple[List[int], asyncio.Future]] = []
+        ingest_paths: Dict[int, str] = {}
+        chunk_counts: Dict[int, int] = {}
+        reindex_counts: Dict[int, Dict[str, Any]] = {}
+        usage = EmbeddingUsage()
+        failures: Dict[int, str] = {}
+        started = time.perf_counter()
+        
+        async with track_memory(f"batch of {len(documents)} documents") as memory:
+            memory["spooled"] = sum(spooled.size for spooled, _, _ in documents)
+            
+            await on_progress("deduplicating", 0)
+            content_keys = [self._content_key(spooled.content_hash) for spooled, _, _ in documents]
+            indexed_hashes = await vector_store.find_content_hashes(content_keys)
+            stored_names = await vector_store.find_file_names([file_name for _, file_name, _ in documents])
+            to_index: List[int] = []
+            to_reindex: List[int] = []
+            # Later copies of the same content in this batch are duplicates of the first
+            first_in_batch: Dict[str, int] = {}
+            batch_duplicates: Dict[int, int] = {}
+            for doc_index, (spooled, file_name, _) in enumerate(documents):
+                content_key = content_keys[doc_index]
+                if content_key in first_in_batch:
+                    batch_duplicates[doc_index] = first_in_batch[content_key]
+                    continue
+                first_in_batch[content_key] = doc_index
+                if content_key in indexed_hashes:
+                    ingest_paths[doc_index] = "duplicate"
+                    chunk_counts[doc_index] = await vector_store.count_by_content_hash(content_key)
+                    continue
+                if file_name in stored_names:
+                    to_reindex.append(doc_index)
+                    continue
+                # A later version of the same file in this batch replaces this one
+                stored_names.add(file_name)
+                try:
+                    copied = await self._copy_from_other_user(spooled, vector_store, user_id, file_name)
+                except Exception as e:
+                    logger.error(f"Error copying {file_name} from another user: {e}")
+                    copied = 0
+                if copied:
+                    await self.content_registry.register(content_key, str(user_id))
+                    ingest_paths[doc_index] = "copied"
+                    chunk_counts[doc_index] = copied
+                else:
+                    to_index.append(doc_index)
+            
+            if to_index:
+                chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.chunk_queue_size)
+                embedded_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+                await on_progress("indexing", 0)
+                logger.info(f"Streaming {len(to_index)} documents through extraction, chunking, embedding and storage")
+                try:
+                    _, usage, _ = await self._run_stages(
+                        self._batch_chunk_stage(documents, to_index, chunk_queue, chunk_counts, failures),
+                        self._embed_stage(chunk_queue, embedded_queue, on_progress),
+                        self._store_stage(
+                            embedded_queue, vector_store, user_id,
+                            [
+                                (file_name, file_type, content_keys[doc_index])
+                                for doc_index, (_, file_name, file_type) in enumerate(documents)
+                            ],
+                            writes, self.batch_storage_batch_size
+                        ),
+                    )
+                    # Rows stored for documents that failed part way through
+                    if failures:
+                        await self._remove_written(vector_store, writes, set(failures))
+                except Exception as e:
+                    logger.error(f"Error processing batch for user {user_id}: {str(e)}", exc_info=True)
+                    for doc_index in to_index:
+                        failures.setdefault(doc_index, str(e))
+                    try:
+                        await self._remove_written(vector_store, writes)
+                    except Exception as cleanup_error:
+                        logger.error(f"Failed to remove partially indexed chunks of the batch: {cleanup_error}")
+                
+                for doc_index in to_index:
+                    if doc_index not in failures:
+                        ingest_paths[doc_index] = "indexed"
+                        await self.content_registry.register(content_keys[doc_index], str(user_id))
+            
+            for doc_index in to_reindex:
+                spooled, file_name, file_type = documents[doc_index]
+                try:
+                    stored_ids = await vector_store.get_chunk_ids(file_name)
+                    pages = self.document_processor.iter_pages(spooled.path, file_type, spooled.content_hash)
+                    reindex_counts[doc_index] = await self._reindex(
+                        pages, content_keys[doc_index], vector_store, user_id, file_name, file_type,
+                        stored_ids, on_progress
+                    )
+                except Exception as e:
+                    logger.error(f"Error re-indexing {file_name}: {e}", exc_info=True)
+                    failures[doc_index] = str(e)
+                    continue
+                ingest_paths[doc_index] = "reindexed"
+                chunk_counts[doc_index] = reindex_counts[doc_index]["chunks_processed"]
+                await self.content_registry.register(content_keys[doc_index], str(user_id))
+            
+            for doc_index, first_index in batch_duplicates.items():
+                if first_index in failures:
+                    failures[doc_index] = failures[first_index]
+                else:
+                    ingest_paths[doc_index] = "duplicate"
+                    chunk_counts[doc_index] = chunk_counts.get(first_index, 0)
+        
+        results: List[Dict[str, Any]] = []
+        for doc_index, (_, file_name, file_type) in enumerate(documents):
+            if doc_index in failures:
+                results.append({
+                    "file_name": file_name,
+                    "file_type": file_type,
+                    "status": "error",
+                    "message": f"Error processing document: {failures[doc_index]}",
+                    **_chunk_stats("indexed", 0),
+                })
+            else:
+                ingest_path = ingest_paths[doc_index]
+                results.append({
+                    "file_name": file_name,
+                    "file_type": file_type,
+                    "status": "success",
+                    "ingest_path": ingest_path,
+                    **(reindex_counts.get(doc_index) or _chunk_stats(ingest_path, chunk_counts.get(doc_index, 0))),
+                })
+        
+        files_failed = len(failures)
+        totals = {
+            key: sum(result[key] for result in results)
+            for key in ("chunks_processed", "chunks_reused", "chunks_added", "chunks_removed")
+        }
+        chunks_processed = totals["chunks_processed"]
+        logger.info(
+            f"Finished batch of {len(documents)} documents for user {user_id}: {files_failed} failed, "
+            f"{chunks_processed} chunks in {time.perf_counter() - started:.2f}s, {len(writes)} appends"
+        )
+        if files_failed == len(documents):
+            status, message = "error", "No document could be indexed"
+        elif files_failed:
+            status, message = "partial", f"{files_failed} of {len(documents)} documents could not be indexed"
+        else:
+            status, message = "success", "Documents indexed successfully"
+        return {
+            "status": status,
+            "message": message,
+            "user_id": str(user_id),
+            "db_path": str(vector_store.db_path),
+            "files_total": len(documents),
+            "files_failed": files_failed,
+            **totals,
+            "embedding": usage.summary(),
+            "documents": results,
+        }
+    
+    async def reindex_stored_documents(
+        self,
+        user_id: uuid.UUID,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> dict:
+        """
+        Re-chunk and re-embed a user's stored documents from the extracted text cache.
+        
+        Files indexed with another embedding model, dimension or chunking are
+        chunked again from their cached page texts, so neither the original
+        upload nor a parse of it is needed, and replace their stored chunks
+        one file at a time. Files indexed with the current settings are left
+        as they are. A file whose text is not in the cache fails and has to
+        be uploaded again.
+        
+        Args:
+            user_id: User ID whose documents are re-indexed
+            on_progress: Optional callback receiving the current stage and the
+                number of chunks embedded so far
+        Returns:
+            dict: Processing results with per-document status and stats, like
+            process_spooled_documents
+        """
+        on_progress = on_progress or _ignore_progress
+        vector_store = await get_vector_store_registry().get(user_id)
+        files = await vector_store.get_indexed_files()
+        logger.info(f"Re-indexing {len(files)} stored documents of user {user_id} from the extracted text cache")
+        
+        results: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        for stored in files:
+            file_name, file_type, stored_key = stored["file_name"], stored["file_type"], stored["content_hash"]
+            result: Dict[str, Any] = {"file_name": file_name, "file_type": file_type}
+            failed = {**result, "status": "error", **_chunk_stats("indexed", 0)}
+            # Keys are "<sha256>-<index version>", or the bare SHA-256 for rows stored before versioning
+            content_hash = stored_key.split("-", 1)[0] if stored_key else None
+            content_key = self._content_key(content_hash)
+            if stored_key == content_key:
+                chunks = await vector_store.count_by_content_hash(content_key)
+                results.append({
+                    **result, "status": "success", "ingest_path": "duplicate", **_chunk_stats("duplicate", chunks)
+                })
+                continue
+            try:
+                pages = await self.document_processor.read_cached_pages(content_hash, file_type) if content_hash else None
+                if pages is None:
+                    logger.warning(f"Extracted text of {file_name} is not cached, it cannot be re-indexed")
+                    results.append({**failed, "message": "Extracted text is not cached, upload the document again"})
+                    continue
+                stored_ids = await vector_store.get_chunk_ids(file_name)
+                counts = await self._reindex(
+                    pages, content_key, vector_store, user_id, file_name, file_type, stored_ids, on_progress
+                )
+                await self.content_registry.register(content_key, str(user_id))
+                results.append({**result, "status": "success", "ingest_path": "reindexed", **counts})
+            except Exception as e:
+                logger.error(f"Error re-indexing {file_name} for user {user_id}: {e}", exc_info=True)
+                results.append({**failed, "message": f"Error processing document: {e}"})
+        
+        files_failed = sum(result["status"] == "error" for result in results)
+        usage = EmbeddingUsage(**{
+            key: sum(result["embedding"][key] for result in results if "embedding" in result)
+            for key in ("requests", "texts", "tokens", "seconds")
+        })
+        totals = {
+            key: sum(result[key] for result in results)
+            for key in ("chunks_processed", "chunks_reused", "chunks_added", "chunks_removed")
+        }
+        logger.info(
+            f"Finished re-indexing {len(files)} documents for user {user_id}: {files_failed} failed, "
+            f"{totals['chunks_processed']} chunks in {time.perf_counter() - started:.2f}s"
+        )
+        if files and files_failed == len(files):
+            status, message = "error", "No document could be re-indexed"
+        elif files_failed:
+            status, message = "partial", f"{files_failed} of {len(files)} documents could not be re-indexed"
+        else:
+            status, message = "success", "Documents re-indexed successfully"
+        return {
+            "status": status,
+            "message": message,
+            "user_id": str(user_id),
+            "db_path": str(vector_store.db_path),
+            "files_total": len(files),
+            "files_failed": files_failed,
+            **totals,
+            "embedding": usage.summary(),
+            "documents": results,
+        }
+    
+    async def process_document(self, file: UploadFile, file_name: str, file_type: str, user_id: uuid.UUID) -> dict:
+        """
+        Process a document through the complete RAG pipeline and store in LanceDB.
+        
+        Args:
+            file: UploadFile object from FastAPI
+            file_name: Name of the original file
+            file_type: Type of the file (pdf, txt, docx, etc.)
+            user_id: User ID for the document
+        Returns:
+            dict: Processing results with user_id and stats
+            
+        Raises:
+            HTTPException: If the file type is unsupported or the upload is too large
+        """
+        file_type = await self.document_processor.get_file_type(file.filename)
+        async with self.document_processor.spool_upload(file) as spooled:
+            return await self.process_spooled_document(spooled, file_name, file_type, user_id)
@@ -5,5 +5,6 @@ This module contains text chunking functionality.
 """
 
 from .chunking import Chunker
+from .offset_splitter import OffsetTextSplitter
 
-__all__ = ["Chunker"] 
\ No newline at end of file
+__all__ = ["Chunker", "OffsetTextSplitter"] 
\ No newline at end of file
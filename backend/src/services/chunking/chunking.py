@@ -1,8 +1,8 @@
-from typing import List
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import AsyncIterator, List
 from config import RAGIndexingConfig
 from config.logger import setup_logging
 import logging
+from .offset_splitter import OffsetTextSplitter
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -13,7 +13,7 @@ class Chunker:
         config = RAGIndexingConfig()
         self.chunk_size = config.CHUNK_SIZE
         self.overlap_size = config.OVERLAP_SIZE
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        self.text_splitter = OffsetTextSplitter(
             chunk_size=self.chunk_size, 
             chunk_overlap=self.overlap_size
         )
@@ -36,5 +36,43 @@ class Chunker:
         chunks = self.text_splitter.split_text(text)
         logger.info(f"Split text into {len(chunks)} chunks")
         return chunks
+    
+    async def chunk_pages(self, pages: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Split a stream of pages into chunks as the pages arrive.
+        
+        Pages are joined with "\\n\\n" like the full-text extraction. Whenever
+        the buffered text is long enough, every chunk except the last is
+        emitted and the text from the start offset of the last chunk is
+        carried over, so chunk boundaries and overlaps match splitting the
+        whole text closely while only a few chunks' worth of text is held in
+        memory.
+        
+        Args:
+            pages: Async iterator of page texts
+            
+        Yields:
+            Text chunks in document order
+        """
+        buffer = ""
+        flush_size = 4 * self.chunk_size
+        chunk_count = 0
+        
+        async for page in pages:
+            buffer = f"{buffer}\n\n{page}" if buffer else page
+            if len(buffer) < flush_size:
+                continue
+            
+            spans = self.text_splitter.split_offsets(buffer)
+            for start, end in spans[:-1]:
+                yield buffer[start:end]
+            chunk_count += max(len(spans) - 1, 0)
+            buffer = buffer[spans[-1][0]:] if spans else ""
+        
+        if buffer.strip():
+            chunks = self.text_splitter.split_text(buffer)
+            for chunk in chunks:
+                yield chunk
+            chunk_count += len(chunks)
         
-        
\ No newline at end of file
+        logger.info(f"Split page stream into {chunk_count} chunks")
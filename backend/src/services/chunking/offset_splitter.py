@@ -0,0 +1,154 @@
+"""
+Offset Text Splitter
+
+Recursive character text splitting computed on character offsets. It follows
+LangChain's ``RecursiveCharacterTextSplitter`` with its default settings
+(separators "\\n\\n", "\\n", " ", "", separators kept at the start of the
+following piece, whitespace stripped from chunks) and returns the same
+chunks, but works on ``(start, end)`` offsets into the original text and
+only slices out strings when asked to.
+"""
+
+from itertools import accumulate
+from typing import List, Optional, Sequence, Tuple
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+# A chunk as the (start, end) character offsets of its text
+Span = Tuple[int, int]
+
+
+class OffsetTextSplitter:
+    """
+    Split text into overlapping chunks of at most ``chunk_size`` characters.
+
+    The text is split on the first separator that occurs in it. Pieces
+    shorter than ``chunk_size`` are merged into chunks, keeping up to
+    ``chunk_overlap`` characters of the previous chunk; longer pieces are
+    split again with the next separator.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, separators: Sequence[str] = DEFAULT_SEPARATORS):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0:
+            raise ValueError(f"chunk_overlap must be >= 0, got {chunk_overlap}")
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators)
+
+    def split_offsets(self, text: str) -> List[Span]:
+        """
+        Compute the chunks of a text as character offsets.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            (start, end) of each chunk, so that ``text[start:end]`` is the chunk
+        """
+        spans: List[Span] = []
+        if text:
+            self._split(text, 0, len(text), self.separators, spans)
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """Split a text into chunk strings."""
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def _split(self, text: str, lo: int, hi: int, separators: List[str], spans: List[Span]) -> None:
+        """Split text[lo:hi] with the first separator found in it, appending chunks to spans."""
+        separator = separators[-1]
+        remaining: List[str] = []
+        for index, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, lo, hi) != -1:
+                separator = candidate
+                remaining = separators[index + 1:]
+                break
+
+        if separator == "" and self.chunk_size > 1:
+            # Every piece is a single character, so the chunks are fixed windows
+            self._merge_characters(text, lo, hi, spans)
+            return
+
+        bounds = self._piece_bounds(text, lo, hi, separator)
+        first_good = 0  # pieces from here on are shorter than chunk_size and not merged yet
+        for index in range(len(bounds) - 1):
+            piece_start, piece_end = bounds[index], bounds[index + 1]
+            if piece_end - piece_start < self.chunk_size:
+                continue
+            if index > first_good:
+                self._merge(text, bounds, first_good, index, spans)
+            first_good = index + 1
+            if remaining:
+                self._split(text, piece_start, piece_end, remaining, spans)
+            else:
+                # Nothing left to split on: the piece is used as it is, without stripping
+                spans.append((piece_start, piece_end))
+        if len(bounds) - 1 > first_good:
+            self._merge(text, bounds, first_good, len(bounds) - 1, spans)
+
+    @staticmethod
+    def _piece_bounds(text: str, lo: int, hi: int, separator: str) -> List[int]:
+        """
+        Split text[lo:hi] before each occurrence of separator, dropping empty pieces.
+
+        Returns:
+            Piece boundaries: piece k is text[bounds[k]:bounds[k + 1]]
+        """
+        if separator == "":
+            return list(range(lo, hi + 1))
+        parts = text[lo:hi].split(separator)
+        # The separator starts every piece but the first, which is empty if the text starts with it
+        lengths = [len(part) + len(separator) for part in parts]
+        lengths[0] = len(parts[0])
+        bounds = list(accumulate(lengths, initial=lo)) if lengths[0] else list(accumulate(lengths[1:], initial=lo))
+        return bounds
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int) -> Optional[Span]:
+        """Offsets of text[start:end].strip(), or None if it is blank."""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if start < end else None
+
+    def _merge(self, text: str, bounds: List[int], begin: int, stop: int, spans: List[Span]) -> None:
+        """Merge pieces begin..stop-1 into chunks with overlap, as LangChain's _merge_splits."""
+        first = begin  # first piece of the current chunk
+        total = 0
+        for index in range(begin, stop):
+            length = bounds[index + 1] - bounds[index]
+            if total + length > self.chunk_size and index > first:
+                span = self._strip(text, bounds[first], bounds[index])
+                if span is not None:
+                    spans.append(span)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    total -= bounds[first + 1] - bounds[first]
+                    first += 1
+            total += length
+        if first < stop:
+            span = self._strip(text, bounds[first], bounds[stop])
+            if span is not None:
+                spans.append(span)
+
+    def _merge_characters(self, text: str, lo: int, hi: int, spans: List[Span]) -> None:
+        """_merge for single-character pieces: windows of chunk_size that overlap by the kept length."""
+        keep = min(self.chunk_overlap, self.chunk_size - 1)
+        start = lo
+        while True:
+            end = min(start + self.chunk_size, hi)
+            span = self._strip(text, start, end)
+            if span is not None:
+                spans.append(span)
+            if end == hi:
+                break
+            start = end - keep
@@ -4,12 +4,31 @@ Embedding Models Package
 This package contains different embedding model implementations.
 """
 
-from .base_embedding import BaseEmbeddingModel
-from .openai_embedding import OpenAIEmbeddingModel
+from .base_embedding import BaseEmbeddingModel, EmbeddingError, EmbeddingUsage
+from .openai_embedding import OpenAIEmbeddingModel, get_query_batcher_stats, get_rate_limit_stats
+from .onnx_embedding import OnnxEmbeddingModel
+from .rate_limiter import RateLimitScheduler
+from .micro_batcher import EmbeddingMicroBatcher
+from .cached_embedding import CachedEmbeddingModel, EmbeddingCache
+from .factory import create_embedding_model, get_embedding_cache, close_embedding_cache, get_onnx_model, close_onnx_model
 # from .qwen_embedding import QwenEmbeddingModel
 
 __all__ = [
     "BaseEmbeddingModel",
+    "EmbeddingError",
+    "EmbeddingUsage",
     "OpenAIEmbeddingModel", 
+    "OnnxEmbeddingModel",
+    "CachedEmbeddingModel",
+    "EmbeddingMicroBatcher",
+    "get_query_batcher_stats",
+    "RateLimitScheduler",
+    "get_rate_limit_stats",
+    "EmbeddingCache",
+    "create_embedding_model",
+    "get_embedding_cache",
+    "get_onnx_model",
+    "close_onnx_model",
+    "close_embedding_cache",
     # "QwenEmbeddingModel",
 ] 
\ No newline at end of file
@@ -4,11 +4,61 @@ Base Embedding Model
 Abstract base class for all embedding models.
 """
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
 import numpy as np
 
 
+class EmbeddingError(Exception):
+    """Raised when texts could not be embedded; no placeholder vectors are returned."""
+    pass
+
+
+@dataclass
+class EmbeddingUsage:
+    """
+    Embedding requests made on behalf of one ingest.
+    
+    ``seconds`` counts only the time during which at least one request was
+    in flight, so the rates measure embedding throughput rather than time
+    spent waiting for chunks.
+    """
+    requests: int = 0
+    texts: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    _in_flight: int = field(default=0, repr=False)
+    _busy_since: float = field(default=0.0, repr=False)
+    
+    def request_started(self) -> None:
+        if self._in_flight == 0:
+            self._busy_since = time.perf_counter()
+        self._in_flight += 1
+    
+    def request_finished(self, texts: int = 0, tokens: int = 0) -> None:
+        """Record the end of a request; a failed request counts no texts or tokens."""
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self.seconds += time.perf_counter() - self._busy_since
+        if texts:
+            self.requests += 1
+            self.texts += texts
+            self.tokens += tokens
+    
+    def summary(self) -> Dict[str, Any]:
+        """Totals with batches/sec and tokens/sec."""
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "tokens": self.tokens,
+            "seconds": round(self.seconds, 3),
+            "batches_per_sec": round(self.requests / self.seconds, 2) if self.seconds else 0.0,
+            "tokens_per_sec": round(self.tokens / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
 class BaseEmbeddingModel(ABC):
     """
     Abstract base class for embedding models.
@@ -35,15 +85,19 @@ class BaseEmbeddingModel(ABC):
         pass
     
     @abstractmethod
-    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+    def generate_embeddings(self, texts: List[str], usage: Optional[EmbeddingUsage] = None) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
         
         Args:
             texts: List of texts to embed
+            usage: Optional accumulator for the requests, texts and tokens used
             
         Returns:
             numpy array of embeddings
+            
+        Raises:
+            EmbeddingError: If the texts could not be embedded
         """
         pass
     
@@ -57,6 +111,9 @@ class BaseEmbeddingModel(ABC):
             
         Returns:
             numpy array representing the embedding
+            
+        Raises:
+            EmbeddingError: If the text could not be embedded
         """
         pass
     
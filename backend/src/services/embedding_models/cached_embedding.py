@@ -0,0 +1,320 @@
+"""
+Cached Embedding Model
+
+Embedding model wrapper that keeps the vectors it has seen in a local
+SQLite file, with an optional in-memory LRU in front of it, and only sends
+texts it has not embedded before to the wrapped provider model.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from config import RAGIndexingConfig
+from config.logger import setup_logging
+from .base_embedding import BaseEmbeddingModel, EmbeddingUsage
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Keys looked up per SQL statement, below SQLite's default variable limit
+_LOOKUP_SLICE = 500
+# Once over the size limit, evict down to this fraction of it
+_EVICT_TO = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a text for cache lookups: Unicode NFC, whitespace runs collapsed, stripped."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded store of float32 embedding vectors.
+
+    Vectors are keyed by the SHA-256 of the model name, dimension and
+    normalized text, so changing either the model or the dimension never
+    serves stale vectors. Entries live in a SQLite database in WAL mode, which
+    several API workers can share; each lookup refreshes the entries it hits,
+    and once the database grows beyond its size limit the least recently used
+    entries are deleted. An optional in-memory LRU of recently used vectors
+    sits in front of the database.
+    """
+
+    def __init__(self):
+        config = RAGIndexingConfig()
+        self.path = Path(config.EMBEDDING_CACHE_PATH)
+        self.max_size = config.EMBEDDING_CACHE_SIZE_MB * 1024 * 1024
+        self.memory_items = max(0, config.EMBEDDING_CACHE_MEMORY_ITEMS)
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        # Guards the connection, which is used from worker threads
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def key(model_name: str, dimension: int, text: str) -> str:
+        """Cache key of a text embedded by a model at a dimension."""
+        return hashlib.sha256(f"{model_name}\0{dimension}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._connection = connection
+        return self._connection
+
+    def _read(self, keys: List[str]) -> Dict[str, bytes]:
+        with self._lock:
+            connection = self._connect()
+            found: Dict[str, bytes] = {}
+            now = time.time()
+            for start in range(0, len(keys), _LOOKUP_SLICE):
+                batch = keys[start:start + _LOOKUP_SLICE]
+                marks = ", ".join("?" * len(batch))
+                rows = connection.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch)
+                found.update(rows.fetchall())
+            if found:
+                hit_keys = list(found)
+                for start in range(0, len(hit_keys), _LOOKUP_SLICE):
+                    batch = hit_keys[start:start + _LOOKUP_SLICE]
+                    marks = ", ".join("?" * len(batch))
+                    connection.execute(f"UPDATE embeddings SET last_used = ? WHERE key IN ({marks})", [now, *batch])
+            return found
+
+    def _write(self, entries: Dict[str, bytes]) -> None:
+        with self._lock:
+            connection = self._connect()
+            now = time.time()
+            with connection:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, vector, now) for key, vector in entries.items()]
+                )
+            if self._size is None:
+                # Other workers write to the same file, so the size is an estimate refreshed on eviction
+                self._size = connection.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            else:
+                self._size += sum(len(vector) for vector in entries.values())
+            if self._size > self.max_size:
+                self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Delete least recently used entries until the cache is below its size limit."""
+        total, count = connection.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0), COUNT(*) FROM embeddings").fetchone()
+        if total > self.max_size and count:
+            entry_size = total / count
+            excess = int((total - self.max_size * _EVICT_TO) / entry_size) + 1
+            connection.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            logger.info(f"Evicted {excess} cached embeddings")
+            total = connection.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        self._size = total
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if not self.memory_items:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up vectors by key.
+
+        Returns:
+            The vectors found, by key
+        """
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        for key in keys:
+            vector = self._memory.get(key)
+            if vector is None:
+                missing.append(key)
+            else:
+                self._memory.move_to_end(key)
+                found[key] = vector
+        self.memory_hits += len(found)
+
+        if missing:
+            try:
+                stored = await asyncio.to_thread(self._read, missing)
+            except sqlite3.Error as e:
+                logger.error(f"Embedding cache lookup failed: {e}")
+                stored = {}
+            for key, blob in stored.items():
+                vector = np.frombuffer(blob, dtype=np.float32)
+                found[key] = vector
+                self._remember(key, vector)
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Store vectors by key."""
+        if not vectors:
+            return
+        entries = {}
+        for key, vector in vectors.items():
+            vector = np.ascontiguousarray(vector, dtype=np.float32)
+            self._remember(key, vector)
+            entries[key] = vector.tobytes()
+        try:
+            await asyncio.to_thread(self._write, entries)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store {len(entries)} embeddings in the cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since the cache was created."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "size_bytes": self._size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class CachedEmbeddingModel(BaseEmbeddingModel):
+    """
+    Embedding model that serves repeated texts from an EmbeddingCache.
+
+    Only texts missing from the cache are sent to the wrapped model, each
+    distinct text once per call. Vectors are returned as float32. Other
+    attributes, such as the batching settings of the wrapped model, are read
+    from the wrapped model.
+    """
+
+    def __init__(self, model: BaseEmbeddingModel, cache: Optional[EmbeddingCache] = None):
+        super().__init__(model.model_name)
+        self.model = model
+        self.cache = cache or EmbeddingCache()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes this wrapper does not define
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    @property
+    def embedding_dim(self) -> Optional[int]:
+        return self.model.embedding_dim
+
+    @embedding_dim.setter
+    def embedding_dim(self, value: Optional[int]) -> None:
+        # Set by BaseEmbeddingModel.__init__; the wrapped model owns the dimension
+        pass
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.model.is_initialized
+
+    @is_initialized.setter
+    def is_initialized(self, value: bool) -> None:
+        pass
+
+    async def initialize(self) -> None:
+        """Initialize the wrapped model."""
+        await self.model.initialize()
+
+    def _key(self, text: str) -> str:
+        return self.cache.key(self.model.model_name, self.model.embedding_dim, text)
+
+    async def generate_embeddings(self, texts: List[str], usage: Optional[EmbeddingUsage] = None) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts, embedding only cache misses.
+
+        Args:
+            texts: List of texts to embed
+            usage: Optional accumulator for the requests, texts and tokens used
+
+        Returns:
+            numpy array of float32 embeddings
+        """
+        if not texts:
+            return np.empty((0, self.model.embedding_dim or 0), dtype=np.float32)
+
+        keys = [self._key(text) for text in texts]
+        found = await self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Each distinct missing text is sent once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            embeddings = await self.model.generate_embeddings(list(missing.values()), usage)
+            embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(missing), -1)
+            fresh = dict(zip(missing, embeddings))
+            found.update(fresh)
+            await self.cache.put_many(fresh)
+            if len(missing) == len(texts):
+                # All texts were distinct misses, in order, so the model's matrix is the result
+                logger.info(f"Embedding cache: 0 of {len(texts)} texts served from cache")
+                return embeddings
+
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} of {len(texts)} texts served from cache")
+        result = np.empty((len(texts), len(found[keys[0]])), dtype=np.float32)
+        for row, key in enumerate(keys):
+            result[row] = found[key]
+        return result
+
+    async def generate_single_embedding(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text, using the cache.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            numpy array representing the embedding
+        """
+        key = self._key(text)
+        found = await self.cache.get_many([key])
+        if key in found:
+            return found[key]
+        vector = np.asarray(await self.model.generate_single_embedding(text), dtype=np.float32)
+        await self.cache.put_many({key: vector})
+        return vector
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Get detailed model information, including cache counters."""
+        info = self.model.get_model_info()
+        info["cache"] = self.cache.get_stats()
+        return info
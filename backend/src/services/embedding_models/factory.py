@@ -0,0 +1,77 @@
+"""
+Embedding Model Factory
+
+Creates the configured embedding model, wrapped in the process-wide
+embedding cache. The local ONNX model is loaded once per process and shared.
+"""
+
+from typing import Optional
+from config import RAGIndexingConfig
+from .base_embedding import BaseEmbeddingModel
+from .cached_embedding import CachedEmbeddingModel, EmbeddingCache
+from .onnx_embedding import OnnxEmbeddingModel
+from .openai_embedding import OpenAIEmbeddingModel
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_onnx_model: Optional[OnnxEmbeddingModel] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, creating it if needed."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
+
+def close_embedding_cache() -> None:
+    """Close the process-wide embedding cache, e.g. on shutdown."""
+    global _embedding_cache
+    if _embedding_cache is not None:
+        _embedding_cache.close()
+        _embedding_cache = None
+
+
+def get_onnx_model() -> OnnxEmbeddingModel:
+    """
+    Return the process-wide ONNX embedding model, creating it if needed.
+
+    Its session, tokenizer and inference threads are loaded on first use and
+    shared by every caller, so agents and ingestion jobs do not each load
+    (or quantize) the model.
+    """
+    global _onnx_model
+    if _onnx_model is None:
+        _onnx_model = OnnxEmbeddingModel()
+    return _onnx_model
+
+
+def close_onnx_model() -> None:
+    """Release the process-wide ONNX model, e.g. on shutdown."""
+    global _onnx_model
+    if _onnx_model is not None:
+        _onnx_model.close()
+        _onnx_model = None
+
+
+def create_embedding_model() -> BaseEmbeddingModel:
+    """
+    Create the embedding model selected by EMBEDDING_PROVIDER.
+
+    Returns:
+        The provider model wrapped in a CachedEmbeddingModel, or the provider
+        model itself if the cache is disabled (EMBEDDING_CACHE_SIZE_MB=0)
+
+    Raises:
+        ValueError: If the provider is not supported
+    """
+    config = RAGIndexingConfig()
+    if config.EMBEDDING_PROVIDER == "openai":
+        model = OpenAIEmbeddingModel()
+    elif config.EMBEDDING_PROVIDER == "onnx":
+        model = get_onnx_model()
+    else:
+        raise ValueError(f"Unsupported embedding provider: {config.EMBEDDING_PROVIDER}")
+
+    cache = get_embedding_cache()
+    return CachedEmbeddingModel(model, cache) if cache.enabled else model
@@ -0,0 +1,107 @@
+"""
+Embedding Micro-Batcher
+
+Coalesces concurrent single-text embedding calls into shared requests.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+_HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+
+class EmbeddingMicroBatcher:
+    """
+    Collects texts submitted concurrently and embeds them with one call.
+
+    The first text of a batch starts a timer of ``max_wait`` seconds; the
+    batch is sent when the timer fires or as soon as it holds ``max_batch``
+    texts, whichever comes first. Every caller receives the vector of its
+    own text, or the exception raised by the batch call.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Awaitable[np.ndarray]],
+        max_wait: float,
+        max_batch: int
+    ):
+        """
+        Args:
+            embed: Function embedding a list of texts, returning one row per text
+            max_wait: Seconds to wait for more texts after the first one
+            max_batch: Maximum number of texts per call
+        """
+        self.embed_texts = embed
+        self.max_wait = max(0.0, max_wait)
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+        self.batches = 0
+        self.texts = 0
+        self.max_batch_size = 0
+        self._histogram: Counter = Counter()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one text as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Send the pending texts as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Callers that were cancelled while waiting do not need a vector
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        size = len(batch)
+        self.batches += 1
+        self.texts += size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self._histogram[next(bucket for bucket in _HISTOGRAM_BUCKETS + (size,) if size <= bucket)] += 1
+        try:
+            embeddings = await self.embed_texts([text for text, _ in batch])
+        except Exception as e:
+            logger.error(f"Error embedding a batch of {size} queries: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Number of batches and texts, and the distribution of batch sizes reached."""
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "batch_size_histogram": {f"<={bucket}": count for bucket, count in sorted(self._histogram.items())},
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch": self.max_batch,
+        }
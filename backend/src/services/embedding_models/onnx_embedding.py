@@ -0,0 +1,329 @@
+"""
+ONNX Embedding Model
+
+Implementation of embedding model running a local sentence-embedding model
+with ONNX Runtime on the CPU.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from config import RAGIndexingConfig
+from config.logger import setup_logging
+from .base_embedding import BaseEmbeddingModel, EmbeddingError, EmbeddingUsage
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# File names tried in the model directory, quantized first when ONNX_QUANTIZE is set
+_QUANTIZED_MODELS = ("model_quantized.onnx", "onnx/model_quantized.onnx", "model_int8.onnx")
+_MODELS = ("model.onnx", "onnx/model.onnx")
+_TOKENIZERS = ("tokenizer.json", "onnx/tokenizer.json")
+
+
+def _find(directory: Path, names: Tuple[str, ...]) -> Optional[Path]:
+    for name in names:
+        path = directory / name
+        if path.is_file():
+            return path
+    return None
+
+
+def _quantize(model: Path, quantized: Path) -> None:
+    """
+    Quantize a model to int8 weights.
+
+    The model is written to a temporary file next to ``quantized`` and moved
+    into place, so a crash or a concurrent load never sees a partial file.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=quantized.parent, prefix=f".{quantized.stem}-", suffix=".onnx")
+    os.close(fd)
+    try:
+        quantize_dynamic(str(model), partial, weight_type=QuantType.QInt8)
+        os.replace(partial, quantized)
+    finally:
+        Path(partial).unlink(missing_ok=True)
+
+
+class OnnxEmbeddingModel(BaseEmbeddingModel):
+    """
+    Local embedding model running on ONNX Runtime.
+
+    Texts are tokenized together, sorted by length and grouped into batches
+    of at most ``ONNX_BATCH_TOKENS`` padded tokens, each padded only to its
+    own longest text, so little compute is spent on padding. Batches run in
+    a thread pool, since ONNX Runtime releases the GIL during inference;
+    each worker uses its share of the CPU cores.
+    """
+
+    def __init__(self):
+        config = RAGIndexingConfig()
+        self.model_dir = Path(config.ONNX_MODEL_DIR)
+        self.quantize = config.ONNX_QUANTIZE
+        # Part of the embedding cache key, so int8 and full-precision vectors are kept apart
+        super().__init__(f"onnx/{self.model_dir.name}" + ("-int8" if self.quantize else ""))
+        self.embedding_dim = config.ONNX_EMBEDDING_DIMENSION
+        self.pooling = config.ONNX_POOLING
+        self.max_sequence_length = max(1, config.ONNX_MAX_SEQUENCE_LENGTH)
+        cores = os.cpu_count() or 1
+        self.concurrency = config.ONNX_WORKERS or max(1, cores // 4)
+        self.threads_per_worker = max(1, cores // self.concurrency)
+        self.inference_batch_tokens = max(self.max_sequence_length, config.ONNX_BATCH_TOKENS)
+        # Limits of one call of generate_embeddings, as used by the ingestion pipeline;
+        # one call holds enough tokens to keep every worker busy
+        self.batch_size = max(1, config.BATCH_SIZE)
+        self.max_batch_tokens = self.inference_batch_tokens * self.concurrency
+        self.session = None
+        self.tokenizer = None
+        self._input_names: List[str] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Concurrent first calls wait for one load instead of each loading the model
+        self._init_lock = asyncio.Lock()
+        self.tokens = 0
+        self.padded_tokens = 0
+
+    def _model_path(self) -> Path:
+        """The ONNX file to run, quantizing the full-precision model on first use if needed."""
+        if self.quantize:
+            quantized = _find(self.model_dir, _QUANTIZED_MODELS)
+            if quantized is not None:
+                return quantized
+        model = _find(self.model_dir, _MODELS)
+        if model is None:
+            raise ValueError(f"No ONNX model found in {self.model_dir}")
+        if not self.quantize:
+            return model
+
+        cached = self._quantized_cache_path(model)
+        if cached.is_file():
+            return cached
+        # Next to the model if its directory is writable, otherwise in the cache
+        for quantized in (self.model_dir / "model_int8.onnx", cached):
+            logger.info(f"Quantizing {model} to int8 weights at {quantized}")
+            try:
+                _quantize(model, quantized)
+                return quantized
+            except OSError as e:
+                logger.warning(f"Could not write the quantized model to {quantized}: {e}")
+            except Exception as e:
+                logger.warning(f"Could not quantize {model}: {e}")
+                break
+
+        logger.warning(f"Running the full-precision model {model} instead of an int8 one")
+        # Full-precision vectors must not be cached under the int8 model name
+        self.quantize = False
+        self.model_name = f"onnx/{self.model_dir.name}"
+        return model
+
+    def _quantized_cache_path(self, model: Path) -> Path:
+        """Where the int8 model is kept when the model directory is read-only."""
+        stat = model.stat()
+        source = f"{model.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        return Path(tempfile.gettempdir()) / "onnx-int8" / f"{self.model_dir.name}-{digest}.onnx"
+
+    def _load(self) -> None:
+        tokenizer_path = _find(self.model_dir, _TOKENIZERS)
+        if tokenizer_path is None:
+            raise ValueError(f"No tokenizer.json found in {self.model_dir}")
+        tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        tokenizer.enable_truncation(self.max_sequence_length)
+        # Batches are padded here, each to its own longest text
+        tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = self.threads_per_worker
+        options.inter_op_num_threads = 1
+        model_path = self._model_path()
+        session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+
+        self.tokenizer = tokenizer
+        self.session = session
+        self._input_names = [model_input.name for model_input in session.get_inputs()]
+        logger.info(
+            f"Loaded ONNX embedding model {model_path} with {self.concurrency} workers "
+            f"of {self.threads_per_worker} threads"
+        )
+
+    async def initialize(self) -> None:
+        """Load the tokenizer and the ONNX session and check the embedding dimension, once."""
+        if not (ONNXRUNTIME_AVAILABLE and TOKENIZERS_AVAILABLE):
+            raise ImportError("The onnx embedding provider requires the onnxruntime and tokenizers packages")
+
+        async with self._init_lock:
+            if self.is_initialized:
+                return
+            await self._initialize()
+
+    async def _initialize(self) -> None:
+        try:
+            await asyncio.to_thread(self._load)
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="onnx-embedding")
+            dimension = (await asyncio.get_running_loop().run_in_executor(self._executor, self._infer, [[0]]))[0].shape[0]
+            if dimension != self.embedding_dim:
+                raise ValueError(
+                    f"ONNX model {self.model_dir} returns {dimension}-dimensional embeddings, "
+                    f"but ONNX_EMBEDDING_DIMENSION is {self.embedding_dim}"
+                )
+            self.is_initialized = True
+
+        except Exception as e:
+            logger.error(f"Failed to initialize ONNX model: {e}")
+            raise
+
+    def estimate_tokens(self, text: str) -> int:
+        """Estimate the number of tokens of a text without tokenizing it."""
+        return min(len(text.encode("utf-8")) // 4 + 1, self.max_sequence_length)
+
+    def pack_batches(self, lengths: List[int]) -> List[np.ndarray]:
+        """
+        Group texts by token length into batches of at most inference_batch_tokens padded tokens.
+
+        Returns:
+            Indices of the texts of each batch, shortest texts first
+        """
+        order = np.argsort(lengths, kind="stable")
+        batches = []
+        start = 0
+        for end in range(1, len(order) + 1):
+            # Sorted ascending, so the last text of a batch is its longest
+            longest = lengths[order[end - 1]]
+            if end - start > 1 and (end - start) * longest > self.inference_batch_tokens:
+                batches.append(order[start:end - 1])
+                start = end - 1
+        if start < len(order):
+            batches.append(order[start:])
+        return batches
+
+    def _infer(self, ids: List[List[int]]) -> np.ndarray:
+        """Run one padded batch and pool it into normalized float32 embeddings."""
+        longest = max(len(token_ids) for token_ids in ids)
+        input_ids = np.zeros((len(ids), longest), dtype=np.int64)
+        attention_mask = np.zeros((len(ids), longest), dtype=np.int64)
+        for row, token_ids in enumerate(ids):
+            input_ids[row, :len(token_ids)] = token_ids
+            attention_mask[row, :len(token_ids)] = 1
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+
+        hidden = self.session.run(None, feeds)[0]
+        if hidden.ndim == 2:
+            # The model pools itself
+            pooled = hidden
+        elif self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        pooled = pooled.astype(np.float32, copy=False)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.maximum(norms, 1e-12)
+
+    async def generate_embeddings(self, texts: List[str], usage: Optional[EmbeddingUsage] = None) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts.
+
+        Args:
+            texts: List of texts to embed
+            usage: Optional accumulator for the batches, texts and tokens processed
+
+        Returns:
+            float32 numpy array of shape (len(texts), embedding_dim)
+
+        Raises:
+            EmbeddingError: If the texts could not be embedded
+        """
+        if not self.is_initialized:
+            await self.initialize()
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+
+        usage = usage if usage is not None else EmbeddingUsage()
+        loop = asyncio.get_running_loop()
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+
+        async def run(indices: np.ndarray, ids: List[List[int]]) -> None:
+            usage.request_started()
+            finished = {}
+            try:
+                embeddings[indices] = await loop.run_in_executor(self._executor, self._infer, ids)
+                tokens = sum(len(token_ids) for token_ids in ids)
+                finished = {"texts": len(ids), "tokens": tokens}
+                self.tokens += tokens
+                self.padded_tokens += len(ids) * max(len(token_ids) for token_ids in ids)
+            finally:
+                usage.request_finished(**finished)
+
+        try:
+            encodings = await loop.run_in_executor(self._executor, self.tokenizer.encode_batch, texts)
+            ids = [encoding.ids for encoding in encodings]
+            batches = self.pack_batches([len(token_ids) for token_ids in ids])
+            await asyncio.gather(*(run(indices, [ids[index] for index in indices]) for indices in batches))
+            logger.info(f"Generated embeddings for {len(texts)} texts in {len(batches)} batches")
+            return embeddings
+
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise EmbeddingError(f"Failed to embed {len(texts)} texts: {e}") from e
+
+    async def generate_single_embedding(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            numpy array representing the embedding
+
+        Raises:
+            EmbeddingError: If the text could not be embedded
+        """
+        return (await self.generate_embeddings([text]))[0]
+
+    def close(self) -> None:
+        """Shut down the inference threads and release the session."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session = None
+        self.tokenizer = None
+        self.is_initialized = False
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Get detailed model information."""
+        base_info = super().get_model_info()
+        base_info.update({
+            "provider": "onnx",
+            "model_dir": str(self.model_dir),
+            "quantized": self.quantize,
+            "workers": self.concurrency,
+            "threads_per_worker": self.threads_per_worker,
+            "padding_overhead": round(self.padded_tokens / self.tokens - 1, 4) if self.tokens else 0.0,
+        })
+        return base_info
@@ -5,16 +5,83 @@ Implementation of embedding model using OpenAI's API.
 """
 from config.logger import setup_logging
 from config.openai import get_openai_client
-from typing import List, Optional, Dict, Any 
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
+import base64
+import re
 import numpy as np
+import openai
 from config import RAGIndexingConfig
 from openai import AsyncOpenAI
-from .base_embedding import BaseEmbeddingModel
+from .base_embedding import BaseEmbeddingModel, EmbeddingError, EmbeddingUsage
+from .micro_batcher import EmbeddingMicroBatcher
+from .rate_limiter import RateLimitScheduler, retry_after
 import logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Tokens are estimated from the UTF-8 length; English text averages about 4
+# bytes per token, so 3 overestimates slightly and keeps requests within budget
+_BYTES_PER_TOKEN = 3
+
+# Errors of requests that exceed the per-input or per-request token limit
+_TOO_LARGE = re.compile(r"maximum context length|tokens per request|too many tokens|too large", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text without running a tokenizer."""
+    return len(text.encode("utf-8")) // _BYTES_PER_TOKEN + 1
+
+
+# Process-wide batchers for single-text embeddings, by the settings that shape
+# their requests (see OpenAIEmbeddingModel._query_batcher_key)
+_query_batchers: Dict[Tuple[Tuple[str, Any], ...], EmbeddingMicroBatcher] = {}
+
+
+def get_query_batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Batch statistics of the single-text embedding batchers.
+
+    Keyed by the model name followed by the batcher's request settings, e.g.
+    ``text-embedding-3-small?dimension=1536&batch_size=100&...``.
+    """
+    stats = {}
+    for key, batcher in _query_batchers.items():
+        settings = dict(key)
+        model_name = settings.pop("model")
+        label = f"{model_name}?" + "&".join(f"{name}={value}" for name, value in settings.items())
+        stats[label] = batcher.get_stats()
+    return stats
+
+
+# Process-wide request schedulers, by model name; OpenAI quotas apply per model
+_rate_limiters: Dict[str, RateLimitScheduler] = {}
+
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Throttling and retry statistics of the embedding request schedulers, by model name."""
+    return {model_name: scheduler.get_stats() for model_name, scheduler in _rate_limiters.items()}
+
+
+def _is_too_large(error: openai.APIError) -> bool:
+    """Whether the API rejected a request for exceeding a token limit."""
+    if isinstance(error, openai.APIStatusError) and error.status_code == 413:
+        return True
+    return isinstance(error, openai.BadRequestError) and bool(_TOO_LARGE.search(str(error)))
+
+
+def _is_retryable(error: openai.APIError) -> bool:
+    """Whether a failed request may succeed when sent again."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if not isinstance(error, openai.APIStatusError):
+        return False
+    if error.status_code == 429:
+        # An exhausted billing quota does not recover by waiting
+        return error.code != "insufficient_quota"
+    return error.status_code in (408, 409) or error.status_code >= 500
+
 
 class OpenAIEmbeddingModel(BaseEmbeddingModel):
     """
@@ -28,10 +95,26 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
         super().__init__(config.OPENAI_EMBEDDING_MODEL)
         self.api_key = config.OPENAI_API_KEY
         self.client = None
-        self.batch_size = config.BATCH_SIZE
+        self.batch_size = max(1, config.BATCH_SIZE)
+        self.max_batch_tokens = max(1, config.EMBEDDING_BATCH_TOKENS)
+        self.max_input_tokens = max(1, config.OPENAI_MAX_TOKENS)
+        self.concurrency = max(1, config.EMBEDDING_CONCURRENCY)
+        self.max_retries = max(0, config.EMBEDDING_MAX_RETRIES)
+        self.query_max_wait = config.EMBEDDING_QUERY_MAX_WAIT_MS / 1000
+        self.query_max_batch = config.EMBEDDING_QUERY_MAX_BATCH
         self.embedding_dim = config.OPENAI_EMBEDDING_DIMENSION
         self.model_name = config.OPENAI_EMBEDDING_MODEL
-
+        self.rate_limiter = _rate_limiters.get(self.model_name)
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimitScheduler(
+                config.EMBEDDING_REQUESTS_PER_MINUTE,
+                config.EMBEDDING_TOKENS_PER_MINUTE,
+                config.EMBEDDING_BACKOFF_BASE_SECONDS,
+                config.EMBEDDING_BACKOFF_MAX_SECONDS
+            )
+            _rate_limiters[self.model_name] = self.rate_limiter
+        # Created on first use, inside the event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
     
     async def initialize(self) -> None:
@@ -48,73 +131,223 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
             logger.error(f"Failed to initialize OpenAI model: {e}")
             raise
     
-    async def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+    def estimate_tokens(self, text: str) -> int:
+        """Estimate the number of tokens a text uses in an embedding request."""
+        return min(estimate_tokens(text), self.max_input_tokens)
+    
+    def _fit_input(self, text: str) -> str:
+        """Truncate a text that is estimated to exceed the model's input limit."""
+        if estimate_tokens(text) <= self.max_input_tokens:
+            return text
+        logger.warning(f"Truncating embedding input of {len(text)} characters to {self.max_input_tokens} tokens")
+        limit = (self.max_input_tokens - 1) * _BYTES_PER_TOKEN
+        return text.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+    
+    def pack_batches(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """
+        Split texts into requests of at most batch_size texts and max_batch_tokens estimated tokens.
+        
+        Returns:
+            (start, end) of each request in ``texts``, in order
+        """
+        batches = []
+        start = 0
+        tokens = 0
+        for index, text in enumerate(texts):
+            text_tokens = self.estimate_tokens(text)
+            if index > start and (index - start == self.batch_size or tokens + text_tokens > self.max_batch_tokens):
+                batches.append((start, index))
+                start, tokens = index, 0
+            tokens += text_tokens
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+    
+    def _decode_into(self, out: np.ndarray, response_data: List[Any]) -> None:
+        """
+        Write the embeddings of a response into the rows of ``out``.
+        
+        Embeddings are requested base64-encoded, i.e. as the raw little-endian
+        float32 bytes, and decoded without building Python floats. Servers that
+        ignore the encoding and return float lists are handled as well.
+        """
+        if len(response_data) != len(out):
+            raise ValueError(f"Expected {len(out)} embeddings, received {len(response_data)}")
+        for data in response_data:
+            embedding = data.embedding
+            if isinstance(embedding, str):
+                vector = np.frombuffer(base64.b64decode(embedding), dtype="<f4")
+            else:
+                vector = np.asarray(embedding, dtype=np.float32)
+            if vector.shape != (self.embedding_dim,):
+                raise ValueError(
+                    f"Received {vector.size}-dimensional embeddings from '{self.model_name}', "
+                    f"but OPENAI_EMBEDDING_DIMENSION is {self.embedding_dim}"
+                )
+            # Embeddings are matched to inputs by index, not response order
+            out[data.index] = vector
+    
+    async def _embed_batch(self, texts: List[str], out: np.ndarray, usage: EmbeddingUsage) -> None:
+        """
+        Embed one batch into ``out``.
+        
+        Each attempt waits for the rate limiter and a free slot among the
+        concurrent requests. Rate limiting, server and connection errors are
+        retried with jittered exponential backoff; a batch rejected as too
+        large is split in half.
+        
+        Raises:
+            EmbeddingError: If the batch could not be embedded
+        """
+        inputs = [self._fit_input(text) for text in texts]
+        tokens = sum(map(self.estimate_tokens, texts))
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(tokens)
+            try:
+                async with self._semaphore:
+                    usage.request_started()
+                    finished = {}
+                    try:
+                        # Retries are scheduled here, with the quota of all requests in view
+                        raw = await self.client.with_options(max_retries=0).embeddings.with_raw_response.create(
+                            model=self.model_name,
+                            input=inputs,
+                            encoding_format="base64",
+                        )
+                        response = raw.parse()
+                        used = response.usage.total_tokens if response.usage else tokens
+                        finished = {"texts": len(texts), "tokens": used}
+                    finally:
+                        usage.request_finished(**finished)
+            except openai.APIError as e:
+                headers = e.response.headers if isinstance(e, openai.APIStatusError) else None
+                self.rate_limiter.observe(headers)
+                if _is_too_large(e) and len(texts) > 1:
+                    self.rate_limiter.splits += 1
+                    middle = len(texts) // 2
+                    logger.warning(f"Embedding request of {len(texts)} texts too large, splitting it: {e}")
+                    await asyncio.gather(
+                        self._embed_batch(texts[:middle], out[:middle], usage),
+                        self._embed_batch(texts[middle:], out[middle:], usage),
+                    )
+                    return
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    raise EmbeddingError(f"Failed to embed a batch of {len(texts)} texts: {e}") from e
+                
+                self.rate_limiter.retries += 1
+                delay = self.rate_limiter.backoff(attempt, retry_after(headers))
+                logger.warning(f"Embedding request failed ({e}), retry {attempt + 1} of {self.max_retries} in {delay:.2f}s")
+                if isinstance(e, openai.RateLimitError):
+                    # The quota is shared, so every request waits
+                    self.rate_limiter.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            
+            self.rate_limiter.observe(raw.headers)
+            self.rate_limiter.refund(tokens - used)
+            self._decode_into(out, response.data)
+            return
+    
+    async def generate_embeddings(self, texts: List[str], usage: Optional[EmbeddingUsage] = None) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
         
+        Texts are packed into requests by estimated token count and up to
+        ``concurrency`` requests are sent at once within the rate limits; the
+        embeddings are returned in the order of the texts. Each response is
+        decoded straight into its rows of one preallocated float32 matrix.
+        
         Args:
             texts: List of texts to embed
+            usage: Optional accumulator for the requests, texts and tokens used
             
         Returns:
-            numpy array of embeddings
+            float32 numpy array of shape (len(texts), embedding_dim)
+            
+        Raises:
+            EmbeddingError: If any batch could not be embedded
         """
         if not self.is_initialized:
             await self.initialize()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
         
         if not texts:
-            return np.array([])
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
         
-        embeddings = []
+        usage = usage if usage is not None else EmbeddingUsage()
+        batches = self.pack_batches(texts)
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        requests = [
+            asyncio.ensure_future(self._embed_batch(texts[start:end], embeddings[start:end], usage))
+            for start, end in batches
+        ]
         
         try:
-            # Process texts in batches
-            for i in range(0, len(texts), self.batch_size):
-                batch_texts = texts[i:i + self.batch_size]
-                
-                # OpenAI API supports batch processing
-                response = await self.client.embeddings.create(
-                    model=self.model_name,
-                    input=batch_texts,
-                )
-                
-                for data in response.data:
-                    embeddings.append(data.embedding)
-            
-            logger.info(f"Generated embeddings for {len(texts)} texts in batches of {self.batch_size}")
-            return np.array(embeddings)
+            await asyncio.gather(*requests)
+            logger.info(f"Generated embeddings for {len(texts)} texts in {len(batches)} requests")
+            return embeddings
             
+        except EmbeddingError as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            # Return zero vectors as fallback
-            fallback_embeddings = np.zeros((len(texts), self.embedding_dim))
-            return fallback_embeddings
+            raise EmbeddingError(f"Failed to embed {len(texts)} texts: {e}") from e
+        finally:
+            for request in requests:
+                request.cancel()
+            await asyncio.gather(*requests, return_exceptions=True)
+    
+    def _query_batcher_key(self) -> Tuple[Tuple[str, Any], ...]:
+        """
+        Every setting that affects the requests of the single-text batcher.
+
+        The batcher embeds through the instance that created it, so it is
+        only shared with instances that would send the same requests.
+        """
+        return (
+            ("model", self.model_name),
+            ("dimension", self.embedding_dim),
+            ("batch_size", self.batch_size),
+            ("max_batch_tokens", self.max_batch_tokens),
+            ("max_input_tokens", self.max_input_tokens),
+            ("concurrency", self.concurrency),
+            ("max_retries", self.max_retries),
+            ("max_wait", self.query_max_wait),
+            ("max_batch", self.query_max_batch),
+        )
+    
+    def _query_batcher(self) -> EmbeddingMicroBatcher:
+        """The process-wide batcher for single texts embedded with these settings."""
+        key = self._query_batcher_key()
+        batcher = _query_batchers.get(key)
+        if batcher is None:
+            batcher = EmbeddingMicroBatcher(self.generate_embeddings, self.query_max_wait, self.query_max_batch)
+            _query_batchers[key] = batcher
+        return batcher
     
     async def generate_single_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
         
+        Concurrent calls, e.g. queries of different users, are coalesced into
+        one request by a process-wide micro-batcher.
+        
         Args:
             text: Text to embed
             
         Returns:
             numpy array representing the embedding
+            
+        Raises:
+            EmbeddingError: If the text could not be embedded
         """
         if not self.is_initialized:
             await self.initialize()
         
-        try:
-            response = await self.client.embeddings.create(
-                model=self.model_name,
-                input=text,
-            )
-            
-            embedding = response.data[0].embedding
-            return np.array(embedding)
-            
-        except Exception as e:
-            logger.error(f"Error generating single embedding: {e}")
-            # Return zero vector as fallback
-            return np.zeros(self.embedding_dim)
+        return np.asarray(await self._query_batcher().embed(text))
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get detailed model information."""
@@ -122,5 +355,9 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
         base_info.update({
             "provider": "openai",
             "batch_size": self.batch_size,
+            "max_batch_tokens": self.max_batch_tokens,
+            "concurrency": self.concurrency,
+            "query_batcher": self._query_batcher().get_stats(),
+            "rate_limiter": self.rate_limiter.get_stats(),
         })
         return base_info
\ No newline at end of file
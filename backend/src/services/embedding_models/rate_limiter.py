@@ -0,0 +1,202 @@
+"""
+Embedding Rate Limiter
+
+Token-bucket scheduling of embedding requests against the provider's
+requests-per-minute and tokens-per-minute quotas.
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import Any, Dict, Mapping, Optional
+
+# Durations in rate limit reset headers, e.g. "20ms", "1s", "6m0s", "1h2m3.5s"
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate limit reset duration such as ``6m0s`` into seconds."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds the server asked to wait before retrying, if it said so."""
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    try:
+        return float(headers["retry-after"]) if headers.get("retry-after") else None
+    except ValueError:
+        return None
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name]) if headers.get(name) else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Bucket holding up to ``capacity`` units, refilled at ``capacity`` per minute.
+    """
+
+    def __init__(self, capacity: float):
+        self.capacity = max(1.0, float(capacity))
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Units refilled per second."""
+        return self.capacity / 60
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available; amounts above the capacity wait for a full bucket."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+    def observe(self, limit: Optional[int], remaining: Optional[int], now: float) -> None:
+        """
+        Align the bucket with the quota reported by the server.
+
+        The server's limit replaces the configured capacity. The level never
+        exceeds the server's remaining count, which also reflects requests of
+        other processes sharing the quota.
+        """
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+class RateLimitScheduler:
+    """
+    Admits embedding requests within requests-per-minute and tokens-per-minute quotas.
+
+    Every request first acquires one request and its estimated tokens; the
+    buckets are corrected from the ``x-ratelimit-*`` response headers, and a
+    rate-limited response pauses all requests for the time the server asks
+    for. Requests are admitted in arrival order, so large batches are not
+    starved by small ones.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0
+    ):
+        """
+        Args:
+            requests_per_minute: Requests allowed per minute until the server reports its limit
+            tokens_per_minute: Tokens allowed per minute until the server reports its limit
+            backoff_base: Delay in seconds before the first retry, doubled on every further retry
+            backoff_max: Upper bound of the retry delay in seconds
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._paused_until = 0.0
+        # Created on first use, inside the event loop
+        self._lock: Optional[asyncio.Lock] = None
+        self.admitted = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+        self.splits = 0
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one more request of ``tokens`` estimated tokens fits in the quotas."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(tokens, now),
+                )
+                if wait <= 0:
+                    break
+                self.throttled_seconds += wait
+                await asyncio.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.admitted += 1
+
+    def refund(self, tokens: int) -> None:
+        """Return tokens acquired for a request but not used by it."""
+        if tokens > 0:
+            self.tokens.give_back(tokens)
+
+    def observe(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Update the buckets from the rate limit headers of a response."""
+        if not headers:
+            return
+        now = time.monotonic()
+        self.requests.observe(
+            _header_int(headers, "x-ratelimit-limit-requests"),
+            _header_int(headers, "x-ratelimit-remaining-requests"),
+            now
+        )
+        self.tokens.observe(
+            _header_int(headers, "x-ratelimit-limit-tokens"),
+            _header_int(headers, "x-ratelimit-remaining-tokens"),
+            now
+        )
+
+    def backoff(self, attempt: int, minimum: Optional[float] = None) -> float:
+        """
+        Delay before retry number ``attempt`` (0-based): full jitter over an
+        exponentially growing window, but at least what the server asked for.
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, minimum or 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for ``seconds``, e.g. after a rate-limited response."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Requests admitted, time spent throttled, retries and the current quotas."""
+        return {
+            "requests": self.admitted,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "splits": self.splits,
+            "requests_per_minute": int(self.requests.capacity),
+            "tokens_per_minute": int(self.tokens.capacity),
+        }
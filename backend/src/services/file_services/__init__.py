@@ -4,6 +4,6 @@ File Services Module
 This module contains document processing functionality.
 """
 
-from .document_processor import DocumentProcessor
+from .document_processor import DocumentProcessor, SpooledUpload, shutdown_extraction_executor
 
-__all__ = ["DocumentProcessor"] 
\ No newline at end of file
+__all__ = ["DocumentProcessor", "SpooledUpload", "shutdown_extraction_executor"] 
\ No newline at end of file
@@ -1,12 +1,29 @@
 # app/services/file_service.py
 import os
+import asyncio
 import logging
 import io
+import hashlib
+import multiprocessing
+import tempfile
+import zipfile
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from fastapi import UploadFile, HTTPException
-from typing import Tuple
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, List, Optional, Tuple, Union
+from config import RAGIndexingConfig
 from config.logger import setup_logging
+from .docx_reader import iter_docx_blocks
+from .memory_usage import track_memory
+from .text_cache import ExtractedTextCache
 
 # Text extraction imports
+import docx
 import PyPDF2
 import pdfplumber
 from docx import Document
@@ -16,10 +33,214 @@ from docx import Document
 setup_logging() 
 logger = logging.getLogger(__name__)
 
+# Process pool shared by all DocumentProcessor instances, created on first use
+_extraction_executor: Optional[ProcessPoolExecutor] = None
+
+# A document given as its content or as the path of a file holding it
+DocumentSource = Union[bytes, str, Path]
+
+# Size of the reads used to spool uploads to disk
+_UPLOAD_READ_SIZE = 1024 * 1024
+
+# Revision of the extraction code. Bump it when a change alters the extracted
+# text, so cached text from the previous code is not reused.
+_EXTRACTION_REVISION = 2
+
+# Name and version of the extractor of each file type, part of the text cache key
+_TEXT_EXTRACTORS = {
+    "pdf": ("pdfplumber", f"{pdfplumber.__version__}-pypdf2-{PyPDF2.__version__}-r{_EXTRACTION_REVISION}"),
+    "docx": ("docx-reader", f"python-docx-{docx.__version__}-r{_EXTRACTION_REVISION}"),
+}
+
+
+def create_extraction_executor(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Create a text extraction pool.
+    
+    Workers are spawned rather than forked so they do not inherit the
+    event loop, LanceDB runtime or open connections of the API process.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def get_extraction_executor() -> ProcessPoolExecutor:
+    """Return the process-wide text extraction pool, creating it if needed."""
+    global _extraction_executor
+    if _extraction_executor is None:
+        config = RAGIndexingConfig()
+        max_workers = config.EXTRACTION_WORKERS or os.cpu_count() or 1
+        _extraction_executor = create_extraction_executor(max_workers)
+        logger.info(f"Text extraction process pool started with {max_workers} workers")
+    return _extraction_executor
+
+
+def shutdown_extraction_executor() -> None:
+    """Shut down the text extraction pool, if it was started."""
+    global _extraction_executor
+    if _extraction_executor is not None:
+        _extraction_executor.shutdown(wait=True, cancel_futures=True)
+        _extraction_executor = None
+        logger.info("Text extraction process pool shut down")
+
+
+async def run_in_extraction_pool(func, *args):
+    """
+    Run ``func(*args)`` in the extraction pool without blocking the event loop.
+    
+    If a worker dies (e.g. killed by the OOM killer on a hostile PDF) the pool
+    is discarded so the next call starts a fresh one.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_extraction_executor(), func, *args)
+    except BrokenProcessPool:
+        logger.error("Text extraction process pool is broken, restarting it on next use")
+        shutdown_extraction_executor()
+        raise
+
+
+@dataclass
+class SpooledUpload:
+    """An upload streamed to a temporary file, with the SHA-256 of its content."""
+    path: Path
+    size: int
+    content_hash: str
+
+
+def _spool_stream(stream: BinaryIO, spool_dir: Optional[str], suffix: str, max_size: int) -> Optional[SpooledUpload]:
+    """
+    Copy a readable stream to a temporary file, hashing it on the way.
+    
+    Returns:
+        The spooled file, or None if the stream is larger than max_size
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=suffix, dir=spool_dir, delete=False)
+    spool_path = Path(spool.name)
+    try:
+        size = 0
+        content_hash = hashlib.sha256()
+        with spool:
+            while True:
+                data = stream.read(_UPLOAD_READ_SIZE)
+                if not data:
+                    break
+                size += len(data)
+                if size > max_size:
+                    spool_path.unlink(missing_ok=True)
+                    return None
+                content_hash.update(data)
+                spool.write(data)
+        return SpooledUpload(path=spool_path, size=size, content_hash=content_hash.hexdigest())
+    except BaseException:
+        spool_path.unlink(missing_ok=True)
+        raise
+
+
+async def _spool_in_thread(copy: Callable[[], Optional[SpooledUpload]]) -> Optional[SpooledUpload]:
+    """
+    Run a blocking spool copy in a worker thread.
+    
+    The thread cannot be interrupted, so if the caller is cancelled the copy
+    finishes in the background and its file is deleted.
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(copy))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        task.add_done_callback(_discard_spooled)
+        raise
+
+
+def _discard_spooled(task: asyncio.Future) -> None:
+    if not task.cancelled() and task.exception() is None and task.result() is not None:
+        task.result().path.unlink(missing_ok=True)
+
+
+def _open_source(source: DocumentSource) -> Union[io.BytesIO, str]:
+    """Turn a document source into something the parsers can open."""
+    return io.BytesIO(source) if isinstance(source, bytes) else str(source)
+
+
+def _count_pdf_pages(source: DocumentSource) -> int:
+    """Count the pages of a PDF. Runs inside the extraction pool."""
+    with pdfplumber.open(_open_source(source)) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pdf_page_range(source: DocumentSource, start: int, end: int, engine: str) -> List[str]:
+    """
+    Extract the text of pages [start, end) of a PDF. Runs inside the extraction pool.
+    
+    Parsers read files given by path directly, so the page cache is shared by
+    all workers extracting ranges of the same upload.
+    
+    Args:
+        source (DocumentSource): PDF file content or file path
+        start (int): First page index (inclusive)
+        end (int): Last page index (exclusive)
+        engine (str): "pdfplumber" or "pypdf2"
+        
+    Returns:
+        List[str]: One entry per page, empty string for pages without text
+    """
+    page_texts = []
+    if engine == "pdfplumber":
+        with pdfplumber.open(_open_source(source), pages=list(range(start + 1, end + 1))) as pdf:
+            for page in pdf.pages:
+                page_texts.append(page.extract_text() or "")
+    else:
+        pdf_reader = PyPDF2.PdfReader(_open_source(source))
+        for page_number in range(start, end):
+            page_texts.append(pdf_reader.pages[page_number].extract_text() or "")
+    return page_texts
+
+
+def _extract_docx_text_python_docx(source: DocumentSource) -> str:
+    """Extract text from DOCX file content or path with the python-docx object model."""
+    doc = Document(_open_source(source))
+    text_content = []
+    
+    # Extract text from paragraphs
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            text_content.append(paragraph.text.strip())
+    
+    # Extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = []
+            for cell in row.cells:
+                if cell.text.strip():
+                    row_text.append(cell.text.strip())
+            if row_text:
+                text_content.append(" | ".join(row_text))
+    
+    return "\n\n".join(text_content)
+
+
+def _extract_docx_text(source: DocumentSource) -> str:
+    """
+    Extract text from DOCX file content or path. Runs inside the extraction pool.
+    
+    The streaming reader is tried first; python-docx is the fallback for
+    documents it cannot read.
+    """
+    try:
+        return "\n\n".join(iter_docx_blocks(_open_source(source)))
+    except Exception as e:
+        logger.warning(f"Streaming DOCX extraction failed, falling back to python-docx: {e}")
+        return _extract_docx_text_python_docx(source)
+
 
 class DocumentProcessor:
     def __init__(self):
-        pass
+        config = RAGIndexingConfig()
+        self.pages_per_task = max(1, config.PDF_PAGES_PER_TASK)
+        # Keep every extraction worker busy, plus one queued range each
+        self.max_pending_tasks = 2 * (config.EXTRACTION_WORKERS or os.cpu_count() or 1)
+        self.max_upload_size = config.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        self.spool_dir = config.UPLOAD_SPOOL_DIR
+        self.text_cache = ExtractedTextCache()
             
     
     async def get_file_type(self, filename: str) -> str:
@@ -40,44 +261,80 @@ class DocumentProcessor:
                 detail="Unsupported file type. Supported types: pdf, docx"
             )
     
-    async def extract_text_from_pdf(self, file_content: bytes) -> str:
+    async def _iter_pdf_page_range_texts(self, source: DocumentSource, page_count: int, engine: str) -> AsyncIterator[str]:
         """
-        Extract text from PDF file content.
+        Yield the text of every page of a PDF, in page order.
+        
+        Documents longer than ``pages_per_task`` are split into page ranges that
+        are extracted in parallel in the extraction pool. At most
+        ``max_pending_tasks`` ranges are in flight, so pages are produced while
+        the consumer works on earlier ones.
         
         Args:
-            file_content (bytes): PDF file content
+            source (DocumentSource): PDF file content or file path
+            page_count (int): Number of pages in the PDF
+            engine (str): "pdfplumber" or "pypdf2"
             
-        Returns:
-            str: Extracted text content
+        Yields:
+            str: Text of each page, empty string for pages without text
+        """
+        ranges = iter([
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ])
+        pending = deque()
+        
+        def submit_next() -> None:
+            for start, end in islice(ranges, 1):
+                pending.append(asyncio.ensure_future(
+                    run_in_extraction_pool(_extract_pdf_page_range, source, start, end, engine)
+                ))
+        
+        try:
+            for _ in range(self.max_pending_tasks):
+                submit_next()
+            while pending:
+                page_texts = await pending.popleft()
+                submit_next()
+                for page_text in page_texts:
+                    yield page_text
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    async def iter_pdf_pages(self, source: DocumentSource) -> AsyncIterator[str]:
+        """
+        Yield the non-empty page texts of a PDF as they are extracted.
+        
+        Args:
+            source (DocumentSource): PDF file content or file path
+            
+        Yields:
+            str: Text of each page that has any
         """
         logger.info("Extracting text from PDF file")
         try:
+            page_count = await run_in_extraction_pool(_count_pdf_pages, source)
+            
             # Try with pdfplumber first (better for complex layouts)
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                text_content = []
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content.append(page_text)
-                
-                if text_content:
-                    extracted_text = "\n\n".join(text_content)
-                    logger.info(f"Successfully extracted {len(extracted_text)} characters using pdfplumber")
-                    return extracted_text
+            pages_with_text = 0
+            async for page_text in self._iter_pdf_page_range_texts(source, page_count, "pdfplumber"):
+                if page_text:
+                    pages_with_text += 1
+                    yield page_text
+            
+            if pages_with_text:
+                logger.info(f"Successfully extracted {pages_with_text} of {page_count} pages using pdfplumber")
+                return
             
             # Fallback to PyPDF2 if pdfplumber fails
             logger.info("Falling back to PyPDF2 for PDF extraction")
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            text_content = []
-            
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
+            async for page_text in self._iter_pdf_page_range_texts(source, page_count, "pypdf2"):
                 if page_text:
-                    text_content.append(page_text)
+                    pages_with_text += 1
+                    yield page_text
             
-            extracted_text = "\n\n".join(text_content)
-            logger.info(f"Successfully extracted {len(extracted_text)} characters using PyPDF2")
-            return extracted_text
+            logger.info(f"Successfully extracted {pages_with_text} of {page_count} pages using PyPDF2")
             
         except Exception as e:
             logger.error(f"Failed to extract text from PDF: {str(e)}", exc_info=True)
@@ -86,37 +343,33 @@ class DocumentProcessor:
                 detail=f"Failed to extract text from PDF: {str(e)}"
             )
     
-    async def extract_text_from_docx(self, file_content: bytes) -> str:
+    async def extract_text_from_pdf(self, source: DocumentSource) -> str:
+        """
+        Extract text from PDF file content.
+        
+        Args:
+            source (DocumentSource): PDF file content or file path
+            
+        Returns:
+            str: Extracted text content
+        """
+        extracted_text = "\n\n".join([page_text async for page_text in self.iter_pdf_pages(source)])
+        logger.info(f"Extracted {len(extracted_text)} characters from PDF")
+        return extracted_text
+    
+    async def extract_text_from_docx(self, source: DocumentSource) -> str:
         """
         Extract text from DOCX file content.
         
         Args:
-            file_content (bytes): DOCX file content
+            source (DocumentSource): DOCX file content or file path
             
         Returns:
             str: Extracted text content
         """
         logger.info("Extracting text from DOCX file")
         try:
-            doc = Document(io.BytesIO(file_content))
-            text_content = []
-            
-            # Extract text from paragraphs
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text.strip())
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
-                    if row_text:
-                        text_content.append(" | ".join(row_text))
-            
-            extracted_text = "\n\n".join(text_content)
+            extracted_text = await run_in_extraction_pool(_extract_docx_text, source)
             logger.info(f"Successfully extracted {len(extracted_text)} characters from DOCX")
             return extracted_text
             
@@ -127,12 +380,91 @@ class DocumentProcessor:
                 detail=f"Failed to extract text from DOCX: {str(e)}"
             )
     
-    async def extract_text_content(self, file_content: bytes, file_type: str) -> str:
+    async def _extract_pages(self, source: DocumentSource, file_type: str) -> AsyncIterator[str]:
+        """Parse a document and yield the text of each non-empty page."""
+        if file_type == "pdf":
+            async for page_text in self.iter_pdf_pages(source):
+                yield page_text
+        elif file_type == "docx":
+            extracted_text = await self.extract_text_from_docx(source)
+            if extracted_text:
+                yield extracted_text
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type for text extraction: {file_type}"
+            )
+    
+    async def read_cached_pages(self, content_hash: str, file_type: str) -> Optional[AsyncIterator[str]]:
+        """
+        Open the cached page texts of a document parsed before, without the document itself.
+        
+        Args:
+            content_hash (str): SHA-256 of the file content
+            file_type (str): Type of file (pdf, docx)
+            
+        Returns:
+            Optional[AsyncIterator[str]]: The text of each non-empty page, or
+            None if the current extractor version has not cached the document
+        """
+        if not self.text_cache.enabled or file_type not in _TEXT_EXTRACTORS:
+            return None
+        extractor, version = _TEXT_EXTRACTORS[file_type]
+        return await self.text_cache.read_pages(content_hash, extractor, version)
+    
+    async def iter_pages(
+        self,
+        source: DocumentSource,
+        file_type: str,
+        content_hash: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the text of a document page by page as it is extracted.
+        
+        Joining the yielded pages with "\\n\\n" gives the same text as
+        ``extract_text_content``. DOCX files are yielded as a single page.
+        
+        When the content hash is given, pages come from the extracted text
+        cache if the document was parsed before by the same extractor
+        version, and freshly extracted pages are added to the cache.
+        
+        Args:
+            source (DocumentSource): File content or file path
+            file_type (str): Type of file (pdf, docx)
+            content_hash (Optional[str]): SHA-256 of the file content
+            
+        Yields:
+            str: Text of each non-empty page
+        """
+        if not content_hash or not self.text_cache.enabled or file_type not in _TEXT_EXTRACTORS:
+            async for page_text in self._extract_pages(source, file_type):
+                yield page_text
+            return
+        
+        extractor, version = _TEXT_EXTRACTORS[file_type]
+        cached_pages = await self.read_cached_pages(content_hash, file_type)
+        if cached_pages is not None:
+            logger.info(f"Using cached {extractor} text for content {content_hash[:12]}, skipping extraction")
+            async for page_text in cached_pages:
+                yield page_text
+            return
+        
+        writer = await self.text_cache.open_writer(content_hash, extractor, version)
+        try:
+            async for page_text in self._extract_pages(source, file_type):
+                await writer.write(page_text)
+                yield page_text
+        except BaseException:
+            writer.discard()
+            raise
+        await writer.commit()
+    
+    async def extract_text_content(self, source: DocumentSource, file_type: str) -> str:
         """
         Extract text content from file based on file type.
         
         Args:
-            file_content (bytes): File content as bytes
+            source (DocumentSource): File content or file path
             file_type (str): Type of file (pdf, docx, pptx, txt)
             
         Returns:
@@ -141,15 +473,121 @@ class DocumentProcessor:
         logger.info(f"Extracting text content for file type: {file_type}")
         
         if file_type == "pdf":
-            return await self.extract_text_from_pdf(file_content)
+            return await self.extract_text_from_pdf(source)
         elif file_type == "docx":
-            return await self.extract_text_from_docx(file_content)
+            return await self.extract_text_from_docx(source)
         else:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file type for text extraction: {file_type}"
             )
     
+    async def spool_to_file(self, file: UploadFile, max_size: Optional[int] = None) -> SpooledUpload:
+        """
+        Stream an upload to a temporary file on disk, hashing it on the way.
+        
+        The upload is copied in fixed-size reads, so it is never held in memory
+        as a whole, and the parsers read it from disk through the page cache.
+        The caller owns the returned file and must delete it.
+        
+        Args:
+            file (UploadFile): The uploaded file
+            max_size: Size limit in bytes (defaults to max_upload_size)
+            
+        Returns:
+            SpooledUpload: Path, size and SHA-256 content hash of the spooled file
+            
+        Raises:
+            HTTPException: 413 if the upload is larger than the size limit
+        """
+        max_size = max_size or self.max_upload_size
+        # UploadFile.read reads the underlying file in a worker thread too
+        suffix = Path(file.filename or "").suffix
+        spooled = await _spool_in_thread(lambda: _spool_stream(file.file, self.spool_dir, suffix, max_size))
+        if spooled is None:
+            logger.warning(f"Upload {file.filename} exceeds the {max_size} byte limit")
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum upload size is {max_size // (1024 * 1024)} MB"
+            )
+        logger.debug(f"Spooled {file.filename} to {spooled.path}, size: {spooled.size} bytes")
+        
+        # Reset file position for potential future reads
+        await file.seek(0)
+        return spooled
+    
+    @asynccontextmanager
+    async def spool_upload(self, file: UploadFile, max_size: Optional[int] = None) -> AsyncIterator[SpooledUpload]:
+        """
+        Spool an upload to disk for the duration of the block (see spool_to_file).
+        
+        Args:
+            file (UploadFile): The uploaded file
+            max_size: Size limit in bytes (defaults to max_upload_size)
+            
+        Yields:
+            SpooledUpload: Path, size and SHA-256 content hash of the spooled file
+        """
+        spooled = await self.spool_to_file(file, max_size)
+        try:
+            yield spooled
+        finally:
+            spooled.path.unlink(missing_ok=True)
+    
+    async def unpack_zip(self, archive: Path) -> AsyncIterator[Tuple[str, Optional[SpooledUpload]]]:
+        """
+        Unpack a ZIP archive one member at a time.
+        
+        Each member is decompressed straight to its own spool file in
+        fixed-size reads, so neither the archive nor a member is held in
+        memory. Directories and hidden or macOS metadata files are skipped.
+        The caller owns the yielded files and must delete them.
+        
+        Args:
+            archive: Path of the spooled ZIP archive
+            
+        Yields:
+            Tuple[str, Optional[SpooledUpload]]: (member name, spooled member),
+            where the spooled member is None if the file type is unsupported
+            or the member is larger than max_upload_size
+            
+        Raises:
+            HTTPException: 400 if the archive is not a valid ZIP file
+        """
+        try:
+            zip_file = await asyncio.to_thread(zipfile.ZipFile, archive)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Invalid ZIP archive")
+        
+        with zip_file:
+            for info in zip_file.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or Path(name).name.startswith("."):
+                    continue
+                try:
+                    await self.get_file_type(name)
+                except HTTPException:
+                    yield name, None
+                    continue
+                if info.file_size > self.max_upload_size:
+                    logger.warning(f"Archive member {name} exceeds the {self.max_upload_size} byte limit")
+                    yield name, None
+                    continue
+                
+                def spool_member() -> Optional[SpooledUpload]:
+                    # The declared size can lie, so the limit is enforced on the decompressed bytes too
+                    with zip_file.open(info) as member:
+                        return _spool_stream(member, self.spool_dir, Path(name).suffix, self.max_upload_size)
+                
+                try:
+                    spooled = await _spool_in_thread(spool_member)
+                except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError) as e:
+                    # Corrupt, encrypted or unsupported compression
+                    logger.warning(f"Could not unpack archive member {name}: {e}")
+                    spooled = None
+                logger.debug(f"Unpacked {name} from {archive}")
+                yield name, spooled
+    
     async def extract_text_from_upload(self, file: UploadFile) -> Tuple[str, str]:
         """
         Extract text content from uploaded file.
@@ -163,14 +601,9 @@ class DocumentProcessor:
         logger.info(f"Extracting text from uploaded file: {file.filename}")
         file_type = await self.get_file_type(file.filename)
         
-        # Read file content
-        file_content = await file.read()
-        logger.debug(f"Read file content, size: {len(file_content)} bytes")
-        
-        # Extract text content
-        extracted_text = await self.extract_text_content(file_content, file_type)
-        
-        # Reset file position for potential future reads
-        await file.seek(0)
+        async with track_memory(file.filename) as memory:
+            async with self.spool_upload(file) as spooled:
+                memory["spooled"] = spooled.size
+                extracted_text = await self.extract_text_content(spooled.path, file_type)
         
-        return extracted_text, file_type
\ No newline at end of file
+        return extracted_text, file_type
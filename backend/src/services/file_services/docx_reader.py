@@ -0,0 +1,183 @@
+"""
+DOCX Reader
+
+Text extraction from DOCX files. ``word/document.xml`` is read straight
+from the ZIP container with an incremental XML parser, and every top-level
+paragraph and table row is discarded as soon as it has been parsed, so the
+XML tree does not grow with the document.
+
+The text matches what python-docx reports for the same elements:
+``Paragraph.text`` for paragraphs and ``_Row.cells`` / ``_Cell.text`` for
+table rows, including repeated text for merged cells. The output is NOT in
+document order: like the python-docx extraction, all paragraphs come first
+and all table rows after them. Paragraphs stream out as they are parsed,
+but the row texts are buffered in memory until the end of the document.
+"""
+
+import posixpath
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+from xml.etree import ElementTree
+
+from lxml import etree
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = _W + "body"
+_P = _W + "p"
+_R = _W + "r"
+_HYPERLINK = _W + "hyperlink"
+_TBL = _W + "tbl"
+_TR = _W + "tr"
+_TC = _W + "tc"
+_VAL = _W + "val"
+_TYPE = _W + "type"
+
+_RELATIONSHIPS = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_DEFAULT_DOCUMENT_PART = "word/document.xml"
+
+# Text equivalents of run content other than w:t, as in python-docx
+_RUN_CONTENT = {
+    _W + "tab": "\t",
+    _W + "ptab": "\t",
+    _W + "cr": "\n",
+    _W + "noBreakHyphen": "-",
+}
+
+
+def _document_part_name(archive: zipfile.ZipFile) -> str:
+    """Name of the main document part, as given by the package relationships."""
+    try:
+        with archive.open("_rels/.rels") as rels:
+            for relationship in ElementTree.parse(rels).getroot().iter(_RELATIONSHIPS):
+                if relationship.get("Type") == _OFFICE_DOCUMENT:
+                    return posixpath.normpath(relationship.get("Target", "").lstrip("/"))
+    except KeyError:
+        pass
+    return _DEFAULT_DOCUMENT_PART
+
+
+def _run_text(run: etree._Element) -> str:
+    parts = []
+    for child in run:
+        if child.tag == _W + "t":
+            parts.append(child.text or "")
+        elif child.tag == _W + "br":
+            # Only line breaks produce text; page and column breaks do not
+            parts.append("\n" if child.get(_TYPE, "textWrapping") == "textWrapping" else "")
+        else:
+            parts.append(_RUN_CONTENT.get(child.tag, ""))
+    return "".join(parts)
+
+
+def _paragraph_text(paragraph: etree._Element) -> str:
+    parts = []
+    for child in paragraph:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(_run_text(run) for run in child.iterchildren(_R))
+    return "".join(parts)
+
+
+def _property(element: etree._Element, properties: str, name: str):
+    """The w:val of ``element/properties/name``: None if absent, "" if it has no value."""
+    props = element.find(properties)
+    if props is None:
+        return None
+    prop = props.find(name)
+    if prop is None:
+        return None
+    return prop.get(_VAL, "")
+
+
+def _row_cells(row: etree._Element, cells_above: Dict[int, Tuple[str, int]]) -> Tuple[List[str], Dict[int, Tuple[str, int]]]:
+    """
+    Text of each layout-grid cell of a table row.
+
+    A cell spanning several grid columns is repeated once per column, and a
+    vertically merged continuation cell repeats the cell it continues.
+
+    Args:
+        row: The w:tr element
+        cells_above: (text, grid span) of the cell starting at each grid offset
+            in the previous row
+
+    Returns:
+        The cell texts, and the cells of this row by grid offset
+    """
+    grid_before = _property(row, _W + "trPr", _W + "gridBefore")
+    offset = int(grid_before) if grid_before else 0
+    texts: List[str] = []
+    cells: Dict[int, Tuple[str, int]] = {}
+    for tc in row.iterchildren(_TC):
+        grid_span = _property(tc, _W + "tcPr", _W + "gridSpan")
+        grid_span = int(grid_span) if grid_span else 1
+        v_merge = _property(tc, _W + "tcPr", _W + "vMerge")
+        if v_merge == "" or v_merge == "continue":
+            if offset not in cells_above:
+                raise ValueError(f"Merged cell at grid offset {offset} has no cell above it")
+            cell = cells_above[offset]
+        else:
+            cell = ("\n".join(_paragraph_text(p) for p in tc.iterchildren(_P)), grid_span)
+        texts.extend([cell[0]] * cell[1])
+        cells[offset] = cell
+        offset += grid_span
+    return texts, cells
+
+
+def _discard(element: etree._Element) -> None:
+    """Free a parsed element and the siblings before it."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def iter_docx_blocks(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Yield the text of every top-level paragraph, then of every table row.
+
+    The output is not in document order: a table's rows come after the last
+    paragraph of the document, not where the table stands. Paragraphs are
+    yielded as they are parsed, while the row texts are buffered (as strings,
+    not XML) and yielded once the whole document has been read. This keeps
+    the order of ``Document.paragraphs`` followed by ``Document.tables``,
+    which earlier extractions, and the chunks indexed from them, used.
+
+    Paragraph text is stripped and empty paragraphs are skipped. A table row
+    is the stripped text of its non-empty cells joined with " | ", and rows
+    without text are skipped. Only paragraphs and tables that are direct
+    children of the document body are read.
+
+    Args:
+        source: Path of the DOCX file or a binary file object holding it
+
+    Raises:
+        KeyError: If the file has no main document part
+        ValueError: If a vertically merged table cell has no cell above it
+        lxml.etree.XMLSyntaxError: If the document XML is malformed
+    """
+    with zipfile.ZipFile(source) as archive, archive.open(_document_part_name(archive)) as document:
+        cells_above: Dict[int, Tuple[str, int]] = {}
+        row_texts: List[str] = []
+        for _, element in etree.iterparse(document, events=("end",), tag=(_P, _TR, _TBL), resolve_entities=False):
+            parent = element.getparent()
+            if parent is None:
+                continue
+            if element.tag == _P and parent.tag == _BODY:
+                text = _paragraph_text(element).strip()
+                if text:
+                    yield text
+                _discard(element)
+            elif element.tag == _TR and parent.getparent() is not None and parent.getparent().tag == _BODY:
+                texts, cells_above = _row_cells(element, cells_above)
+                row_text = " | ".join(text.strip() for text in texts if text.strip())
+                if row_text:
+                    row_texts.append(row_text)
+                _discard(element)
+            elif element.tag == _TBL and parent.tag == _BODY:
+                cells_above = {}
+                _discard(element)
+        yield from row_texts
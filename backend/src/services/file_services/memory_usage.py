@@ -0,0 +1,77 @@
+"""
+Memory Usage
+
+Helpers for per-upload memory accounting, used to size API pods.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from config.logger import setup_logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # ru_maxrss is the closest portable figure: kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    return 0
+
+
+@asynccontextmanager
+async def track_memory(label: str, sample_interval: float = 0.1) -> AsyncIterator[Dict[str, int]]:
+    """
+    Log the memory used by the process while the block runs.
+
+    RSS is sampled every ``sample_interval`` seconds to find the peak. Callers
+    can add their own byte counts (e.g. the spooled upload size) to the yielded
+    dict and they are included in the log line.
+
+    Args:
+        label: Name of the operation, e.g. the uploaded file name
+        sample_interval: Seconds between RSS samples
+    """
+    stats = {"rss_start": current_rss_bytes()}
+    stats["rss_peak"] = stats["rss_start"]
+
+    async def sample() -> None:
+        while True:
+            stats["rss_peak"] = max(stats["rss_peak"], current_rss_bytes())
+            await asyncio.sleep(sample_interval)
+
+    sampler = asyncio.ensure_future(sample())
+    try:
+        yield stats
+    finally:
+        sampler.cancel()
+        stats["rss_end"] = current_rss_bytes()
+        stats["rss_peak"] = max(stats["rss_peak"], stats["rss_end"])
+        extra = ", ".join(
+            f"{key}: {value / _MB:.1f} MB" for key, value in stats.items()
+            if key not in ("rss_start", "rss_peak", "rss_end")
+        )
+        logger.info(
+            f"Memory for {label}: RSS start {stats['rss_start'] / _MB:.1f} MB, "
+            f"peak {stats['rss_peak'] / _MB:.1f} MB (+{(stats['rss_peak'] - stats['rss_start']) / _MB:.1f} MB), "
+            f"end {stats['rss_end'] / _MB:.1f} MB" + (f", {extra}" if extra else "")
+        )
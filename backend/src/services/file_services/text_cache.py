@@ -0,0 +1,199 @@
+"""
+Extracted Text Cache
+
+Compressed on-disk cache of the page texts extracted from documents, so
+re-ingesting a document (e.g. after a chunk size or embedding model change)
+does not parse it again.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+from config import RAGIndexingConfig
+from config.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".jsonl.gz"
+# Bytes of page text buffered before a write to disk
+_WRITE_BUFFER_SIZE = 256 * 1024
+# Approximate bytes of page text read from disk at a time
+_READ_SIZE = 1024 * 1024
+# Unfinished entries older than this (seconds) are left over from a crash
+_STALE_TEMP_AGE = 3600
+
+
+class TextCacheWriter:
+    """
+    Writes one cache entry page by page.
+
+    The entry only becomes visible on ``commit``; ``discard`` drops it.
+    """
+
+    def __init__(self, cache: "ExtractedTextCache", path: Path):
+        self.cache = cache
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        self.temp_path = Path(temp_name)
+        self._file = gzip.GzipFile(fileobj=os.fdopen(fd, "wb"), mode="wb")
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def _write_buffer(self) -> None:
+        self._file.write("".join(self._buffer).encode("utf-8"))
+        self._buffer, self._buffered = [], 0
+
+    async def write(self, page: str) -> None:
+        """Append the text of the next page."""
+        line = json.dumps(page) + "\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= _WRITE_BUFFER_SIZE:
+            await asyncio.to_thread(self._write_buffer)
+
+    async def commit(self) -> None:
+        """Finish the entry and make it visible to readers."""
+        def finish() -> None:
+            self._write_buffer()
+            fileobj = self._file.fileobj
+            self._file.close()
+            fileobj.close()
+            os.replace(self.temp_path, self.path)
+
+        try:
+            await asyncio.to_thread(finish)
+        except Exception as e:
+            logger.warning(f"Failed to write extracted text cache entry {self.path.name}: {e}")
+            self.discard()
+            return
+        await self.cache.evict()
+
+    def discard(self) -> None:
+        """Drop the entry, e.g. because extraction failed or was abandoned."""
+        try:
+            fileobj = self._file.fileobj
+            self._file.close()
+            if fileobj is not None:
+                fileobj.close()
+        except Exception:
+            pass
+        self.temp_path.unlink(missing_ok=True)
+
+
+class ExtractedTextCache:
+    """
+    Size-bounded cache of extracted page texts.
+
+    Entries are gzip-compressed JSON lines, one page per line, stored at
+    ``<root>/<hash[:2]>/<hash>.<extractor>.<version>.jsonl.gz``. The key
+    includes the extractor name and version, so upgrading a parser or
+    changing how text is extracted never serves stale text. Reading an entry
+    refreshes its modification time, and once the cache grows beyond its
+    size limit the least recently used entries are deleted.
+
+    Entries are written to a temporary file and renamed into place, so
+    several API workers can share the cache directory.
+    """
+
+    def __init__(self):
+        config = RAGIndexingConfig()
+        self.root = Path(config.EXTRACTED_TEXT_CACHE_DIR)
+        self.max_size = config.EXTRACTED_TEXT_CACHE_SIZE_MB * 1024 * 1024
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _path(self, content_hash: str, extractor: str, version: str) -> Path:
+        key = re.sub(r"[^A-Za-z0-9_-]", "_", f"{extractor}.{version}")
+        return self.root / content_hash[:2] / f"{content_hash}.{key}{_SUFFIX}"
+
+    async def read_pages(self, content_hash: str, extractor: str, version: str) -> Optional[AsyncIterator[str]]:
+        """
+        Open a cache entry.
+
+        Returns:
+            An async iterator over the cached page texts, or None on a miss
+        """
+        path = self._path(content_hash, extractor, version)
+
+        def open_entry():
+            handle = gzip.open(path, "rt", encoding="utf-8")
+            try:
+                # Reading the first block catches most damaged entries before any page is used
+                first_lines = handle.readlines(_READ_SIZE)
+            except BaseException:
+                handle.close()
+                raise
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return handle, first_lines
+
+        try:
+            handle, first_lines = await asyncio.to_thread(open_entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError) as e:
+            logger.error(f"Extracted text cache entry {path.name} is unreadable, removing it: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        return self._iter_pages(path, handle, first_lines)
+
+    async def _iter_pages(self, path: Path, handle, lines: List[str]) -> AsyncIterator[str]:
+        try:
+            while lines:
+                for line in lines:
+                    yield json.loads(line)
+                lines = await asyncio.to_thread(handle.readlines, _READ_SIZE)
+        except (OSError, EOFError, ValueError) as e:
+            # A damaged entry is dropped so the next attempt extracts the document again
+            logger.error(f"Extracted text cache entry {path.name} is unreadable, removing it: {e}")
+            path.unlink(missing_ok=True)
+            raise
+        finally:
+            handle.close()
+
+    async def open_writer(self, content_hash: str, extractor: str, version: str) -> TextCacheWriter:
+        """Start writing the cache entry for a document."""
+        return await asyncio.to_thread(TextCacheWriter, self, self._path(content_hash, extractor, version))
+
+    async def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_size."""
+        def scan_and_evict() -> Tuple[int, int]:
+            entries = []
+            now = time.time()
+            for path in self.root.glob("*/*"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if path.name.endswith(_SUFFIX):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                elif path.name.endswith(".tmp") and now - stat.st_mtime > _STALE_TEMP_AGE:
+                    path.unlink(missing_ok=True)
+
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_size:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+            return evicted, total
+
+        # Concurrent evictions from several jobs or workers only race to delete the same files
+        evicted, total = await asyncio.to_thread(scan_and_evict)
+        if evicted:
+            logger.info(f"Evicted {evicted} extracted text cache entries, {total / (1024 * 1024):.1f} MB remain")
@@ -4,6 +4,9 @@ File Services Module
 This module contains document processing functionality.
 """
 
-from .lance_db_setup import LanceDBVectorStore
+from .lance_db_setup import LanceDBVectorStore, truncate_embeddings
+from .content_registry import ContentHashRegistry
+from .store_registry import VectorStoreRegistry, get_vector_store_registry
+from .chunk_ids import ChunkIdSequence, chunk_ids
 
-__all__ = ["LanceDBVectorStore"] 
\ No newline at end of file
+__all__ = ["LanceDBVectorStore", "truncate_embeddings", "ContentHashRegistry", "VectorStoreRegistry", "get_vector_store_registry", "ChunkIdSequence", "chunk_ids"] 
\ No newline at end of file
@@ -93,6 +93,17 @@ async def check_lancedb_indexes():
             if hasattr(table, 'list_indices'):
                 indices = table.list_indices()
                 logger.info(f"  - Available indices: {indices}")
+                for index in indices:
+                    stats = table.index_stats(index.name)
+                    logger.info(
+                        f"  - {index.name} ({stats.index_type} on {', '.join(index.columns)}): "
+                        f"{stats.num_indexed_rows} rows indexed, {stats.num_unindexed_rows} not yet indexed"
+                    )
+                if not any(column.startswith("embedding") for index in indices for column in index.columns):
+                    logger.info(
+                        f"  - No vector index; searches scan every row until the table has "
+                        f"{config.VECTOR_INDEX_MIN_ROWS} rows"
+                    )
             else:
                 logger.info("  - Index listing not available in this LanceDB version")
         except Exception as e:
@@ -0,0 +1,57 @@
+"""
+Chunk Ids
+
+Deterministic row ids for document chunks, so the chunks of a re-uploaded
+document can be matched with the rows already stored for it.
+"""
+
+import hashlib
+from collections import Counter
+from typing import Iterable, List
+
+
+def chunk_id(file_name: str, text_digest: str, occurrence: int, namespace: str = "") -> str:
+    """
+    Row id of a chunk.
+
+    Args:
+        file_name: Name of the file the chunk belongs to
+        text_digest: SHA-256 hex digest of the chunk text
+        occurrence: How many earlier chunks of the file have the same text
+        namespace: Index version of the chunk's embedding and chunking
+            settings, so that chunks indexed with other settings never match
+
+    Returns:
+        32 hex characters derived from the arguments
+    """
+    key = f"{file_name}\0{text_digest}\0{occurrence}" + (f"\0{namespace}" if namespace else "")
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class ChunkIdSequence:
+    """
+    Assigns row ids to the chunks of one file in document order.
+
+    A chunk's id depends on the file name and the chunk text, not on its
+    position, so editing one part of a document leaves the ids of the
+    unchanged chunks as they were. Repeated chunk texts are told apart by
+    how often the text occurred before.
+    """
+
+    def __init__(self, file_name: str, namespace: str = ""):
+        self.file_name = file_name
+        self.namespace = namespace
+        self._occurrences: Counter = Counter()
+
+    def next_id(self, text: str) -> str:
+        """Id of the next chunk of the file."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        occurrence = self._occurrences[digest]
+        self._occurrences[digest] += 1
+        return chunk_id(self.file_name, digest, occurrence, self.namespace)
+
+
+def chunk_ids(file_name: str, texts: Iterable[str], namespace: str = "") -> List[str]:
+    """Row ids of all chunks of a file, given in document order."""
+    sequence = ChunkIdSequence(file_name, namespace)
+    return [sequence.next_id(text) for text in texts]
@@ -0,0 +1,60 @@
+"""
+Content Hash Registry
+
+Global index of which users have indexed a document with a given content hash.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import List
+from config import RAGIndexingConfig
+from config.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class ContentHashRegistry:
+    """
+    Filesystem-backed registry mapping document content hashes to users.
+
+    Each entry is an empty marker file at ``<root>/<hash[:2]>/<hash>/<user_id>``,
+    so registrations from several API workers never conflict. The registry
+    lives inside the vector database directory and is cleared with it.
+
+    Entries are hints: callers must check that the user's table still holds
+    rows for the hash before relying on an entry.
+    """
+
+    def __init__(self):
+        config = RAGIndexingConfig()
+        self.root = Path(config.LANCEDB_PATH) / "_content_registry"
+
+    def _hash_dir(self, content_hash: str) -> Path:
+        return self.root / content_hash[:2] / content_hash
+
+    async def register(self, content_hash: str, user_id: str) -> None:
+        """Record that user_id has indexed the content with this hash."""
+        def touch() -> None:
+            hash_dir = self._hash_dir(content_hash)
+            hash_dir.mkdir(parents=True, exist_ok=True)
+            (hash_dir / str(user_id)).touch()
+
+        await asyncio.to_thread(touch)
+        logger.debug(f"Registered content {content_hash[:12]} for user {user_id}")
+
+    async def unregister(self, content_hash: str, user_id: str) -> None:
+        """Remove the entry for user_id, e.g. after its rows were deleted."""
+        await asyncio.to_thread((self._hash_dir(content_hash) / str(user_id)).unlink, missing_ok=True)
+        logger.debug(f"Unregistered content {content_hash[:12]} for user {user_id}")
+
+    async def find_users(self, content_hash: str) -> List[str]:
+        """Return the ids of users that have indexed the content with this hash."""
+        def list_users() -> List[str]:
+            hash_dir = self._hash_dir(content_hash)
+            if not hash_dir.is_dir():
+                return []
+            return sorted(entry.name for entry in hash_dir.iterdir())
+
+        return await asyncio.to_thread(list_users)
@@ -1,21 +1,150 @@
+import asyncio
 import logging
+import os
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional, Set
 import numpy as np
 import pandas as pd
 import lancedb
 from lancedb.table import Table
 from lancedb.db import DBConnection
+from lancedb.index import Bitmap, BTree, HnswPq, HnswSq, IvfFlat, IvfPq, IvfSq
 import pyarrow as pa
+import pyarrow.compute as pc
 from config import RAGIndexingConfig
 from config.logger import setup_logging
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
+from .chunk_ids import chunk_ids
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+
+# Column holding the truncated embeddings searched when COARSE_EMBEDDING_DIMENSION is set
+COARSE_EMBEDDING_COLUMN = "embedding_coarse"
+
+# Vector index configurations by VECTOR_INDEX_TYPE
+VECTOR_INDEX_CONFIGS = {
+    "IVF_PQ": IvfPq,
+    "IVF_HNSW_SQ": HnswSq,
+    "IVF_HNSW_PQ": HnswPq,
+    "IVF_SQ": IvfSq,
+    "IVF_FLAT": IvfFlat,
+}
+
+# Scalar indexes on the columns that deletes and lookups filter on
+SCALAR_INDEX_CONFIGS = {
+    "file_name": BTree,
+    "file_type": Bitmap,
+    "created_at": BTree,
+    "content_hash": BTree,
+}
+
+# Columns returned by searches unless the caller asks for others
+RESULT_COLUMNS = ["id", "text", "metadata", "file_name", "file_type", "chunk_index", "created_at"]
+
+
+def _sql_string(value: str) -> str:
+    """Quote a value as an SQL string literal for LanceDB predicates."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _sql_equals(column: str, value: str) -> str:
+    """Predicate matching rows whose column equals a string value."""
+    return f"{column} = {_sql_string(value)}"
+
+
+def _sql_in(column: str, values: Iterable[str]) -> str:
+    """Predicate matching rows whose column equals any of the string values."""
+    return f"{column} IN ({', '.join(_sql_string(value) for value in values)})"
+
+
+def truncate_embeddings(embeddings: np.ndarray, dimension: int) -> np.ndarray:
+    """
+    Truncate embeddings to their leading dimensions and renormalize them to unit length.
+    
+    Models trained for shortened outputs, such as text-embedding-3, keep most
+    of their ranking quality in the leading dimensions.
+    
+    Args:
+        embeddings: Embeddings (1D or 2D array)
+        dimension: Number of leading dimensions to keep
+        
+    Returns:
+        float32 array of shape (n, dimension)
+    """
+    truncated = np.array(np.atleast_2d(embeddings)[:, :dimension], dtype=np.float32)
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    np.divide(truncated, norms, out=truncated, where=norms > 0)
+    return truncated
+
+
+def _embedding_column(embeddings: np.ndarray, dimension: int) -> pa.FixedSizeListArray:
+    """
+    Wrap an embedding matrix as a fixed-size list column.
+    
+    A C-contiguous float32 matrix of the right width is used without copying;
+    anything else is converted once, with rows of another width padded with
+    zeros or truncated.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings.reshape(1, -1) if embeddings.size else embeddings.reshape(-1, dimension)
+    if embeddings.shape[1] != dimension:
+        logger.warning(f"Embedding dimension mismatch: got {embeddings.shape[1]}, expected {dimension}")
+        fitted = np.zeros((len(embeddings), dimension), dtype=np.float32)
+        width = min(embeddings.shape[1], dimension)
+        fitted[:, :width] = embeddings[:, :width]
+        embeddings = fitted
+    return pa.FixedSizeListArray.from_arrays(pa.array(embeddings.reshape(-1)), dimension)
+
+
+def _random_ids(count: int) -> pa.Array:
+    """Random UUID4 strings for ``count`` rows, generated together rather than one uuid4() per row."""
+    if not count:
+        return pa.array([], pa.string())
+    raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    hex_ids = pa.array(np.frombuffer(raw.tobytes().hex().encode("ascii"), dtype="S32")).cast(pa.string())
+    groups = [pc.utf8_slice_codeunits(hex_ids, start, stop) for start, stop in ((0, 8), (8, 12), (12, 16), (16, 20), (20, 32))]
+    return pc.binary_join_element_wise(*groups, "-")
+
+
+def _timestamps(count: int, timestamp: Optional[datetime] = None) -> pa.Array:
+    """One timestamp (now if None) repeated for ``count`` rows."""
+    return pa.array(np.full(count, np.datetime64(timestamp or datetime.now(), "us")))
+
+
+def _embedding_matrix(column: Any) -> np.ndarray:
+    """View a fixed-size list column of embeddings as a 2D numpy array."""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks else pa.array([], column.type)
+    return column.flatten().to_numpy(zero_copy_only=False).reshape(-1, column.type.list_size)
+
+
+def _result_rows(rows: pa.Table) -> List[Dict[str, Any]]:
+    """
+    Convert result rows to dictionaries column by column.
+    
+    Metadata is parsed from JSON and embeddings become rows of one float32
+    matrix rather than lists of Python floats.
+    """
+    columns: Dict[str, List[Any]] = {}
+    for name in rows.column_names:
+        column = rows.column(name)
+        if pa.types.is_fixed_size_list(column.type):
+            columns[name] = list(_embedding_matrix(column))
+        elif name == "metadata":
+            columns[name] = [json.loads(meta) if meta else {} for meta in column.to_pylist()]
+        else:
+            columns[name] = column.to_pylist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
 class LanceDBVectorStore:
     """
     LanceDB Vector Store for managing document embeddings.
@@ -24,18 +153,46 @@ class LanceDBVectorStore:
     with associated metadata.
     """
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[Path] = None):
         """
         Initialize LanceDB Vector Store.
         
+        Args:
+            db_path: Database directory, e.g. of one user (LANCEDB_PATH if None)
         """
         config = RAGIndexingConfig()
-        self.db_path = Path(config.LANCEDB_PATH)
+        self.db_path = Path(db_path) if db_path is not None else Path(config.LANCEDB_PATH)
+        self.read_consistency_interval = (
+            timedelta(seconds=config.LANCEDB_READ_CONSISTENCY_SECONDS)
+            if config.LANCEDB_READ_CONSISTENCY_SECONDS >= 0 else None
+        )
         self.table_name = config.LANCEDB_TABLE_NAME
         self.db: Optional[DBConnection] = None
         self.table: Optional[Table] = None
-        self.dimension = config.OPENAI_EMBEDDING_DIMENSION
+        self.dimension = (
+            config.ONNX_EMBEDDING_DIMENSION if config.EMBEDDING_PROVIDER == "onnx" else config.OPENAI_EMBEDDING_DIMENSION
+        )
         self.similarity_threshold = config.SIMILARITY_THRESHOLD
+        self.coarse_dimension = config.COARSE_EMBEDDING_DIMENSION
+        if self.coarse_dimension >= self.dimension:
+            logger.warning(
+                f"COARSE_EMBEDDING_DIMENSION {self.coarse_dimension} is not below the embedding dimension "
+                f"{self.dimension}; searching the full vectors"
+            )
+            self.coarse_dimension = 0
+        self.rescore_factor = max(1, config.RESCORE_CANDIDATE_FACTOR)
+        self.index_type = config.VECTOR_INDEX_TYPE.upper()
+        if self.index_type != "NONE" and self.index_type not in VECTOR_INDEX_CONFIGS:
+            logger.warning(f"Unknown VECTOR_INDEX_TYPE {config.VECTOR_INDEX_TYPE}; no vector index is built")
+            self.index_type = "NONE"
+        self.index_min_rows = config.VECTOR_INDEX_MIN_ROWS
+        self.index_retrain_fraction = config.VECTOR_INDEX_RETRAIN_FRACTION
+        self.scalar_index_retrain_rows = max(1, config.SCALAR_INDEX_RETRAIN_ROWS)
+        self.nprobes = config.SEARCH_NPROBES
+        self.refine_factor = config.SEARCH_REFINE_FACTOR
+        self.threshold_overfetch = max(1, config.SEARCH_THRESHOLD_OVERFETCH)
+        self._index_task: Optional[asyncio.Future] = None
+        self._index_pending = False
 
         
     async def setup_lance_db(self) -> DBConnection:
@@ -50,7 +207,7 @@ class LanceDBVectorStore:
             self.db_path.mkdir(parents=True, exist_ok=True)
             
             # Connect to LanceDB
-            self.db = lancedb.connect(str(self.db_path))
+            self.db = lancedb.connect(str(self.db_path), read_consistency_interval=self.read_consistency_interval)
             logger.info(f"Connected to LanceDB at: {self.db_path}")
             
             return self.db
@@ -63,10 +220,13 @@ class LanceDBVectorStore:
         """
         Create PyArrow schema for the embeddings table.
         
+        With a coarse dimension configured, the schema ends with the truncated
+        embedding column used for candidate search.
+        
         Returns:
             PyArrow schema for the table
         """
-        return pa.schema([
+        fields = [
             pa.field("id", pa.string()),
             pa.field("text", pa.string()),
             pa.field("embedding", pa.list_(pa.float32(), self.dimension)),  # Fixed-size list with 1536 dimensions
@@ -74,8 +234,161 @@ class LanceDBVectorStore:
             pa.field("file_name", pa.string()),
             pa.field("file_type", pa.string()),
             pa.field("chunk_index", pa.int32()),
-            pa.field("created_at", pa.timestamp('us'))
-        ])
+            pa.field("created_at", pa.timestamp('us')),
+            pa.field("content_hash", pa.string())  # SHA-256 of the source file
+        ]
+        if self.coarse_dimension:
+            fields.append(pa.field(COARSE_EMBEDDING_COLUMN, pa.list_(pa.float32(), self.coarse_dimension)))
+        return pa.schema(fields)
+    
+    def _with_coarse(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the truncated embeddings to row columns if enabled."""
+        if not self.coarse_dimension:
+            return columns
+        coarse = truncate_embeddings(_embedding_matrix(columns["embedding"]), self.coarse_dimension)
+        return {**columns, COARSE_EMBEDDING_COLUMN: _embedding_column(coarse, self.coarse_dimension)}
+    
+    def _rows_batch(self, columns: Dict[str, Any]) -> pa.RecordBatch:
+        """Build one record batch with the table schema from columns of arrays or lists."""
+        return pa.RecordBatch.from_pydict(self._with_coarse(columns), schema=self.create_table_schema())
+    
+    def _rows_table(self, columns: Dict[str, Any]) -> pa.Table:
+        """Build rows with the table schema from their columns, which may be chunked, e.g. read from a table."""
+        return pa.table(self._with_coarse(columns), schema=self.create_table_schema())
+    
+    def _sync_coarse_column(self) -> None:
+        """Add, resize or drop the truncated embedding column of an existing table to match the configuration."""
+        field = self.table.schema.field(COARSE_EMBEDDING_COLUMN) if COARSE_EMBEDDING_COLUMN in self.table.schema.names else None
+        if field is not None and field.type.list_size == self.coarse_dimension:
+            return
+        if field is not None:
+            self.table.drop_columns([COARSE_EMBEDDING_COLUMN])
+            logger.info(f"Dropped {field.type.list_size}-dimensional coarse embeddings of table '{self.table_name}'")
+        if not self.coarse_dimension:
+            return
+        
+        self.table.add_columns(pa.field(COARSE_EMBEDDING_COLUMN, pa.list_(pa.float32(), self.coarse_dimension)))
+        rows = self.table.search().select(["id", "embedding"]).limit(None).to_arrow()
+        if rows.num_rows:
+            coarse = truncate_embeddings(_embedding_matrix(rows.column("embedding")), self.coarse_dimension)
+            self.table.merge_insert("id").when_matched_update_all().execute(pa.table({
+                "id": rows.column("id"),
+                COARSE_EMBEDDING_COLUMN: _embedding_column(coarse, self.coarse_dimension),
+            }))
+        logger.info(f"Added {self.coarse_dimension}-dimensional coarse embeddings to {rows.num_rows} rows of table '{self.table_name}'")
+    
+    @property
+    def vector_column(self) -> str:
+        """Column that candidate search runs on and the vector index covers."""
+        return COARSE_EMBEDDING_COLUMN if self.coarse_dimension else "embedding"
+    
+    def schedule_index_maintenance(self) -> Optional[asyncio.Future]:
+        """
+        Build or retrain the table's indexes in the background if it needs it.
+        
+        At most one build runs per store. Writes made while it runs are
+        checked again once it finishes. Searches and deletes keep working
+        meanwhile: they read the table version they started on and scan rows
+        the indexes do not cover yet, so a build only changes how fast they are.
+        
+        Returns:
+            The running maintenance task, or None if no table is open
+        """
+        if self.table is None:
+            return None
+        if self._index_task is not None and not self._index_task.done():
+            self._index_pending = True
+            return self._index_task
+        self._index_task = asyncio.ensure_future(self._maintain_index())
+        return self._index_task
+    
+    async def _maintain_index(self) -> None:
+        try:
+            while True:
+                self._index_pending = False
+                await asyncio.to_thread(self._update_indexes)
+                if not self._index_pending:
+                    return
+        except Exception as e:
+            logger.error(f"Failed to update indexes of {self.db_path}: {e}")
+    
+    def _indexes(self) -> Dict[str, Any]:
+        """Indexes of the table by the column they cover."""
+        return {index.columns[0]: index for index in self.table.list_indices() if len(index.columns) == 1}
+    
+    def _vector_index(self) -> Optional[Any]:
+        """The index on the vector column, if any."""
+        return self._indexes().get(self.vector_column)
+    
+    def _needs_training(self, index: Optional[Any], min_unindexed_rows: int = 1) -> bool:
+        """
+        Whether an index is missing, or the rows it does not cover reach both
+        ``min_unindexed_rows`` and VECTOR_INDEX_RETRAIN_FRACTION of those it does.
+        """
+        if index is None:
+            return True
+        stats = self.table.index_stats(index.name)
+        return (
+            stats.num_unindexed_rows >= min_unindexed_rows
+            and stats.num_unindexed_rows >= self.index_retrain_fraction * stats.num_indexed_rows
+        )
+    
+    def _update_indexes(self) -> None:
+        """
+        Build missing indexes and retrain those that fall behind.
+        
+        Scalar indexes are kept from the start, so deletes and lookups by file
+        or content hash stay index lookups as the table grows. They are only
+        rebuilt once SCALAR_INDEX_RETRAIN_ROWS rows are left uncovered, since
+        searching fewer uncovered rows is cheaper than rebuilding after every
+        append. The vector index is built once the table has
+        VECTOR_INDEX_MIN_ROWS rows.
+        """
+        indexes = self._indexes()
+        for column, index_config in SCALAR_INDEX_CONFIGS.items():
+            if column not in self.table.schema.names:
+                continue
+            if self._needs_training(indexes.get(column), self.scalar_index_retrain_rows):
+                self.table.create_index(column, config=index_config(), replace=True)
+                logger.debug(f"{index_config.__name__} index on {column} of {self.db_path} updated")
+        if self.index_type != "NONE":
+            self._update_vector_index(indexes.get(self.vector_column))
+    
+    def _update_vector_index(self, index: Optional[Any]) -> Optional[str]:
+        """
+        Build the vector index once the table has VECTOR_INDEX_MIN_ROWS rows,
+        and retrain it once the rows it does not cover reach
+        VECTOR_INDEX_RETRAIN_FRACTION of those it does.
+        
+        Args:
+            index: The current index on the vector column, if any
+        
+        Returns:
+            "built", "retrained" or None if the index was left as it is
+        """
+        rows = self.table.count_rows()
+        if rows < self.index_min_rows or not self._needs_training(index):
+            return None
+        
+        started = time.perf_counter()
+        config = VECTOR_INDEX_CONFIGS[self.index_type](distance_type="l2")
+        self.table.create_index(self.vector_column, config=config, replace=True)
+        action = "built" if index is None else "retrained"
+        logger.info(
+            f"{self.index_type} index on {self.vector_column} of {self.db_path} {action} over {rows} rows "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return action
+    
+    def _tune(self, query: Any, nprobes: Optional[int], refine_factor: Optional[int]) -> Any:
+        """Apply the index search settings, or the configured ones if None, to a vector query."""
+        nprobes = self.nprobes if nprobes is None else nprobes
+        refine_factor = self.refine_factor if refine_factor is None else refine_factor
+        if nprobes:
+            query = query.nprobes(nprobes)
+        if refine_factor:
+            query = query.refine_factor(refine_factor)
+        return query
     
     async def create_or_get_table(self) -> Table:
         """
@@ -85,7 +398,7 @@ class LanceDBVectorStore:
         Returns:
             LanceDB table object
         """
-        if not hasattr(self, 'db') or not self.db:
+        if not hasattr(self, 'db') or self.db is None:
             await self.setup_lance_db()
         
         try:
@@ -93,20 +406,16 @@ class LanceDBVectorStore:
             if self.table_name in self.db.table_names():
                 logger.info(f"Table '{self.table_name}' already exists, using existing table")
                 self.table = self.db.open_table(self.table_name)
+                if "content_hash" not in self.table.schema.names:
+                    # Tables created before upload deduplication lack the column
+                    self.table.add_columns({"content_hash": "CAST(NULL AS STRING)"})
+                    logger.info(f"Added content_hash column to table '{self.table_name}'")
+                self._sync_coarse_column()
+                self.schedule_index_maintenance()
                 return self.table
             
             # Create new table with proper schema
-            # Define the schema first
-            schema = pa.schema([
-                pa.field("id", pa.string()),
-                pa.field("text", pa.string()),
-                pa.field("embedding", pa.list_(pa.float32(), self.dimension)),  # Fixed-size list
-                pa.field("metadata", pa.string()),
-                pa.field("file_name", pa.string()),
-                pa.field("file_type", pa.string()),
-                pa.field("chunk_index", pa.int32()),
-                pa.field("created_at", pa.timestamp('us'))
-            ])
+            schema = self.create_table_schema()
             
             # Create sample data with proper vector format
             sample_data = [{
@@ -117,8 +426,11 @@ class LanceDBVectorStore:
                 "file_name": "sample.txt",
                 "file_type": "txt",
                 "chunk_index": 0,
-                "created_at": datetime.now()
+                "created_at": datetime.now(),
+                "content_hash": None
             }]
+            if self.coarse_dimension:
+                sample_data[0][COARSE_EMBEDDING_COLUMN] = [0.1] * self.coarse_dimension
             
             df = pd.DataFrame(sample_data)
             self.table = self.db.create_table(
@@ -145,8 +457,10 @@ class LanceDBVectorStore:
         embeddings: np.ndarray,
         metadata: List[Dict[str, Any]],
         file_name: str,
-        file_type: str
-    ) -> None:
+        file_type: str,
+        start_index: int = 0,
+        content_hash: Optional[str] = None
+    ) -> List[str]:
         """
         Add embeddings to the vector store.
         
@@ -156,57 +470,101 @@ class LanceDBVectorStore:
             metadata: List of metadata dictionaries for each chunk
             file_name: Name of the source file
             file_type: Type of the source file
+            start_index: Chunk index of the first text, for documents added in several batches
+            content_hash: SHA-256 of the source file, used to deduplicate uploads
+            
+        Returns:
+            List of ids of the inserted rows
         """
-        # Automatically setup LanceDB and create/get table if not already done
-        if not hasattr(self, 'table') or not self.table:
-            await self.setup_lance_db()
-            await self.create_or_get_table()
+        if len(texts) != len(embeddings) or len(texts) != len(metadata):
+            raise ValueError("Texts, embeddings, and metadata must have the same length")
+        
+        # Columns of values shared by all chunks are built once, not per row
+        count = len(texts)
+        ids = _random_ids(count)
+        await self._append({
+            "id": ids,
+            "text": texts,
+            "embedding": _embedding_column(embeddings, self.dimension),
+            "metadata": [json.dumps(meta) for meta in metadata],
+            "file_name": pa.repeat(pa.scalar(file_name, pa.string()), count),
+            "file_type": pa.repeat(pa.scalar(file_type, pa.string()), count),
+            "chunk_index": np.arange(start_index, start_index + count, dtype=np.int32),
+            "created_at": _timestamps(count),
+            "content_hash": pa.repeat(pa.scalar(content_hash, pa.string()), count),
+        })
+        logger.info(f"Added {count} embeddings from {file_name} to table {self.table_name}")
+        return ids.to_pylist()
+    
+    async def add_chunks(
+        self,
+        texts: List[str],
+        embeddings: np.ndarray,
+        metadata: List[Dict[str, Any]],
+        file_names: List[str],
+        file_types: List[str],
+        chunk_indices: List[int],
+        content_hashes: List[Optional[str]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add chunks of one or more documents to the vector store in a single append.
         
+        Every argument has one entry per chunk, so chunks of several files can
+        be committed together.
+        
+        Args:
+            texts: List of text chunks
+            embeddings: Numpy array of embeddings (2D array: [n_chunks, embedding_dim])
+            metadata: List of metadata dictionaries for each chunk
+            file_names: Name of the source file of each chunk
+            file_types: Type of the source file of each chunk
+            chunk_indices: Position of each chunk within its file
+            content_hashes: SHA-256 of the source file of each chunk
+            ids: Row id of each chunk, as given by ChunkIdSequence (random if None)
+            
+        Returns:
+            List of ids of the inserted rows
+        """
         if len(texts) != len(embeddings) or len(texts) != len(metadata):
             raise ValueError("Texts, embeddings, and metadata must have the same length")
+        if not len(texts) == len(file_names) == len(file_types) == len(chunk_indices) == len(content_hashes):
+            raise ValueError("File names, file types, chunk indices and content hashes must match the texts")
+        if ids is not None and len(ids) != len(texts):
+            raise ValueError("Ids must match the texts")
+        
+        row_ids = ids if ids is not None else _random_ids(len(texts))
+        await self._append({
+            "id": row_ids,
+            "text": texts,
+            "embedding": _embedding_column(embeddings, self.dimension),
+            "metadata": [json.dumps(meta) for meta in metadata],
+            "file_name": file_names,
+            "file_type": file_types,
+            "chunk_index": chunk_indices,
+            "created_at": _timestamps(len(texts)),
+            "content_hash": content_hashes,
+        })
+        logger.info(f"Added {len(texts)} embeddings from {len(set(file_names))} file(s) to table {self.table_name}")
+        return ids if ids is not None else row_ids.to_pylist()
+    
+    async def _append(self, columns: Dict[str, Any]) -> None:
+        """
+        Append rows given as columns in one Arrow record batch.
+        
+        The embedding column views the caller's float32 matrix, so no row is
+        converted to Python objects on the way to LanceDB.
+        """
+        # Automatically setup LanceDB and create/get table if not already done
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
         
         try:
-            # Ensure embeddings are 2D numpy array with correct shape
-            if embeddings.ndim == 1:
-                embeddings = embeddings.reshape(1, -1)
-            
-            # Validate embedding dimensions
-            expected_dim = self.dimension  # OpenAI embedding dimension
-            if embeddings.shape[1] != expected_dim:
-                logger.warning(f"Embedding dimension mismatch: got {embeddings.shape[1]}, expected {expected_dim}")
-            
-            # Prepare data for insertion
-            data_to_insert = []
-            
-            for i, (text, embedding, meta) in enumerate(zip(texts, embeddings, metadata)):
-                # Ensure embedding is a list of floats (not numpy array)
-                embedding_list = embedding.tolist() if isinstance(embedding, np.ndarray) else list(embedding)
-                
-                # Ensure we have exactly dimension dimensions
-                if len(embedding_list) != expected_dim:
-                    # Pad or truncate to expected dimension
-                    if len(embedding_list) < expected_dim:
-                        embedding_list.extend([0.0] * (expected_dim - len(embedding_list)))
-                    else:
-                        embedding_list = embedding_list[:expected_dim]
-                
-                record = {
-                    "id": str(uuid.uuid4()),
-                    "text": text,
-                    "embedding": embedding_list,  # List of exactly dimension floats
-                    "metadata": json.dumps(meta),
-                    "file_name": file_name,
-                    "file_type": file_type,
-                    "chunk_index": i,
-                    "created_at": datetime.now()
-                }
-                data_to_insert.append(record)
-            
-            # Convert to DataFrame and add to table
-            df = pd.DataFrame(data_to_insert)
-            self.table.add(data=df, mode="append")
-            
-            logger.info(f"Added {len(texts)} embeddings to table {self.table_name}")
+            rows = self._rows_batch(columns)
+            if rows.num_rows:
+                await asyncio.to_thread(self.table.add, data=rows, mode="append")
+                self.schedule_index_maintenance()
             
         except Exception as e:
             logger.error(f"Failed to add embeddings: {e}")
@@ -216,73 +574,83 @@ class LanceDBVectorStore:
         self,
         query_embedding: np.ndarray,
         limit: int = 5,
-        similarity_threshold: Optional[float] = None
+        similarity_threshold: Optional[float] = None,
+        columns: Optional[List[str]] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar embeddings.
         
+        Results are read as Arrow with only the requested columns. Up to
+        ``limit`` results above the similarity threshold are returned: an
+        exhaustive search applies it as a distance bound while scanning.
+        
+        With a coarse dimension configured, ``rescore_factor`` times ``limit``
+        candidates are found on the truncated embeddings and ranked by their
+        distance to the query on the full vectors.
+        
+        Once the table has a vector index, ``nprobes`` of its partitions are
+        searched and ``refine_factor`` times the candidates are re-ranked by
+        their exact distance, so that scores are not compressed estimates.
+        With a similarity threshold, an index search re-ranks at least once
+        and fetches ``threshold_overfetch`` times ``limit`` results, to which
+        the threshold is applied.
+        
         Args:
             query_embedding: Query embedding vector (1D numpy array)
             limit: Maximum number of results to return
             similarity_threshold: Minimum similarity threshold
+            columns: Columns to return (RESULT_COLUMNS if None); the
+                embedding is only read if listed here
+            nprobes: Index partitions to search (SEARCH_NPROBES if None)
+            refine_factor: Candidates re-ranked exactly per result
+                (SEARCH_REFINE_FACTOR if None, 0 for none)
             
         Returns:
-            List of similar documents with metadata
+            List of similar documents with metadata and their similarity_score
         """
         # Automatically setup LanceDB and create/get table if not already done
-        if not hasattr(self, 'table') or not self.table:
+        if not hasattr(self, 'table') or self.table is None:
             await self.setup_lance_db()
             await self.create_or_get_table()
             
         if similarity_threshold is None:
             similarity_threshold = self.similarity_threshold
+        columns = list(columns) if columns is not None else list(RESULT_COLUMNS)
         try:
-            # Ensure query embedding is 1D and convert to list
-            if query_embedding.ndim > 1:
-                query_embedding = query_embedding.flatten()
+            query_embedding = np.asarray(query_embedding, dtype=np.float32).ravel()
             
             # Ensure we have exactly the expected dimensions
             expected_dim = self.dimension
             if len(query_embedding) != expected_dim:
                 if len(query_embedding) < expected_dim:
                     # Pad with zeros
-                    padded = np.zeros(expected_dim)
+                    padded = np.zeros(expected_dim, dtype=np.float32)
                     padded[:len(query_embedding)] = query_embedding
                     query_embedding = padded
                 else:
                     # Truncate
                     query_embedding = query_embedding[:expected_dim]
             
-            query_vector = query_embedding.tolist()
-            
-            # Perform vector search
-            results = (
-                self.table.search(query_vector)
-                .limit(limit)
-                .to_pandas()
+            # similarity = 1 - distance, so a minimum similarity is a maximum distance;
+            # the query's upper bound is exclusive, so results exactly at the threshold are kept
+            max_distance = (
+                float(np.nextafter(np.float32(1 - similarity_threshold), np.float32(np.inf)))
+                if similarity_threshold > 0 else None
             )
             
-            # Convert results to list of dictionaries
-            search_results = []
-            for _, row in results.iterrows():
-                # Calculate similarity score from distance
-                similarity_score = 1 - row["_distance"]
-                
-                # Apply similarity threshold filter
-                if similarity_threshold > 0 and similarity_score < similarity_threshold:
-                    continue
-                
-                result = {
-                    "id": row["id"],
-                    "text": row["text"],
-                    "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-                    "file_name": row["file_name"],
-                    "file_type": row["file_type"],
-                    "chunk_index": row["chunk_index"],
-                    "similarity_score": similarity_score,
-                    "created_at": row["created_at"]
-                }
-                search_results.append(result)
+            if self.coarse_dimension:
+                results = await asyncio.to_thread(
+                    self._search_rescored, query_embedding, limit, columns, max_distance, nprobes, refine_factor
+                )
+            else:
+                results = await asyncio.to_thread(
+                    self._search, query_embedding, limit, columns, max_distance, nprobes, refine_factor
+                )
+            
+            similarity = pc.subtract(pa.scalar(1.0, pa.float32()), results.column("_distance"))
+            search_results = _result_rows(results.drop_columns(["_distance"]).append_column("similarity_score", similarity))
             
             logger.info(f"Found {len(search_results)} similar documents")
             return search_results
@@ -291,6 +659,76 @@ class LanceDBVectorStore:
             logger.error(f"Failed to search similar embeddings: {e}")
             raise
     
+    def _search(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        columns: List[str],
+        max_distance: Optional[float],
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None
+    ) -> pa.Table:
+        """
+        Search the full embeddings.
+        
+        Returns:
+            The best ``limit`` rows below ``max_distance`` with the requested
+            columns and their ``_distance``
+        """
+        query = self.table.search(query_embedding).select(columns + ["_distance"])
+        if max_distance is None:
+            return self._tune(query, nprobes, refine_factor).limit(limit).to_arrow()
+        if self._vector_index() is None:
+            # Bypassing the index keeps the scan exhaustive if another process builds one meanwhile
+            return (
+                query.limit(limit).bypass_vector_index().distance_range(upper_bound=max_distance).to_arrow()
+            )
+        # An index search would apply the bound to its compressed distance estimates, so the
+        # bound is applied to candidates re-ranked by exact distance. Rows the estimates rank
+        # too low would otherwise be cut before the bound leaves room for them, so more
+        # candidates than results are fetched
+        refine_factor = max(1, self.refine_factor if refine_factor is None else refine_factor)
+        results = self._tune(query, nprobes, refine_factor).limit(limit * self.threshold_overfetch).to_arrow()
+        results = results.filter(pc.less(results.column("_distance"), pa.scalar(max_distance, pa.float32())))
+        return results.slice(0, limit)
+    
+    def _search_rescored(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        columns: List[str],
+        max_distance: Optional[float],
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None
+    ) -> pa.Table:
+        """
+        Find candidates on the truncated embeddings and rank them by the full vectors.
+        
+        Returns:
+            The best ``limit`` candidates below ``max_distance`` with the
+            requested columns and their full-vector ``_distance``, which uses
+            the same metric (squared L2) as a full-vector search
+        """
+        coarse_query = truncate_embeddings(query_embedding, self.coarse_dimension)[0]
+        query = self.table.search(coarse_query, vector_column_name=COARSE_EMBEDDING_COLUMN)
+        candidates = (
+            self._tune(query, nprobes, refine_factor)
+            .limit(limit * self.rescore_factor)
+            .select(list(dict.fromkeys(columns + ["embedding", "_distance"])))
+            .to_arrow()
+        )
+        vectors = _embedding_matrix(candidates.column("embedding"))
+        distances = np.square(vectors - query_embedding).sum(axis=1)
+        order = np.argsort(distances, kind="stable")
+        if max_distance is not None:
+            order = order[distances[order] < max_distance]
+        order = order[:limit]
+        return (
+            candidates.select(columns)
+            .take(order)
+            .append_column("_distance", pa.array(distances[order], pa.float32()))
+        )
+    
     async def get_table_info(self) -> Dict[str, Any]:
         """
         Get information about the table.
@@ -299,19 +737,30 @@ class LanceDBVectorStore:
             Dictionary with table information
         """
         # Automatically setup LanceDB and create/get table if not already done
-        if not hasattr(self, 'table') or not self.table:
+        if not hasattr(self, 'table') or self.table is None:
             await self.setup_lance_db()
             await self.create_or_get_table()
         
         try:
             count = self.table.count_rows()
             schema = self.table.schema
+            indexes = self._indexes()
+            index = indexes.get(self.vector_column)
+            stats = self.table.index_stats(index.name) if index is not None else None
             
             return {
                 "table_name": self.table_name,
                 "db_path": str(self.db_path),
                 "row_count": count,
-                "schema": str(schema)
+                "schema": str(schema),
+                "vector_index": {
+                    "name": index.name,
+                    "column": self.vector_column,
+                    "type": stats.index_type,
+                    "indexed_rows": stats.num_indexed_rows,
+                    "unindexed_rows": stats.num_unindexed_rows,
+                } if stats is not None else None,
+                "scalar_indexes": sorted(column for column in indexes if column in SCALAR_INDEX_CONFIGS)
             }
             
         except Exception as e:
@@ -329,20 +778,14 @@ class LanceDBVectorStore:
             Number of deleted records
         """
         # Automatically setup LanceDB and create/get table if not already done
-        if not hasattr(self, 'table') or not self.table:
+        if not hasattr(self, 'table') or self.table is None:
             await self.setup_lance_db()
             await self.create_or_get_table()
         
         try:
-            # Get current count
-            initial_count = self.table.count_rows()
-            
-            # Delete records for the file
-            self.table.delete(f"file_name = '{file_name}'")
-            
-            # Get new count
-            final_count = self.table.count_rows()
-            deleted_count = initial_count - final_count
+            # The count comes from the delete itself; the file_name index finds the rows
+            result = await asyncio.to_thread(self.table.delete, _sql_equals("file_name", file_name))
+            deleted_count = result.num_deleted_rows
             
             logger.info(f"Deleted {deleted_count} embeddings for file: {file_name}")
             return deleted_count
@@ -351,6 +794,359 @@ class LanceDBVectorStore:
             logger.error(f"Failed to delete embeddings for file {file_name}: {e}")
             raise
 
+    async def count_by_content_hash(self, content_hash: str) -> int:
+        """
+        Count the chunks stored for a source file content hash.
+        
+        Args:
+            content_hash: SHA-256 of the source file
+            
+        Returns:
+            Number of chunks indexed from that content
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        return await asyncio.to_thread(self.table.count_rows, _sql_equals("content_hash", content_hash))
+    
+    async def find_content_hashes(self, content_hashes: List[str]) -> Set[str]:
+        """
+        Find which of the given source file content hashes are already indexed.
+        
+        Args:
+            content_hashes: SHA-256 hashes of source files
+            
+        Returns:
+            The subset of content_hashes with at least one stored chunk
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        found: Set[str] = set()
+        unique_hashes = sorted(set(content_hashes))
+        # Look the hashes up in slices to keep the predicates short
+        for start in range(0, len(unique_hashes), 500):
+            predicate = _sql_in("content_hash", unique_hashes[start:start + 500])
+            rows = await asyncio.to_thread(
+                lambda: self.table.search()
+                .where(predicate)
+                .select(["content_hash"])
+                .limit(None)
+                .to_arrow()
+            )
+            found.update(rows.column("content_hash").to_pylist())
+        return found
+
+    async def find_file_names(self, file_names: List[str]) -> Set[str]:
+        """
+        Find which of the given file names already have chunks stored.
+        
+        Args:
+            file_names: Names of files
+        
+        Returns:
+            The subset of file_names with at least one stored chunk
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        found: Set[str] = set()
+        unique_names = sorted(set(file_names))
+        # Look the names up in slices to keep the predicates short
+        for start in range(0, len(unique_names), 500):
+            predicate = _sql_in("file_name", unique_names[start:start + 500])
+            rows = await asyncio.to_thread(
+                lambda: self.table.search()
+                .where(predicate)
+                .select(["file_name"])
+                .limit(None)
+                .to_arrow()
+            )
+            found.update(rows.column("file_name").to_pylist())
+        return found
+
+    async def get_indexed_files(self) -> List[Dict[str, Optional[str]]]:
+        """
+        Get the name, type and content hash of every file with stored chunks.
+        
+        Returns:
+            One dictionary with file_name, file_type and content_hash per file
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        rows = await asyncio.to_thread(
+            lambda: self.table.search()
+            .select(["file_name", "file_type", "content_hash"])
+            .limit(None)
+            .to_arrow()
+        )
+        files = rows.group_by("file_name", use_threads=False).aggregate(
+            [("file_type", "first"), ("content_hash", "first")]
+        )
+        return [
+            {"file_name": file_name, "file_type": file_type, "content_hash": content_hash}
+            for file_name, file_type, content_hash in zip(
+                files.column("file_name").to_pylist(),
+                files.column("file_type_first").to_pylist(),
+                files.column("content_hash_first").to_pylist(),
+            )
+        ]
+
+    async def copy_content_from(
+        self,
+        source: "LanceDBVectorStore",
+        content_hash: str,
+        file_name: str,
+        user_id: str,
+        id_namespace: str = ""
+    ) -> int:
+        """
+        Copy the chunks and embeddings of a document from another user's store.
+        
+        The chunk texts and vectors are reused as they are, so no embeddings
+        are generated. Rows get ids for this upload's file name, the file name
+        itself and the current time. Nothing is copied from a table whose
+        embeddings have another dimension.
+        
+        Args:
+            source: Vector store of the user that already indexed the content
+            content_hash: Content key of the source file, which includes the
+                embedding and chunking settings it was indexed with
+            file_name: Name of the file as uploaded by this user
+            user_id: Id of the user the rows are copied for
+            id_namespace: Namespace of the copied rows' chunk ids
+            
+        Returns:
+            Number of chunks copied
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        if not hasattr(source, 'table') or source.table is None:
+            await source.setup_lance_db()
+            await source.create_or_get_table()
+        source_dimension = source.table.schema.field("embedding").type.list_size
+        if source_dimension != self.dimension:
+            logger.warning(
+                f"Not copying content {content_hash[:12]} from {source.db_path}: its embeddings have "
+                f"{source_dimension} dimensions, not {self.dimension}"
+            )
+            return 0
+        
+        try:
+            rows = await asyncio.to_thread(
+                lambda: source.table.search()
+                .where(_sql_equals("content_hash", content_hash))
+                .select(["text", "embedding", "metadata", "file_type", "chunk_index"])
+                .limit(None)
+                .to_arrow()
+            )
+            if rows.num_rows == 0:
+                return 0
+            # Ids are assigned in document order, as if the file had been indexed here
+            rows = rows.take(np.argsort(rows.column("chunk_index").to_numpy(), kind="stable"))
+            
+            now = datetime.now()
+            metadata = []
+            for meta in rows.column("metadata").to_pylist():
+                meta = json.loads(meta) if meta else {}
+                meta["user_id"] = str(user_id)
+                metadata.append(json.dumps(meta))
+            
+            copied = self._rows_table({
+                "id": chunk_ids(file_name, rows.column("text").to_pylist(), id_namespace),
+                "text": rows.column("text"),
+                "embedding": rows.column("embedding"),
+                "metadata": metadata,
+                "file_name": pa.repeat(pa.scalar(file_name, pa.string()), rows.num_rows),
+                "file_type": rows.column("file_type"),
+                "chunk_index": rows.column("chunk_index"),
+                "created_at": _timestamps(rows.num_rows, now),
+                "content_hash": pa.repeat(pa.scalar(content_hash, pa.string()), rows.num_rows),
+            })
+            await asyncio.to_thread(self.table.add, data=copied, mode="append")
+            self.schedule_index_maintenance()
+            
+            logger.info(f"Copied {rows.num_rows} chunks of content {content_hash[:12]} from {source.db_path}")
+            return rows.num_rows
+            
+        except Exception as e:
+            logger.error(f"Failed to copy content {content_hash[:12]} from {source.db_path}: {e}")
+            raise
+    
+    async def delete_by_ids(self, ids: List[str]) -> None:
+        """
+        Delete embeddings by row id.
+        
+        Args:
+            ids: Ids returned by add_embeddings
+        """
+        if not ids:
+            return
+        
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        try:
+            result = await asyncio.to_thread(self.table.delete, _sql_in("id", ids))
+            logger.info(f"Deleted {result.num_deleted_rows} embeddings by id")
+            
+        except Exception as e:
+            logger.error(f"Failed to delete embeddings by id: {e}")
+            raise
+
+    def _chunk_rows(
+        self,
+        ids: List[str],
+        texts: List[str],
+        embeddings: np.ndarray,
+        metadata: List[Dict[str, Any]],
+        file_name: str,
+        file_type: str,
+        chunk_indices: List[int],
+        content_hash: Optional[str],
+        created_at: datetime
+    ) -> pa.Table:
+        """Build the rows of new chunks of one file as an Arrow table with the table schema."""
+        return self._rows_table({
+            "id": ids,
+            "text": texts,
+            "embedding": _embedding_column(embeddings, self.dimension),
+            "metadata": [json.dumps(meta) for meta in metadata],
+            "file_name": pa.repeat(pa.scalar(file_name, pa.string()), len(texts)),
+            "file_type": pa.repeat(pa.scalar(file_type, pa.string()), len(texts)),
+            "chunk_index": chunk_indices,
+            "created_at": _timestamps(len(texts), created_at),
+            "content_hash": pa.repeat(pa.scalar(content_hash, pa.string()), len(texts)),
+        })
+    
+    async def get_chunk_ids(self, file_name: str) -> Set[str]:
+        """
+        Get the ids of the rows stored for a file.
+        
+        Args:
+            file_name: Name of the file
+            
+        Returns:
+            Row ids of the file's chunks, empty if the file is not indexed
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        rows = await asyncio.to_thread(
+            lambda: self.table.search()
+            .where(_sql_equals("file_name", file_name))
+            .select(["id"])
+            .limit(None)
+            .to_arrow()
+        )
+        return set(rows.column("id").to_pylist())
+    
+    async def replace_file_chunks(
+        self,
+        file_name: str,
+        file_type: str,
+        content_hash: Optional[str],
+        ids: List[str],
+        texts: List[str],
+        embeddings: np.ndarray,
+        metadata: List[Dict[str, Any]],
+        chunk_indices: List[int],
+        reused: Dict[str, int]
+    ) -> Dict[str, int]:
+        """
+        Replace the stored chunks of a file with a new version in one upsert.
+        
+        Stored chunks that are part of the new version keep their text, vector
+        and creation time; only their position and content hash are updated.
+        New chunks are inserted and stored chunks missing from the new version
+        are deleted. Everything is applied with a single merge_insert, so
+        searches see either the old or the new version of the file.
+        
+        Args:
+            file_name: Name of the file
+            file_type: Type of the file
+            content_hash: SHA-256 of the new version of the file
+            ids: Row ids of the chunks that are not stored yet
+            texts: Text of each new chunk
+            embeddings: Numpy array of embeddings of the new chunks
+            metadata: Metadata dictionary of each new chunk
+            chunk_indices: Position of each new chunk within the file
+            reused: New position of each stored chunk kept in the new version, by row id
+            
+        Returns:
+            Dictionary with the number of chunks reused, added and removed
+        """
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        if not len(ids) == len(texts) == len(embeddings) == len(metadata) == len(chunk_indices):
+            raise ValueError("Ids, texts, embeddings, metadata and chunk indices must have the same length")
+        
+        try:
+            stored = await asyncio.to_thread(
+                lambda: self.table.search()
+                .where(_sql_equals("file_name", file_name))
+                .select(["id", "text", "embedding", "metadata", "created_at"])
+                .limit(None)
+                .to_arrow()
+            )
+            kept = stored.filter(pc.is_in(stored.column("id"), value_set=pa.array(list(reused), pa.string())))
+            if kept.num_rows != len(reused):
+                raise ValueError(f"Stored chunks of {file_name} changed while it was re-indexed")
+            
+            kept_ids = kept.column("id").to_pylist()
+            kept_metadata = []
+            for row_id, meta in zip(kept_ids, kept.column("metadata").to_pylist()):
+                meta = json.loads(meta) if meta else {}
+                meta["chunk_index"] = reused[row_id]
+                kept_metadata.append(json.dumps(meta))
+            kept_rows = self._rows_table({
+                "id": kept.column("id"),
+                "text": kept.column("text"),
+                "embedding": kept.column("embedding"),
+                "metadata": kept_metadata,
+                "file_name": pa.repeat(pa.scalar(file_name, pa.string()), kept.num_rows),
+                "file_type": pa.repeat(pa.scalar(file_type, pa.string()), kept.num_rows),
+                "chunk_index": [reused[row_id] for row_id in kept_ids],
+                "created_at": kept.column("created_at"),
+                "content_hash": pa.repeat(pa.scalar(content_hash, pa.string()), kept.num_rows),
+            })
+            new_rows = self._chunk_rows(
+                ids, texts, embeddings, metadata, file_name, file_type, chunk_indices, content_hash, datetime.now()
+            )
+            
+            result = await asyncio.to_thread(
+                lambda: self.table.merge_insert("id")
+                .when_matched_update_all()
+                .when_not_matched_insert_all()
+                .when_not_matched_by_source_delete(_sql_equals("file_name", file_name))
+                .execute(pa.concat_tables([kept_rows, new_rows]))
+            )
+            self.schedule_index_maintenance()
+            counts = {
+                "chunks_reused": kept.num_rows,
+                "chunks_added": result.num_inserted_rows,
+                "chunks_removed": result.num_deleted_rows,
+            }
+            logger.info(
+                f"Re-indexed {file_name}: {counts['chunks_reused']} chunks reused, "
+                f"{counts['chunks_added']} added, {counts['chunks_removed']} removed"
+            )
+            return counts
+            
+        except Exception as e:
+            logger.error(f"Failed to replace chunks of {file_name}: {e}")
+            raise
+
     async def process_multiple_documents(
         self,
         documents: List[Dict[str, Any]]
@@ -358,6 +1154,12 @@ class LanceDBVectorStore:
         """
         Process multiple documents in batch.
         
+        Chunks get deterministic ids from their file name and text, and all
+        documents are written with one merge_insert: chunks already stored
+        for a file are updated in place, new chunks are inserted and stored
+        chunks the new version no longer contains are deleted. If a file name
+        occurs more than once, the last document wins.
+        
         Args:
             documents: List of document dictionaries with structure:
                 {
@@ -365,44 +1167,66 @@ class LanceDBVectorStore:
                     'file_type': str,
                     'texts': List[str],
                     'embeddings': np.ndarray,
-                    'metadata': List[Dict[str, Any]]
+                    'metadata': List[Dict[str, Any]],
+                    'content_hash': Optional[str]
                 }
                 
         Returns:
             Dictionary with file_name as key and number of chunks stored as value
         """
+        if not documents:
+            return {}
+        
+        if not hasattr(self, 'table') or self.table is None:
+            await self.setup_lance_db()
+            await self.create_or_get_table()
+        
+        by_file = {doc['file_name']: doc for doc in documents}
+        now = datetime.now()
+        rows = []
         results = {}
+        for file_name, doc in by_file.items():
+            count = len(doc['texts'])
+            results[file_name] = count
+            if count:
+                rows.append(self._chunk_rows(
+                    chunk_ids(file_name, doc['texts']), doc['texts'], doc['embeddings'], doc['metadata'],
+                    file_name, doc['file_type'], list(range(count)), doc.get('content_hash'), now
+                ))
         
-        for doc in documents:
-            file_name = doc['file_name']
-            
-            # First, remove any existing embeddings for this file (prevents duplicates)
-            await self.delete_by_file(file_name)
-            
-            # Add new embeddings
-            await self.add_embeddings(
-                texts=doc['texts'],
-                embeddings=doc['embeddings'],
-                metadata=doc['metadata'],
-                file_name=file_name,
-                file_type=doc['file_type']
+        file_predicate = _sql_in("file_name", by_file)
+        if rows:
+            # Stored chunks of these files that are not in the new versions are deleted by the same commit
+            result = await asyncio.to_thread(
+                lambda: self.table.merge_insert("id")
+                .when_matched_update_all()
+                .when_not_matched_insert_all()
+                .when_not_matched_by_source_delete(file_predicate)
+                .execute(pa.concat_tables(rows))
             )
-            
-            results[file_name] = len(doc['texts'])
-            logger.info(f"Processed {file_name}: {len(doc['texts'])} chunks")
-        
+            self.schedule_index_maintenance()
+            logger.info(
+                f"Processed {len(by_file)} documents in one upsert: {result.num_updated_rows} chunks updated, "
+                f"{result.num_inserted_rows} added, {result.num_deleted_rows} removed"
+            )
+        else:
+            await asyncio.to_thread(self.table.delete, file_predicate)
+            logger.info(f"Processed {len(by_file)} documents without chunks")
         return results
 
-    async def get_all_embeddings(self) -> List[Dict[str, Any]]:
+    async def get_all_embeddings(self, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get all embeddings and documents from the vector database at the current db_path.
         
+        Args:
+            columns: Columns to return (RESULT_COLUMNS and the embedding if None)
+        
         Returns:
             List of dictionaries containing all embeddings and document data
         """
         try:
             # Ensure we have a connection to the specific db_path
-            if not self.db or not self.table:
+            if self.db is None or self.table is None:
                 await self.setup_lance_db()
                 await self.create_or_get_table()
             
@@ -418,28 +1242,15 @@ class LanceDBVectorStore:
                 return []
             
             # Get all data from the table at this specific db_path
-            df = self.table.to_pandas()
+            if columns is None:
+                columns = RESULT_COLUMNS[:3] + ["embedding"] + RESULT_COLUMNS[3:]
+            rows = await asyncio.to_thread(self.table.search().select(columns).limit(None).to_arrow)
             
-            if df.empty:
+            if rows.num_rows == 0:
                 logger.info(f"No embeddings found in database at {self.db_path}")
                 return []
             
-            # Convert DataFrame to list of dictionaries
-            all_data = []
-            for _, row in df.iterrows():
-                import json
-                
-                record = {
-                    "id": row["id"],
-                    "text": row["text"],
-                    "embedding": row["embedding"],  # This is already a list
-                    "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-                    "file_name": row["file_name"],
-                    "file_type": row["file_type"],
-                    "chunk_index": row["chunk_index"],
-                    "created_at": row["created_at"]
-                }
-                all_data.append(record)
+            all_data = _result_rows(rows)
             
             logger.info(f"Retrieved {len(all_data)} embeddings from database at {self.db_path}")
             return all_data
@@ -455,7 +1266,7 @@ class LanceDBVectorStore:
         Returns:
             Dictionary with file statistics
         """
-        if not hasattr(self, 'table') or not self.table:
+        if not hasattr(self, 'table') or self.table is None:
             await self.setup_lance_db()
             await self.create_or_get_table()
         
@@ -0,0 +1,139 @@
+"""
+Vector Store Registry
+
+Process-wide cache of the open LanceDB connection and table of each user.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+import uuid
+from config import RAGIndexingConfig
+from config.logger import setup_logging
+from .lance_db_setup import LanceDBVectorStore
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class VectorStoreRegistry:
+    """
+    LRU cache of per-user vector stores with their table already open.
+
+    A user's store is opened once and then shared by every request of that
+    user, so repeat requests skip connecting, listing tables and loading the
+    table. Concurrent first requests wait for the same open instead of
+    racing to create the table.
+
+    At most ``max_open`` stores are kept, dropping the least recently used
+    first, and stores unused for ``idle_seconds`` are dropped on the next
+    lookup. A dropped store stays usable by requests still holding it; LanceDB
+    releases it once they are done.
+    """
+
+    def __init__(self):
+        config = RAGIndexingConfig()
+        self.root = Path(config.LANCEDB_PATH)
+        self.max_open = max(1, config.VECTOR_STORE_CACHE_SIZE)
+        self.idle_seconds = config.VECTOR_STORE_IDLE_SECONDS
+        self._stores: "OrderedDict[str, Tuple[LanceDBVectorStore, float]]" = OrderedDict()
+        self._opening: Dict[str, asyncio.Future] = {}
+        # Bumped by discard so opens that were in progress are not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, user_id: Union[str, uuid.UUID]) -> Path:
+        """Database directory of a user."""
+        return self.root / str(user_id)
+
+    def _evict_idle(self, now: float) -> None:
+        while self._stores:
+            user_id, (_, last_used) = next(iter(self._stores.items()))
+            if now - last_used < self.idle_seconds:
+                return
+            del self._stores[user_id]
+            self.evictions += 1
+            logger.debug(f"Closed vector store of user {user_id} after {now - last_used:.0f}s idle")
+
+    async def _open(self, user_id: str) -> LanceDBVectorStore:
+        generation = self._generation
+        store = LanceDBVectorStore(self.path(user_id))
+        await store.setup_lance_db()
+        await store.create_or_get_table()
+        self.misses += 1
+        if generation == self._generation:
+            self._stores[user_id] = (store, time.monotonic())
+            while len(self._stores) > self.max_open:
+                evicted, _ = self._stores.popitem(last=False)
+                self.evictions += 1
+                logger.debug(f"Closed least recently used vector store of user {evicted}")
+        return store
+
+    async def get(self, user_id: Union[str, uuid.UUID]) -> LanceDBVectorStore:
+        """
+        Get the vector store of a user, opening its table on first use.
+
+        Args:
+            user_id: User whose database to open
+
+        Returns:
+            The user's store, shared with concurrent requests of that user
+        """
+        user_id = str(user_id)
+        now = time.monotonic()
+        self._evict_idle(now)
+        entry = self._stores.get(user_id)
+        if entry is not None:
+            self._stores[user_id] = (entry[0], now)
+            self._stores.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+        opening = self._opening.get(user_id)
+        if opening is None:
+            opening = asyncio.ensure_future(self._open(user_id))
+            self._opening[user_id] = opening
+            opening.add_done_callback(lambda _: self._opening.pop(user_id, None))
+        # A cancelled request does not cancel the open other requests wait for
+        return await asyncio.shield(opening)
+
+    def discard(self, user_id: Optional[Union[str, uuid.UUID]] = None) -> None:
+        """
+        Drop the open store of a user, or of every user if None, e.g. before
+        their database directories are deleted.
+        """
+        self._generation += 1
+        if user_id is None:
+            self._stores.clear()
+        else:
+            self._stores.pop(str(user_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Open stores and lookup counters."""
+        self._evict_idle(time.monotonic())
+        lookups = self.hits + self.misses
+        return {
+            "open": len(self._stores),
+            "max_open": self.max_open,
+            "idle_seconds": self.idle_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_registry: Optional[VectorStoreRegistry] = None
+
+
+def get_vector_store_registry() -> VectorStoreRegistry:
+    """Return the process-wide vector store registry, creating it if needed."""
+    global _registry
+    if _registry is None:
+        _registry = VectorStoreRegistry()
+    return _registry
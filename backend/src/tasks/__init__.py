@@ -1,3 +1,10 @@
 from .cleanup import scheduled_vector_db_cleanup, manual_vector_db_cleanup
+from .ingestion import IngestionJob, IngestionService, get_ingestion_service
 
-__all__ = ["scheduled_vector_db_cleanup", "manual_vector_db_cleanup"] 
\ No newline at end of file
+__all__ = [
+    "scheduled_vector_db_cleanup",
+    "manual_vector_db_cleanup",
+    "IngestionJob",
+    "IngestionService",
+    "get_ingestion_service",
+] 
\ No newline at end of file
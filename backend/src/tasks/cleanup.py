@@ -4,6 +4,7 @@ import shutil
 from pathlib import Path
 from typing import Optional
 from fastapi_utils.tasks import repeat_every
+from src.services.lance_db import get_vector_store_registry
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,8 @@ async def clear_vector_db_folder() -> None:
             return
         
         items_removed = 0
+        # Open tables would keep pointing at the deleted directories
+        get_vector_store_registry().discard()
         
         # Iterate through all items in the vector_db folder
         for item in VECTOR_DB_PATH.iterdir():
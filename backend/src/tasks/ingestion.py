@@ -0,0 +1,563 @@
+"""
+Ingestion Jobs
+
+Background ingestion of uploaded documents. The upload endpoints spool the
+files to disk and enqueue a job; a bounded pool of workers runs the jobs
+through the RAG pipeline and records their progress. A job holds one upload,
+a whole batch (several files or the contents of ZIP archives), or a re-index
+of a user's stored documents from the extracted text cache.
+
+Jobs are kept in process by default. When REDIS_HOST is configured the queue
+and job records live in Redis, so several API workers share one backlog. In
+that case UPLOAD_SPOOL_DIR must point to storage every worker can read.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from config import RAGIndexingConfig
+from config.logger import setup_logging
+from src.ai.middleware.redis import create_redis_client
+from src.rag_pipeline import RAGPipeline
+from src.services import DocumentProcessor
+from src.services.file_services import SpooledUpload
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestionDocument:
+    """A spooled document waiting to be ingested."""
+    file_name: str
+    file_type: str
+    spool_path: str
+    size: int
+    content_hash: str
+
+    @classmethod
+    def from_spooled(cls, spooled: SpooledUpload, file_name: str, file_type: str) -> "IngestionDocument":
+        return cls(
+            file_name=file_name,
+            file_type=file_type,
+            spool_path=str(spooled.path),
+            size=spooled.size,
+            content_hash=spooled.content_hash,
+        )
+
+    def to_spooled(self) -> SpooledUpload:
+        return SpooledUpload(path=Path(self.spool_path), size=self.size, content_hash=self.content_hash)
+
+
+@dataclass
+class IngestionJob:
+    """State of one ingestion job."""
+    job_id: str
+    user_id: str
+    documents: List[IngestionDocument]
+    batch: bool = False
+    reindex: bool = False
+    skipped: List[str] = field(default_factory=list)
+    status: str = "queued"  # queued, running, completed, failed
+    stage: str = "queued"
+    chunks_embedded: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IngestionJob":
+        data = dict(data)
+        data["documents"] = [IngestionDocument(**document) for document in data["documents"]]
+        return cls(**data)
+
+    def to_status(self) -> Dict[str, Any]:
+        """Public view of the job, as returned by the job status endpoint."""
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "user_id": self.user_id,
+            "files": [document.file_name for document in self.documents],
+            "skipped": self.skipped,
+            "status": self.status,
+            "stage": self.stage,
+            "chunks_embedded": self.chunks_embedded,
+            "queued_seconds": round((self.started_at or end) - self.created_at, 3),
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else 0.0,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class InMemoryJobBackend:
+    """
+    Job queue, job records and per-user running counts held in this process.
+
+    Like the Redis records, a job record is dropped INGESTION_JOB_TTL seconds
+    after it was last saved.
+    """
+
+    def __init__(self, config: RAGIndexingConfig):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Job records with the time they were last saved, oldest first
+        self._jobs: "OrderedDict[str, Tuple[float, IngestionJob]]" = OrderedDict()
+        self._running_per_user: Dict[str, int] = defaultdict(int)
+        self.job_ttl = config.INGESTION_JOB_TTL
+
+    def _evict_expired(self) -> None:
+        expired_before = time.monotonic() - self.job_ttl
+        while self._jobs and next(iter(self._jobs.values()))[0] < expired_before:
+            self._jobs.popitem(last=False)
+
+    async def enqueue(self, job_id: str) -> None:
+        await self._queue.put(job_id)
+
+    async def dequeue(self, timeout: float, worker: int) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def ack(self, job_id: str, worker: int) -> None:
+        pass
+
+    async def heartbeat(self) -> None:
+        pass
+
+    async def save(self, job: IngestionJob) -> None:
+        self._evict_expired()
+        self._jobs[job.job_id] = (time.monotonic(), job)
+        self._jobs.move_to_end(job.job_id)
+
+    async def load(self, job_id: str) -> Optional[IngestionJob]:
+        self._evict_expired()
+        saved = self._jobs.get(job_id)
+        return saved[1] if saved else None
+
+    async def try_acquire_user_slot(self, user_id: str, limit: int) -> bool:
+        if self._running_per_user[user_id] >= limit:
+            return False
+        self._running_per_user[user_id] += 1
+        return True
+
+    async def release_user_slot(self, user_id: str) -> None:
+        self._running_per_user[user_id] -= 1
+        if self._running_per_user[user_id] <= 0:
+            del self._running_per_user[user_id]
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisJobBackend:
+    """
+    Job queue (a Redis list), job records and per-user running counts in Redis.
+
+    A dequeued job is moved onto a processing list of the worker that took it
+    and only removed from there once the worker is done with it. Every process
+    refreshes a liveness key while it runs; the processing lists of a process
+    whose key has expired are moved back onto the queue by the others, and the
+    user slots its running jobs held are released.
+
+    The running counts expire INGESTION_JOB_TTL seconds after they last
+    changed, so slots held by a crashed worker are eventually freed.
+    """
+
+    QUEUE_KEY = "ingestion:queue"
+    CONSUMERS_KEY = "ingestion:consumers"
+    # Seconds between liveness refreshes, and how long a liveness key outlives the last one
+    HEARTBEAT_INTERVAL = 10
+    HEARTBEAT_TTL = 30
+    # Take a slot if fewer than ARGV[1] are taken, refreshing the counter's expiry
+    ACQUIRE_SLOT_SCRIPT = """
+local acquired = 1
+if redis.call('INCR', KEYS[1]) > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    acquired = 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return acquired
+"""
+    # Give a slot back, never going below zero, refreshing the counter's expiry
+    RELEASE_SLOT_SCRIPT = """
+local running = redis.call('DECR', KEYS[1])
+if running <= 0 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return running
+"""
+    # Move one job from a processing list back onto the queue, if no other process already did
+    REQUEUE_SCRIPT = """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('RPUSH', KEYS[2], ARGV[1])
+return 1
+"""
+
+    def __init__(self, config: RAGIndexingConfig):
+        self.redis_client = create_redis_client(config)
+        self.job_ttl = config.INGESTION_JOB_TTL
+        self._acquire_slot = self.redis_client.register_script(self.ACQUIRE_SLOT_SCRIPT)
+        self._release_slot = self.redis_client.register_script(self.RELEASE_SLOT_SCRIPT)
+        self._requeue = self.redis_client.register_script(self.REQUEUE_SCRIPT)
+        # Identifies this process's processing lists and liveness key
+        self.consumer_id = uuid.uuid4().hex
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"ingestion:job:{job_id}"
+
+    @staticmethod
+    def _running_key(user_id: str) -> str:
+        return f"ingestion:running:{user_id}"
+
+    @staticmethod
+    def _processing_key(consumer_id: str, worker: int) -> str:
+        return f"ingestion:processing:{consumer_id}:{worker}"
+
+    @staticmethod
+    def _alive_key(consumer_id: str) -> str:
+        return f"ingestion:alive:{consumer_id}"
+
+    async def enqueue(self, job_id: str) -> None:
+        await self.redis_client.rpush(self.QUEUE_KEY, job_id)
+
+    async def dequeue(self, timeout: float, worker: int) -> Optional[str]:
+        return await self.redis_client.blmove(
+            self.QUEUE_KEY, self._processing_key(self.consumer_id, worker), max(1, int(timeout)), "LEFT", "RIGHT"
+        )
+
+    async def ack(self, job_id: str, worker: int) -> None:
+        await self.redis_client.lrem(self._processing_key(self.consumer_id, worker), 1, job_id)
+
+    async def heartbeat(self) -> None:
+        """
+        Keep this process marked alive and recover the jobs of processes that died.
+
+        Runs until cancelled.
+        """
+        await self.redis_client.sadd(self.CONSUMERS_KEY, self.consumer_id)
+        while True:
+            try:
+                await self.redis_client.set(self._alive_key(self.consumer_id), 1, ex=self.HEARTBEAT_TTL)
+                await self.recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion heartbeat error: {e}", exc_info=True)
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
+
+    async def recover(self) -> int:
+        """
+        Put the jobs taken by processes that stopped heartbeating back on the queue.
+
+        Returns:
+            int: Number of jobs put back on the queue
+        """
+        recovered = 0
+        for consumer_id in await self.redis_client.smembers(self.CONSUMERS_KEY):
+            if consumer_id == self.consumer_id or await self.redis_client.exists(self._alive_key(consumer_id)):
+                continue
+            recovered += await self._requeue_processing(consumer_id)
+            await self.redis_client.srem(self.CONSUMERS_KEY, consumer_id)
+        return recovered
+
+    async def _requeue_processing(self, consumer_id: str) -> int:
+        recovered = 0
+        async for key in self.redis_client.scan_iter(match=f"ingestion:processing:{consumer_id}:*"):
+            for job_id in await self.redis_client.lrange(key, 0, -1):
+                job = await self.load(job_id)
+                # A running job holds a user slot that its dead worker will never release
+                was_running = job is not None and job.status == "running"
+                if not await self._requeue(keys=[key, self.QUEUE_KEY], args=[job_id]):
+                    continue
+                if was_running:
+                    job.status = job.stage = "queued"
+                    job.started_at = None
+                    await self.save(job)
+                    await self.release_user_slot(job.user_id)
+                recovered += 1
+                logger.warning(f"Requeued ingestion job {job_id} left behind by a stopped worker")
+        return recovered
+
+    async def save(self, job: IngestionJob) -> None:
+        await self.redis_client.set(self._job_key(job.job_id), json.dumps(asdict(job)), ex=self.job_ttl)
+
+    async def load(self, job_id: str) -> Optional[IngestionJob]:
+        data = await self.redis_client.get(self._job_key(job_id))
+        return IngestionJob.from_dict(json.loads(data)) if data else None
+
+    async def try_acquire_user_slot(self, user_id: str, limit: int) -> bool:
+        acquired = await self._acquire_slot(keys=[self._running_key(user_id)], args=[limit, self.job_ttl])
+        return bool(acquired)
+
+    async def release_user_slot(self, user_id: str) -> None:
+        await self._release_slot(keys=[self._running_key(user_id)], args=[self.job_ttl])
+
+    async def close(self) -> None:
+        # Jobs handed over as the workers were cancelled go back on the queue
+        await self._requeue_processing(self.consumer_id)
+        await self.redis_client.delete(self._alive_key(self.consumer_id))
+        await self.redis_client.srem(self.CONSUMERS_KEY, self.consumer_id)
+        await self.redis_client.close()
+
+
+class IngestionService:
+    """
+    Queue of document ingestion jobs and the workers that run them.
+
+    At most INGESTION_WORKERS jobs run at once in this process, and at most
+    INGESTION_MAX_JOBS_PER_USER jobs of one user run at once. A job whose user
+    is at the limit goes back to the end of the queue, so one tenant's bulk
+    upload cannot starve the others.
+    """
+
+    # Seconds to wait after requeueing a job whose user is at the limit
+    REQUEUE_DELAY = 0.5
+
+    def __init__(self):
+        config = RAGIndexingConfig()
+        if "REDIS_HOST" in config.model_fields_set:
+            self.backend = RedisJobBackend(config)
+            logger.info(f"Ingestion queue backed by Redis at {config.REDIS_HOST}:{config.REDIS_PORT}")
+        else:
+            self.backend = InMemoryJobBackend(config)
+            logger.info("Ingestion queue held in process")
+        self.max_workers = max(1, config.INGESTION_WORKERS)
+        self.max_jobs_per_user = max(1, config.INGESTION_MAX_JOBS_PER_USER)
+        self.max_batch_files = max(1, config.MAX_BATCH_FILES)
+        self.max_batch_upload_size = config.MAX_BATCH_UPLOAD_SIZE_MB * 1024 * 1024
+        self.document_processor = DocumentProcessor()
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def _enqueue(self, job: IngestionJob) -> None:
+        await self.backend.save(job)
+        await self.backend.enqueue(job.job_id)
+        if job.reindex:
+            logger.info(f"Queued re-index job {job.job_id} for user {job.user_id}")
+            return
+        logger.info(
+            f"Queued ingestion job {job.job_id} for user {job.user_id}: "
+            f"{', '.join(document.file_name for document in job.documents[:5])}"
+            + (f" and {len(job.documents) - 5} more" if len(job.documents) > 5 else "")
+        )
+
+    async def submit(self, file: UploadFile, user_id: uuid.UUID) -> IngestionJob:
+        """
+        Spool an upload to disk and enqueue it for ingestion.
+
+        Raises:
+            HTTPException: If the file type is unsupported or the upload is too large
+        """
+        file_type = await self.document_processor.get_file_type(file.filename)
+        spooled = await self.document_processor.spool_to_file(file)
+        job = IngestionJob(
+            job_id=str(uuid.uuid4()),
+            user_id=str(user_id),
+            documents=[IngestionDocument.from_spooled(spooled, file.filename, file_type)],
+        )
+        await self._enqueue(job)
+        return job
+
+    async def submit_batch(self, files: List[UploadFile], user_id: uuid.UUID) -> IngestionJob:
+        """
+        Spool a batch of uploads to disk and enqueue them as one ingestion job.
+
+        ZIP archives are unpacked member by member. Files of unsupported types
+        and files over the size limit are skipped and listed in the job.
+
+        Raises:
+            HTTPException: If the batch holds no supported document, too many
+                documents, or an invalid or oversized archive
+        """
+        documents: List[IngestionDocument] = []
+        skipped: List[str] = []
+
+        def check_batch_size() -> None:
+            if len(documents) > self.max_batch_files:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Too many documents. Maximum batch size is {self.max_batch_files} documents"
+                )
+
+        try:
+            for file in files:
+                if file.filename and file.filename.lower().endswith(".zip"):
+                    async with self.document_processor.spool_upload(file, self.max_batch_upload_size) as archive:
+                        async for name, spooled in self.document_processor.unpack_zip(archive.path):
+                            if spooled is None:
+                                skipped.append(f"{file.filename}/{name}")
+                                continue
+                            file_type = await self.document_processor.get_file_type(name)
+                            documents.append(IngestionDocument.from_spooled(spooled, name, file_type))
+                            check_batch_size()
+                    continue
+                try:
+                    file_type = await self.document_processor.get_file_type(file.filename or "")
+                    spooled = await self.document_processor.spool_to_file(file)
+                except HTTPException as e:
+                    if e.status_code not in (400, 413):
+                        raise
+                    skipped.append(file.filename)
+                    continue
+                documents.append(IngestionDocument.from_spooled(spooled, file.filename, file_type))
+                check_batch_size()
+        except BaseException:
+            for document in documents:
+                Path(document.spool_path).unlink(missing_ok=True)
+            raise
+
+        if not documents:
+            raise HTTPException(
+                status_code=400,
+                detail="No supported documents in the upload. Supported types: pdf, docx"
+            )
+        job = IngestionJob(
+            job_id=str(uuid.uuid4()),
+            user_id=str(user_id),
+            documents=documents,
+            batch=True,
+            skipped=skipped,
+        )
+        await self._enqueue(job)
+        return job
+
+    async def submit_reindex(self, user_id: uuid.UUID) -> IngestionJob:
+        """
+        Enqueue a re-index of a user's stored documents from the extracted text cache.
+        
+        Documents indexed with other embedding or chunking settings are
+        chunked and embedded again without their original uploads.
+        """
+        job = IngestionJob(job_id=str(uuid.uuid4()), user_id=str(user_id), documents=[], reindex=True)
+        await self._enqueue(job)
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Return the job with this id, or None if it is unknown or expired."""
+        return await self.backend.load(job_id)
+
+    def start(self) -> None:
+        """Start the worker pool."""
+        if self._workers:
+            return
+        self._workers = [asyncio.ensure_future(self._worker(index)) for index in range(self.max_workers)]
+        self._heartbeat = asyncio.ensure_future(self.backend.heartbeat())
+        logger.info(f"Started {self.max_workers} ingestion workers")
+
+    async def stop(self) -> None:
+        """Stop the worker pool. Running jobs are put back on the queue."""
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        await self.backend.close()
+        logger.info("Stopped ingestion workers")
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job_id = await self.backend.dequeue(timeout=1.0, worker=index)
+                if job_id is None:
+                    continue
+                try:
+                    await self._handle(job_id)
+                finally:
+                    # Requeued or cancelled jobs are already back on the queue
+                    await self.backend.ack(job_id, index)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker {index} error: {e}", exc_info=True)
+                await asyncio.sleep(1.0)
+
+    async def _handle(self, job_id: str) -> None:
+        job = await self.backend.load(job_id)
+        if job is None:
+            logger.warning(f"Ingestion job {job_id} expired before it ran")
+            return
+        if not await self.backend.try_acquire_user_slot(job.user_id, self.max_jobs_per_user):
+            await self.backend.enqueue(job_id)
+            await asyncio.sleep(self.REQUEUE_DELAY)
+            return
+        try:
+            await self._run(job)
+        finally:
+            await self.backend.release_user_slot(job.user_id)
+
+    async def _run(self, job: IngestionJob) -> None:
+        job.status = "running"
+        job.stage = "starting"
+        job.started_at = time.time()
+        await self.backend.save(job)
+
+        async def on_progress(stage: str, chunks_embedded: int) -> None:
+            job.stage = stage
+            job.chunks_embedded = chunks_embedded
+            await self.backend.save(job)
+
+        try:
+            pipeline = RAGPipeline()
+            if job.reindex:
+                result = await pipeline.reindex_stored_documents(uuid.UUID(job.user_id), on_progress)
+            elif job.batch:
+                result = await pipeline.process_spooled_documents(
+                    [(document.to_spooled(), document.file_name, document.file_type) for document in job.documents],
+                    uuid.UUID(job.user_id),
+                    on_progress
+                )
+            else:
+                document = job.documents[0]
+                result = await pipeline.process_spooled_document(
+                    document.to_spooled(), document.file_name, document.file_type, uuid.UUID(job.user_id), on_progress
+                )
+            job.result = result
+            job.status = "failed" if result["status"] == "error" else "completed"
+            job.error = None if job.status == "completed" else result["message"]
+            if job.status == "completed":
+                # Duplicates, copies and reused chunks were not embedded
+                job.chunks_embedded = result["chunks_added"]
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so it runs again after restart or on another worker
+            job.status = job.stage = "queued"
+            job.started_at = None
+            await self.backend.save(job)
+            await self.backend.enqueue(job.job_id)
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion job {job.job_id} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+
+        job.stage = job.status
+        job.finished_at = time.time()
+        await self.backend.save(job)
+        for document in job.documents:
+            Path(document.spool_path).unlink(missing_ok=True)
+        logger.info(f"Ingestion job {job.job_id} {job.status} in {job.finished_at - job.started_at:.2f}s")
+
+
+_ingestion_service: Optional[IngestionService] = None
+
+
+def get_ingestion_service() -> IngestionService:
+    """Return the process-wide ingestion service, creating it if needed."""
+    global _ingestion_service
+    if _ingestion_service is None:
+        _ingestion_service = IngestionService()
+    return _ingestion_service
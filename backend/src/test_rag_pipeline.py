@@ -35,11 +35,11 @@ class MockUploadFile:
         return content_types.get(ext, 'application/octet-stream')
     
     async def read(self, size: int = -1) -> bytes:
-        """Read file content"""
-        if size == -1:
-            return self._content
-        else:
-            return self._content[:size]
+        """Read file content from the current position"""
+        end = len(self._content) if size == -1 else self._position + size
+        data = self._content[self._position:end]
+        self._position += len(data)
+        return data
     
     async def seek(self, position: int) -> None:
         """Seek to position in file"""
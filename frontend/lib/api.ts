@@ -32,6 +32,38 @@ export interface ApiInfoResponse {
   }>
 }
 
+export interface JobStatus {
+  job_id: string
+  status: "queued" | "running" | "completed" | "failed"
+  stage: string
+  chunks_embedded: number
+  result: { status: string; message: string } | null
+  error: string | null
+}
+
+// Milliseconds between two polls of an ingestion job
+const JOB_POLL_INTERVAL = 1000
+
+// The backend answers uploads with 202 and indexes them in a background job;
+// poll the job until it has finished
+async function waitForJob(statusUrl: string): Promise<JobStatus> {
+  while (true) {
+    const response = await fetch(`/api${statusUrl}`, {
+      method: "GET",
+    })
+
+    if (!response.ok) {
+      throw new Error("Job status request failed")
+    }
+
+    const job: JobStatus = await response.json()
+    if (job.status === "completed" || job.status === "failed") {
+      return job
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL))
+  }
+}
+
 export async function uploadDocuments(files: File[], userId: string): Promise<UploadResponse> {
   try {
     const results = []
@@ -51,7 +83,15 @@ export async function uploadDocuments(files: File[], userId: string): Promise<Up
       }
 
       const result = await response.json()
-      results.push(result)
+      if (result.status_url) {
+        const job = await waitForJob(result.status_url)
+        if (job.status === "failed") {
+          throw new Error(`Indexing failed for ${file.name}: ${job.error || "Unknown error"}`)
+        }
+        results.push(job.result)
+      } else {
+        results.push(result)
+      }
     }
 
     return {